@@ -0,0 +1,14 @@
+# benchmarks - Programas sintéticos y mediciones de rendimiento por etapa
+#
+#     python -m benchmarks                 1k, 10k y 100k líneas, compara con linea_base.json
+#     python -m benchmarks --completo      hasta 1M de líneas
+#     python -m benchmarks --guardar-base  reemplaza la línea base
+import os
+import sys
+
+# Los módulos del compilador están en la raíz del repositorio
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _RAIZ not in sys.path:
+    sys.path.insert(0, _RAIZ)
+
+from benchmarks.generador import GeneradorProgramas, generar_programa
@@ -0,0 +1,6 @@
+# __main__.py - python -m benchmarks
+import sys
+
+from benchmarks.ejecutar import main
+
+sys.exit(main())
@@ -0,0 +1,192 @@
+# ejecutar.py - Mide cada etapa del compilador con programas sintéticos de varios tamaños
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+
+import cache
+from sesion import CompilationSession
+from benchmarks.generador import GeneradorProgramas, MEZCLA_DEFECTO
+
+ETAPAS = ('lexico', 'sintactico', 'semantico', 'intermedio', 'optimizacion', 'llvm')
+
+# Tamaños (en líneas) de una corrida normal y de una completa (hasta 1M de líneas)
+TAMAÑOS_DEFECTO = (1000, 10000, 100000)
+TAMAÑOS_COMPLETOS = (1000, 10000, 100000, 1000000)
+
+LINEA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'linea_base.json')
+
+# Una etapa es regresión si tarda más de (1 + UMBRAL) veces la línea base y
+# además al menos MINIMO_MS más (las etapas muy cortas varían mucho entre corridas)
+UMBRAL = 0.25
+MINIMO_MS = 5.0
+
+def medir_programa(texto, repeticiones=1):
+    """Tiempos de cada etapa sobre texto: por etapa, la repetición más rápida.
+
+    Cada repetición usa una sesión nueva con la caché de artefactos apagada,
+    así que todas las etapas se calculan de verdad"""
+    mejores = {}
+    artefactos = cache.ARTEFACTOS_ACTIVOS
+    cache.ARTEFACTOS_ACTIVOS = False
+    try:
+        for _ in range(repeticiones):
+            gc.collect()
+            sesion = CompilationSession(texto)
+            # Cada etapa se pide por separado para que ninguna quede anidada en otra
+            sesion.tokens
+            sesion.analisis_sintactico
+            sesion.analisis_semantico
+            sesion.codigo_intermedio
+            sesion.optimizacion
+            sesion.llvm_ir
+            for etapa in sesion.medicion.como_dict()['etapas']:
+                anterior = mejores.get(etapa['etapa'])
+                if anterior is None or etapa['pared_ms'] < anterior['pared_ms']:
+                    mejores[etapa['etapa']] = {
+                        'pared_ms': etapa['pared_ms'],
+                        'cpu_ms': etapa['cpu_ms'],
+                        'elementos': etapa['elementos'],
+                    }
+            errores = len(sesion.analisis_sintactico.get('errors') or ()) + len(sesion.analisis_semantico['errors'])
+            del sesion
+    finally:
+        cache.ARTEFACTOS_ACTIVOS = artefactos
+    if errores:
+        raise RuntimeError(f"El programa sintético tiene {errores} errores de compilación")
+    return {etapa: mejores[etapa] for etapa in ETAPAS if etapa in mejores}
+
+def ejecutar(tamaños=TAMAÑOS_DEFECTO, repeticiones=1, mostrar=True, **opciones):
+    """Mide todas las etapas para cada tamaño; opciones van a GeneradorProgramas"""
+    resultados = {}
+    parametros = None
+    for lineas in tamaños:
+        generador = GeneradorProgramas(lineas, **opciones)
+        parametros = generador.parametros()
+        texto = generador.generar()
+        inicio = time.perf_counter()
+        etapas = medir_programa(texto, repeticiones)
+        resultados[str(lineas)] = {
+            'lineas': texto.count("\n"),
+            'bytes': len(texto.encode('utf-8')),
+            'etapas': etapas,
+        }
+        if mostrar:
+            print(f"{lineas} líneas ({time.perf_counter() - inicio:.1f} s)")
+            for etapa, datos in etapas.items():
+                print(f"  {etapa:<14} {datos['pared_ms']:>12.1f} ms")
+    if parametros is not None:
+        del parametros['lineas']
+    return {
+        'version': cache.version_compilador(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeticiones': repeticiones,
+        'generador': parametros,
+        'resultados': resultados,
+    }
+
+def comparar(actual, base, umbral=UMBRAL, minimo_ms=MINIMO_MS):
+    """Etapas más lentas que la línea base: lista de (tamaño, etapa, base_ms, actual_ms).
+
+    Solo se comparan los tamaños y etapas presentes en ambos resultados"""
+    regresiones = []
+    for tamaño, medido in actual['resultados'].items():
+        referencia = base.get('resultados', {}).get(tamaño)
+        if referencia is None:
+            continue
+        for etapa, datos in medido['etapas'].items():
+            anterior = referencia['etapas'].get(etapa)
+            if anterior is None:
+                continue
+            base_ms, actual_ms = anterior['pared_ms'], datos['pared_ms']
+            if actual_ms > base_ms * (1 + umbral) and actual_ms - base_ms >= minimo_ms:
+                regresiones.append((tamaño, etapa, base_ms, actual_ms))
+    return regresiones
+
+def _escribir_json(ruta, datos):
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, ensure_ascii=False, indent=2)
+        archivo.write("\n")
+
+def _mezcla(texto):
+    """'asignacion=6,if=2' -> dict de pesos"""
+    mezcla = {}
+    for parte in filter(None, (p.strip() for p in texto.split(','))):
+        tipo, _, peso = parte.partition('=')
+        mezcla[tipo.strip()] = float(peso) if peso else 1.0
+    return mezcla
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description="Mide cada etapa del compilador con programas sintéticos y "
+                    "compara contra una línea base")
+    parser.add_argument('--tamaños', '--tamanos', dest='tamaños',
+                        help="líneas de cada programa, separadas por comas "
+                             f"(por defecto {','.join(map(str, TAMAÑOS_DEFECTO))})")
+    parser.add_argument('--completo', action='store_true',
+                        help=f"usar {','.join(map(str, TAMAÑOS_COMPLETOS))} líneas")
+    parser.add_argument('--repeticiones', type=int, default=1,
+                        help="repeticiones por tamaño (se toma la más rápida)")
+    parser.add_argument('--profundidad', type=int, default=3, help="anidamiento máximo de bloques")
+    parser.add_argument('--profundidad-expr', type=int, default=3, help="profundidad máxima de expresiones")
+    parser.add_argument('--funciones', type=int, default=0, help="funciones declaradas")
+    parser.add_argument('--mezcla', type=_mezcla,
+                        help="pesos de sentencias, p. ej. 'asignacion=6,cout=2,cin=1,if=2,while=1,do=1' "
+                             f"(tipos: {', '.join(MEZCLA_DEFECTO)})")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida', help="archivo JSON donde escribir los resultados")
+    parser.add_argument('--base', default=LINEA_BASE, help="línea base con la que comparar")
+    parser.add_argument('--guardar-base', action='store_true',
+                        help="escribir los resultados como nueva línea base en lugar de comparar")
+    parser.add_argument('--umbral', type=float, default=UMBRAL,
+                        help="aumento relativo tolerado antes de marcar una regresión (0.25 = 25%%)")
+    parser.add_argument('--minimo-ms', type=float, default=MINIMO_MS,
+                        help="aumento absoluto mínimo para marcar una regresión")
+    opciones = parser.parse_args(argumentos)
+
+    if opciones.tamaños:
+        tamaños = [int(t) for t in opciones.tamaños.split(',') if t.strip()]
+    else:
+        tamaños = TAMAÑOS_COMPLETOS if opciones.completo else TAMAÑOS_DEFECTO
+
+    try:
+        datos = ejecutar(tamaños, opciones.repeticiones,
+                         profundidad=opciones.profundidad,
+                         profundidad_expr=opciones.profundidad_expr,
+                         funciones=opciones.funciones,
+                         mezcla=opciones.mezcla,
+                         semilla=opciones.semilla)
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    if opciones.salida:
+        _escribir_json(opciones.salida, datos)
+        print(f"Resultados escritos en {opciones.salida}")
+    if opciones.guardar_base:
+        _escribir_json(opciones.base, datos)
+        print(f"Línea base escrita en {opciones.base}")
+        return 0
+
+    if not os.path.exists(opciones.base):
+        print(f"No hay línea base en {opciones.base} (use --guardar-base)")
+        return 0
+    with open(opciones.base, encoding='utf-8') as archivo:
+        base = json.load(archivo)
+    if base.get('generador') != datos['generador']:
+        print("Aviso: la línea base se generó con otros parámetros del generador")
+    regresiones = comparar(datos, base, opciones.umbral, opciones.minimo_ms)
+    if not regresiones:
+        print(f"Sin regresiones respecto de la línea base (umbral {opciones.umbral:.0%})")
+        return 0
+    print(f"Regresiones respecto de la línea base (umbral {opciones.umbral:.0%}):")
+    for tamaño, etapa, base_ms, actual_ms in regresiones:
+        print(f"  {tamaño} líneas, {etapa}: {base_ms:.1f} ms -> {actual_ms:.1f} ms "
+              f"({actual_ms / base_ms - 1:+.0%})")
+    return 1
@@ -0,0 +1,151 @@
+# generador.py - Programas sintéticos válidos de tamaño y forma configurables
+import random
+
+# Peso de cada tipo de sentencia en la mezcla por defecto
+MEZCLA_DEFECTO = {
+    'asignacion': 6,
+    'cout': 2,
+    'cin': 1,
+    'if': 2,
+    'while': 1,
+    'do': 1,
+}
+
+_COMPUESTAS = ('if', 'while', 'do')
+
+class GeneradorProgramas:
+    """Genera programas que el compilador acepta sin errores.
+
+    lineas: cantidad aproximada de líneas del programa (se corta al llegar).
+    profundidad: anidamiento máximo de bloques if/while/do.
+    profundidad_expr: profundidad máxima de las expresiones aritméticas.
+    funciones: cantidad de funciones declaradas al inicio del programa (no se
+    llaman: el análisis semántico todavía no registra las funciones definidas
+    con function, así que toda llamada sería un error).
+    mezcla: dict tipo de sentencia -> peso (claves de MEZCLA_DEFECTO).
+    variables: cantidad de variables int (más una bool por cada cuatro).
+    semilla: el mismo valor produce siempre el mismo programa.
+
+    Solo se usa aritmética entera con + - * (sin / ni reales), para que
+    todas las etapas hasta llvm_generator procesen el programa completo"""
+
+    def __init__(self, lineas=1000, profundidad=3, profundidad_expr=3, funciones=0,
+                 mezcla=None, variables=16, semilla=0):
+        if lineas < 1:
+            raise ValueError("El programa debe tener al menos una línea")
+        mezcla = dict(MEZCLA_DEFECTO if mezcla is None else mezcla)
+        desconocidas = set(mezcla) - set(MEZCLA_DEFECTO)
+        if desconocidas:
+            raise ValueError(f"Tipos de sentencia desconocidos: {', '.join(sorted(desconocidas))}")
+        if not any(peso > 0 for peso in mezcla.values()):
+            raise ValueError("La mezcla de sentencias necesita al menos un peso positivo")
+        self.lineas = lineas
+        self.profundidad = profundidad
+        self.profundidad_expr = profundidad_expr
+        self.funciones = funciones
+        self.mezcla = mezcla
+        self.enteras = [f"v{i}" for i in range(max(1, variables))]
+        self.booleanas = [f"b{i}" for i in range(max(1, variables // 4))]
+        self.semilla = semilla
+
+    def parametros(self):
+        """Parámetros del generador (para guardarlos junto a los resultados)"""
+        return {
+            'lineas': self.lineas,
+            'profundidad': self.profundidad,
+            'profundidad_expr': self.profundidad_expr,
+            'funciones': self.funciones,
+            'mezcla': self.mezcla,
+            'variables': len(self.enteras),
+            'semilla': self.semilla,
+        }
+
+    def generar(self):
+        """Texto fuente del programa"""
+        self._azar = random.Random(self.semilla)
+        self._tipos = [tipo for tipo, peso in self.mezcla.items() if peso > 0]
+        self._pesos = [self.mezcla[tipo] for tipo in self._tipos]
+        self._salida = salida = ["main {"]
+        salida.append(f"    int {', '.join(self.enteras)};")
+        salida.append(f"    bool {', '.join(self.booleanas)};")
+        for i in range(self.funciones):
+            self._funcion(i)
+        # Cada sentencia de primer nivel cierra todos sus bloques, así que el
+        # programa queda bien formado aunque se corte al llegar a las líneas
+        while len(salida) < self.lineas - 1:
+            self._sentencia(1)
+        salida.append("}")
+        texto = "\n".join(salida) + "\n"
+        del self._azar, self._salida
+        return texto
+
+    def _funcion(self, i):
+        sangria = "    "
+        parametros = ", ".join(f"int p{j}" for j in range(2))
+        self._salida.append(f"{sangria}function int f{i}({parametros}) {{")
+        self._salida.append(f"{sangria}    int r{i};")
+        self._salida.append(f"{sangria}    r{i} = {self._expresion(self.profundidad_expr, ('p0', 'p1'))};")
+        self._salida.append(f"{sangria}    return r{i};")
+        self._salida.append(f"{sangria}}}")
+
+    def _sentencia(self, nivel):
+        tipo = self._azar.choices(self._tipos, self._pesos)[0]
+        if tipo in _COMPUESTAS and nivel > self.profundidad:
+            tipo = 'asignacion'
+        sangria = "    " * nivel
+        salida = self._salida
+        if tipo == 'asignacion':
+            if self._azar.random() < 0.2:
+                destino = self._azar.choice(self.booleanas)
+                salida.append(f"{sangria}{destino} = {self._condicion()};")
+            else:
+                destino = self._azar.choice(self.enteras)
+                salida.append(f"{sangria}{destino} = {self._expresion(self.profundidad_expr)};")
+        elif tipo == 'cout':
+            salida.append(f"{sangria}cout << {self._expresion(self.profundidad_expr)};")
+        elif tipo == 'cin':
+            salida.append(f"{sangria}cin >> {self._azar.choice(self.enteras)};")
+        elif tipo == 'if':
+            salida.append(f"{sangria}if ({self._condicion()}) {{")
+            self._bloque(nivel)
+            if self._azar.random() < 0.5:
+                salida.append(f"{sangria}}} else {{")
+                self._bloque(nivel)
+            salida.append(f"{sangria}}}")
+        elif tipo == 'while':
+            salida.append(f"{sangria}while ({self._condicion()}) {{")
+            self._bloque(nivel)
+            salida.append(f"{sangria}}}")
+        else:
+            salida.append(f"{sangria}do {{")
+            self._bloque(nivel)
+            salida.append(f"{sangria}}} while ({self._condicion()});")
+
+    def _bloque(self, nivel):
+        for _ in range(self._azar.randint(1, 4)):
+            self._sentencia(nivel + 1)
+
+    def _expresion(self, profundidad, nombres=None):
+        """Expresión entera de hasta profundidad niveles de operadores"""
+        azar = self._azar
+        if profundidad <= 0 or azar.random() < 0.3:
+            if azar.random() < 0.3:
+                return str(azar.randint(0, 99))
+            return azar.choice(nombres or self.enteras)
+        operador = azar.choice(('+', '-', '*'))
+        izquierda = self._expresion(profundidad - 1, nombres)
+        derecha = self._expresion(profundidad - 1, nombres)
+        return f"({izquierda} {operador} {derecha})"
+
+    def _condicion(self):
+        azar = self._azar
+        relacional = azar.choice(('<', '<=', '>', '>=', '==', '!='))
+        condicion = f"{self._expresion(1)} {relacional} {self._expresion(1)}"
+        if azar.random() < 0.25:
+            logico = azar.choice(('&&', '||'))
+            condicion = f"{condicion} {logico} {azar.choice(self.booleanas)}"
+        return condicion
+
+def generar_programa(lineas=1000, **opciones):
+    """Texto de un programa sintético (ver GeneradorProgramas)"""
+    return GeneradorProgramas(lineas, **opciones).generar()
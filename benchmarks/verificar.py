@@ -0,0 +1,288 @@
+# verificar.py - Compila programas de punta a punta y compara lo que imprimen
+#
+#     python -m benchmarks.verificar                 run de un programa, programas profundos y lli
+#     python -m benchmarks.verificar --programas 200 más programas sintéticos con lli
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchmarks import _RAIZ
+from benchmarks.generador import GeneradorProgramas
+import cache
+from cuadruplos import (ASIGNAR, OPERACION, SALIDA, ENTRADA, ETIQUETA, SALTO, SALTO_SI, SALTO_SI_NO,
+                        CONSTANTE, CADENA)
+from sesion import CompilationSession, _generar_llvm
+
+# Programa con entrada, asignaciones entre variables y salidas de variables,
+# constantes y expresiones: (fuente, entrada estándar, salida esperada)
+PROGRAMA_RUN = ("""main {
+  int a, b, c;
+  cin >> a;
+  b = a * 3 + 1;
+  c = b;
+  cout << c;
+  cout << 42;
+  cout << a + b;
+  cout << b / 2 - a % 3;
+}
+""", "5\n", "16\n42\n21\n6\n")
+
+# Control de flujo de cada forma: (fuente, entrada estándar)
+PROGRAMA_FLUJO = ("""main {
+  int a, b, i, n;
+  cin >> n;
+  a = 0;
+  b = 1;
+  while (a < n) { a = a + 1; }
+  if (a == 6) { b = 2; } else { b = 3; }
+  do { b = b * 2; i = i + 1; } while (i < 3);
+  if (b > 100) { b = 0; }
+  cout << a;
+  cout << b;
+  cout << a * 1000000 * 5000;
+}
+""", "6\n")
+
+# Operandos reales: el código LLVM es i32 y trunca cada constante real, así
+# que plegarlas no puede cambiar lo que se imprime: (fuente, entrada estándar)
+PROGRAMA_REALES = ("""main {
+  float x, y, z;
+  x = 3.5;
+  y = x * 2.0;
+  cout << y;
+  z = 7 / 2.0 + x;
+  cout << z;
+  if (x * 2.0 > 6.5) { cout << 1; } else { cout << 2; }
+  while (y < 9.5) { y = y + 1; }
+  cout << y - 0.5;
+}
+""", "")
+
+# Sentencias anidadas y una expresión larga, más profundas que el límite de
+# recursión de Python: (nombre, fuente, salida esperada)
+PROFUNDIDAD = 3000
+PROGRAMAS_PROFUNDOS = (
+    ("sentencias anidadas",
+     "main {\n  int x;\n" + "  if (x < 5) {\n" * PROFUNDIDAD + "  x = x + 1;\n" + "  }\n" * PROFUNDIDAD
+     + "  cout << x;\n}\n", "1\n"),
+    ("expresión larga",
+     "main {\n  int x;\n  x = " + " + ".join(["1"] * PROFUNDIDAD) + ";\n  cout << x;\n}\n",
+     f"{PROFUNDIDAD}\n"),
+)
+
+# Entrada estándar de los programas sintéticos (los cin que sobran leen 0)
+ENTRADA_SINTETICOS = "3 -2 7 0 5 11 -9 4 1 8 2 -5 6 13 -1 9\n"
+
+# Pasos del intérprete antes de descartar un programa (sus ciclos pueden no
+# terminar). Los sintéticos que no terminan enseguida casi nunca terminan
+LIMITE_PASOS = 200000
+LIMITE_SINTETICOS = 20000
+
+def _entero(valor):
+    """valor con la aritmética i32 del código LLVM (desborda dando la vuelta)"""
+    return (valor + 2**31) % 2**32 - 2**31
+
+def _dividir(a, b):
+    """sdiv: el cociente se trunca hacia cero"""
+    cociente = abs(a) // abs(b)
+    return cociente if (a < 0) == (b < 0) else -cociente
+
+_OPERACIONES = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': _dividir,
+    '%': lambda a, b: a - b * _dividir(a, b),
+    '<': lambda a, b: int(a < b),
+    '<=': lambda a, b: int(a <= b),
+    '>': lambda a, b: int(a > b),
+    '>=': lambda a, b: int(a >= b),
+    '==': lambda a, b: int(a == b),
+    '!=': lambda a, b: int(a != b),
+    '&&': lambda a, b: int(bool(a) and bool(b)),
+    '||': lambda a, b: int(bool(a) or bool(b)),
+}
+
+def interpretar(programa, entrada='', limite=LIMITE_PASOS):
+    """Ejecuta un ProgramaCuadruplos con la semántica del código LLVM.
+
+    Todas las variables valen 0 al empezar; cada cin lee el siguiente entero
+    de entrada (sin más enteros, lee 0, como el código LLVM); cada
+    cout de un número lo imprime en su línea. Devuelve el texto impreso, o
+    None si el programa no termina en limite pasos o divide por cero"""
+    valores, clases = programa.operandos.valores, programa.operandos.clases
+    codigos, destinos, operadores = programa.codigos, programa.destinos, programa.operadores
+    izquierdos, derechos = programa.izquierdos, programa.derechos
+    etiquetas = {valores[destinos[i]]: i for i in programa.filas(ETIQUETA)}
+    memoria = {}
+    lectura = iter(int(numero) for numero in entrada.split())
+    impreso = []
+
+    def valor(operando):
+        if clases[operando] == CONSTANTE:
+            return int(valores[operando])
+        return memoria.get(valores[operando], 0)
+
+    i, pasos = 0, 0
+    while i < len(codigos):
+        pasos += 1
+        if pasos > limite:
+            return None
+        codigo = codigos[i]
+        if codigo == ASIGNAR:
+            memoria[valores[destinos[i]]] = valor(izquierdos[i])
+        elif codigo == OPERACION:
+            operador, derecho = valores[operadores[i]], valor(derechos[i])
+            if operador in ('/', '%') and derecho == 0:
+                return None
+            memoria[valores[destinos[i]]] = _entero(_OPERACIONES[operador](valor(izquierdos[i]), derecho))
+        elif codigo == SALIDA:
+            if clases[izquierdos[i]] == CADENA:
+                impreso.append(valores[izquierdos[i]][1:-1])
+            else:
+                impreso.append(f"{valor(izquierdos[i])}\n")
+        elif codigo == ENTRADA:
+            memoria[valores[destinos[i]]] = _entero(next(lectura, 0))
+        elif codigo == SALTO:
+            i = etiquetas[valores[destinos[i]]]
+            continue
+        elif codigo in (SALTO_SI, SALTO_SI_NO):
+            if bool(valor(izquierdos[i])) == (codigo == SALTO_SI):
+                i = etiquetas[valores[destinos[i]]]
+                continue
+        i += 1
+    return ''.join(impreso)
+
+def verificar_lli(fuente, entrada, limite=LIMITE_PASOS):
+    """Compara lo que imprime el LLVM del programa (con lli) con el intérprete
+    sobre el código intermedio sin optimizar.
+
+    Devuelve (comparado, problema): comparado es False si el programa no
+    termina en limite pasos; problema es None si las salidas coinciden"""
+    sesion = CompilationSession(fuente)
+    esperado = interpretar(sesion.codigo_intermedio[0], entrada, limite)
+    if esperado is None:
+        return False, None
+    salida, problema = _ejecutar_lli(sesion.llvm_ir, entrada)
+    if problema is None and salida != esperado:
+        problema = f"lli imprimió {salida!r}, el intérprete {esperado!r}"
+    return True, problema
+
+def verificar_optimizacion(fuente, entrada=''):
+    """Compara con lli el LLVM del programa optimizado y sin optimizar.
+
+    Devuelve None si imprimen lo mismo; si no, la descripción del problema"""
+    sesion = CompilationSession(fuente)
+    sin_optimizar, problema = _ejecutar_lli(_generar_llvm(sesion.quadruples, sesion.tabla_simbolos), entrada)
+    if problema is not None:
+        return f"sin optimizar: {problema}"
+    optimizado, problema = _ejecutar_lli(sesion.llvm_ir, entrada)
+    if problema is not None:
+        return f"optimizado: {problema}"
+    if optimizado != sin_optimizar:
+        return f"optimizado imprimió {optimizado!r}, sin optimizar {sin_optimizar!r}"
+    return None
+
+def _ejecutar_lli(codigo, entrada):
+    """(salida, problema) de ejecutar el código LLVM con lli; problema es None si terminó bien"""
+    with tempfile.TemporaryDirectory(prefix='pythoncompiler-') as temporal:
+        ruta = os.path.join(temporal, 'programa.ll')
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            archivo.write(codigo)
+        try:
+            resultado = subprocess.run(['lli', ruta], input=entrada, capture_output=True,
+                                       text=True, timeout=60)
+        except subprocess.TimeoutExpired:
+            return None, "lli no terminó"
+    if resultado.returncode != 0:
+        return None, f"lli terminó con {resultado.returncode}:\n{resultado.stderr.strip()}"
+    return resultado.stdout, None
+
+def verificar_profundo(fuente, esperado):
+    """Compila el programa con 'python -m compilador llvm' (con el límite de
+    recursión de siempre) y, si hay lli, lo ejecuta.
+
+    Devuelve None si compila (e imprime lo esperado); si no, la descripción del problema"""
+    resultado = subprocess.run([sys.executable, '-m', 'compilador', 'llvm'], input=fuente,
+                               capture_output=True, text=True, cwd=_RAIZ, timeout=300)
+    if resultado.returncode != 0:
+        return f"terminó con {resultado.returncode}:\n{resultado.stderr.strip()[-2000:]}"
+    if not shutil.which('lli'):
+        return None
+    salida, problema = _ejecutar_lli(resultado.stdout, '')
+    if problema is None and salida != esperado:
+        problema = f"lli imprimió {salida!r}, se esperaba {esperado!r}"
+    return problema
+
+def herramientas_disponibles():
+    """Hay con qué enlazar un ejecutable: clang, o llc y cc"""
+    return bool(shutil.which('clang') or (shutil.which('llc') and shutil.which('cc')))
+
+def verificar_run(programa=PROGRAMA_RUN):
+    """Compila y ejecuta el programa con 'python -m compilador run'.
+
+    Devuelve None si imprime lo esperado; si no, la descripción del problema"""
+    fuente, entrada, esperado = programa
+    with tempfile.TemporaryDirectory(prefix='pythoncompiler-') as temporal:
+        # El fuente va en un archivo: la entrada estándar es la del programa
+        ruta = os.path.join(temporal, 'programa.txt')
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            archivo.write(fuente)
+        resultado = subprocess.run([sys.executable, '-m', 'compilador', 'run', ruta],
+                                   input=entrada, capture_output=True, text=True,
+                                   cwd=_RAIZ, timeout=120)
+    if resultado.returncode != 0:
+        return f"terminó con {resultado.returncode}:\n{resultado.stderr.strip()}"
+    if resultado.stdout != esperado:
+        return f"imprimió {resultado.stdout!r}, se esperaba {esperado!r}"
+    return None
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.verificar',
+        description="Ejecuta programas compilados y compara su salida con la esperada")
+    parser.add_argument('--programas', type=int, default=50,
+                        help="programas sintéticos que terminan comparados con lli (por defecto 50)")
+    opciones = parser.parse_args(argumentos)
+
+    # Los programas de prueba no se guardan en la caché de artefactos
+    cache.ARTEFACTOS_ACTIVOS = False
+    fallas = 0
+    if herramientas_disponibles():
+        problema = verificar_run()
+        print(f"run: {problema or 'correcto'}")
+        fallas += problema is not None
+    else:
+        print("run: sin clang ni llc y cc, no se verifica")
+    for nombre, fuente, esperado in PROGRAMAS_PROFUNDOS:
+        problema = verificar_profundo(fuente, esperado)
+        print(f"{nombre} ({PROFUNDIDAD} niveles): {problema or 'correcto'}")
+        fallas += problema is not None
+
+    if not shutil.which('lli'):
+        print("lli: no está instalado, no se verifica")
+        return 1 if fallas else 0
+    comparado, problema = verificar_lli(*PROGRAMA_FLUJO)
+    print(f"lli if/while/do: {problema or 'correcto'}")
+    fallas += problema is not None
+    problema = verificar_optimizacion(*PROGRAMA_REALES)
+    print(f"lli reales con y sin optimizar: {problema or 'correcto'}")
+    fallas += problema is not None
+    # Las semillas siguen hasta juntar la cantidad pedida de programas que terminan
+    comparados, semilla = 0, 0
+    while comparados < opciones.programas:
+        fuente = GeneradorProgramas(lineas=20 + semilla % 60, variables=6, semilla=semilla).generar()
+        comparado, problema = verificar_lli(fuente, ENTRADA_SINTETICOS, LIMITE_SINTETICOS)
+        if problema:
+            print(f"lli programa sintético {semilla}: {problema}")
+            fallas += 1
+        comparados += comparado
+        semilla += 1
+    print(f"lli programas sintéticos: {comparados} comparados ({semilla - comparados} no terminan)")
+    return 1 if fallas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
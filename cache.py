@@ -0,0 +1,232 @@
+# cache.py - Caché persistente del compilador en el directorio del usuario
+import hashlib
+import os
+import pickle
+import time
+from contextlib import contextmanager
+
+import traza
+
+_traza = traza.canal('cache')
+
+# Tiempos de arranque registrados por cada componente: nombre -> (ms, origen)
+ARRANQUE = {}
+
+def directorio_cache():
+    """Directorio de caché del usuario (la variable PYTHONCOMPILER_CACHE lo reemplaza)"""
+    ruta = os.environ.get('PYTHONCOMPILER_CACHE')
+    if not ruta:
+        if os.name == 'nt':
+            base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+        else:
+            base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        ruta = os.path.join(base, 'PythonCompiler')
+    os.makedirs(ruta, exist_ok=True)
+    return ruta
+
+def huella(*partes):
+    """Hash corto del contenido de las partes (definiciones de gramática, tokens, etc.)"""
+    return hashlib.sha256(repr(partes).encode('utf-8')).hexdigest()[:16]
+
+def reemplazo_atomico(ruta, escribir):
+    """Llama escribir(ruta_temporal) y mueve el archivo a ruta con os.replace.
+
+    Otro proceso que lea ruta ve el archivo anterior o el nuevo completo,
+    nunca uno a medio escribir"""
+    directorio, nombre = os.path.split(ruta)
+    temporal = os.path.join(directorio, f"tmp{os.getpid()}_{nombre}")
+    try:
+        escribir(temporal)
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+def cargar_o_construir(nombre, firma, construir):
+    """Devuelve el objeto guardado como nombre-firma.pickle o lo construye y lo guarda.
+
+    Si la caché no se puede leer o escribir se usa construir() sin más.
+    El tiempo que tomó queda registrado en ARRANQUE bajo nombre"""
+    inicio = time.perf_counter()
+    try:
+        ruta = os.path.join(directorio_cache(), f"{nombre}-{firma}.pickle")
+    except OSError:
+        objeto = construir()
+        registrar_arranque(nombre, inicio, 'generado')
+        return objeto
+    try:
+        with open(ruta, 'rb') as archivo:
+            objeto = pickle.load(archivo)
+        registrar_arranque(nombre, inicio, 'caché')
+        return objeto
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        _traza.aviso(f"Caché {nombre} inválida, se regenera ({e})", cache=nombre)
+    objeto = construir()
+    try:
+        def escribir(temporal):
+            with open(temporal, 'wb') as archivo:
+                pickle.dump(objeto, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        reemplazo_atomico(ruta, escribir)
+    except OSError as e:
+        _traza.aviso(f"No se pudo guardar la caché {nombre}: {e}", cache=nombre)
+    registrar_arranque(nombre, inicio, 'generado')
+    return objeto
+
+def registrar_arranque(nombre, inicio, origen):
+    """Guarda cuánto tardó en prepararse un componente desde inicio (perf_counter)"""
+    ARRANQUE[nombre] = ((time.perf_counter() - inicio) * 1000, origen)
+
+def reporte_arranque():
+    return ", ".join(f"{nombre} {ms:.1f} ms ({origen})" for nombre, (ms, origen) in ARRANQUE.items())
+
+# ============================================================
+# ARTEFACTOS DE COMPILACIÓN DIRECCIONADOS POR CONTENIDO
+# ============================================================
+# Resultados de cada etapa (AST, semántico, cuádruplos, LLVM, ensamblador)
+# guardados en disco bajo el hash de su entrada y de la versión del
+# compilador. Los tokens no: tokenizar es más rápido que leerlos de disco.
+# PYTHONCOMPILER_ARTEFACTOS=0 los desactiva y PYTHONCOMPILER_CACHE_MB fija el
+# tamaño máximo (se descartan los usados hace más tiempo).
+ARTEFACTOS_ACTIVOS = os.environ.get('PYTHONCOMPILER_ARTEFACTOS', '1') != '0'
+MAX_BYTES_ARTEFACTOS = int(os.environ.get('PYTHONCOMPILER_CACHE_MB', '256')) * 1024 * 1024
+
+# Dentro de solo_lectura() los artefactos se leen pero no se guardan
+_solo_lectura = False
+
+# Aciertos y fallos por etapa en este proceso: etapa -> [aciertos, fallos]
+ESTADISTICAS_ARTEFACTOS = {}
+
+_version_compilador = None
+_bytes_artefactos = None
+
+def version_compilador():
+    """Huella del código fuente del compilador (todos los .py del paquete).
+
+    Cualquier cambio en el compilador invalida los artefactos anteriores"""
+    global _version_compilador
+    if _version_compilador is None:
+        directorio = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256()
+        for nombre in sorted(os.listdir(directorio)):
+            if nombre.endswith('.py'):
+                digest.update(nombre.encode('utf-8'))
+                with open(os.path.join(directorio, nombre), 'rb') as archivo:
+                    digest.update(archivo.read())
+        _version_compilador = digest.hexdigest()[:16]
+    return _version_compilador
+
+def directorio_artefactos():
+    ruta = os.path.join(directorio_cache(), 'artefactos')
+    os.makedirs(ruta, exist_ok=True)
+    return ruta
+
+def _ruta_artefacto(etapa, partes):
+    digest = hashlib.sha256()
+    digest.update(f"{version_compilador()}\0{etapa}\0".encode('utf-8'))
+    for parte in partes:
+        digest.update(parte.encode('utf-8') if isinstance(parte, str) else repr(parte).encode('utf-8'))
+        digest.update(b'\0')
+    clave = digest.hexdigest()
+    return os.path.join(directorio_artefactos(), clave[:2], f"{etapa}-{clave}.pickle")
+
+def _contar(etapa, acierto):
+    conteo = ESTADISTICAS_ARTEFACTOS.setdefault(etapa, [0, 0])
+    conteo[0 if acierto else 1] += 1
+
+def cargar_artefacto(etapa, partes):
+    """Artefacto de la etapa para el contenido partes (tupla), o None si no está"""
+    if not ARTEFACTOS_ACTIVOS:
+        return None
+    try:
+        ruta = _ruta_artefacto(etapa, partes)
+        with open(ruta, 'rb') as archivo:
+            objeto = pickle.load(archivo)
+        # La fecha de modificación marca el último uso (orden LRU)
+        os.utime(ruta)
+    except FileNotFoundError:
+        _contar(etapa, False)
+        return None
+    except Exception as e:
+        _traza.aviso(f"Artefacto {etapa} inválido, se regenera ({e})", etapa=etapa)
+        _contar(etapa, False)
+        return None
+    _contar(etapa, True)
+    return objeto
+
+@contextmanager
+def solo_lectura():
+    """Las etapas calculadas dentro del bloque usan los artefactos guardados
+    pero no guardan los suyos (texto del editor, que cambia en cada edición)"""
+    global _solo_lectura
+    anterior, _solo_lectura = _solo_lectura, True
+    try:
+        yield
+    finally:
+        _solo_lectura = anterior
+
+def guardar_artefacto(etapa, partes, objeto):
+    """Guarda el artefacto (None no se guarda); los errores de disco o de pickle se ignoran"""
+    global _bytes_artefactos
+    if not ARTEFACTOS_ACTIVOS or _solo_lectura or objeto is None:
+        return
+    try:
+        datos = pickle.dumps(objeto, protocol=pickle.HIGHEST_PROTOCOL)
+        ruta = _ruta_artefacto(etapa, partes)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+
+        def escribir(temporal):
+            with open(temporal, 'wb') as archivo:
+                archivo.write(datos)
+        reemplazo_atomico(ruta, escribir)
+    except (OSError, pickle.PicklingError, RecursionError) as e:
+        _traza.aviso(f"No se pudo guardar el artefacto {etapa}: {e}", etapa=etapa)
+        return
+    if _bytes_artefactos is None:
+        _bytes_artefactos = sum(tamano for _, tamano, _ in _listar_artefactos())
+    else:
+        _bytes_artefactos += len(datos)
+    if _bytes_artefactos > MAX_BYTES_ARTEFACTOS:
+        _bytes_artefactos = _recortar_artefactos(MAX_BYTES_ARTEFACTOS * 9 // 10)
+
+def artefacto(etapa, partes, calcular, empacar=None, desempacar=None):
+    """Devuelve el artefacto guardado o lo calcula con calcular() y lo guarda.
+
+    empacar y desempacar convierten el objeto a la forma que se guarda y de
+    vuelta (p. ej. un árbol anidado en una lista plana, que pickle guarda sin
+    recursión)"""
+    objeto = cargar_artefacto(etapa, partes)
+    if objeto is not None:
+        return desempacar(objeto) if desempacar is not None else objeto
+    objeto = calcular()
+    if objeto is not None:
+        guardar_artefacto(etapa, partes, empacar(objeto) if empacar is not None else objeto)
+    return objeto
+
+def _listar_artefactos():
+    """(ruta, tamaño, último uso) de cada artefacto en disco"""
+    archivos = []
+    for raiz, _, nombres in os.walk(directorio_artefactos()):
+        for nombre in nombres:
+            ruta = os.path.join(raiz, nombre)
+            try:
+                info = os.stat(ruta)
+            except OSError:
+                continue
+            archivos.append((ruta, info.st_size, info.st_mtime))
+    return archivos
+
+def _recortar_artefactos(limite):
+    """Borra los artefactos usados hace más tiempo hasta quedar en limite bytes; devuelve el total"""
+    archivos = sorted(_listar_artefactos(), key=lambda archivo: archivo[2])
+    total = sum(tamano for _, tamano, _ in archivos)
+    for ruta, tamano, _ in archivos:
+        if total <= limite:
+            break
+        try:
+            os.remove(ruta)
+            total -= tamano
+        except OSError:
+            pass
+    return total
@@ -0,0 +1,300 @@
+# compilador.py - Compilador de línea de comandos, sin tkinter ni pygments
+#
+#     python -m compilador all programa.txt -o salida/
+#     python -m compilador llvm < programa.txt
+#     python -m compilador run programa.txt --medicion
+import time
+
+_INICIO = time.perf_counter()
+
+import argparse
+import json
+import os
+import sys
+
+import cache
+import traza
+from sesion import CompilationSession
+
+# Tiempo de importación de los módulos del compilador (sin la interfaz gráfica)
+_ARRANQUE_MS = (time.perf_counter() - _INICIO) * 1000
+
+COMANDOS = ('lex', 'parse', 'check', 'ir', 'opt', 'llvm', 'asm', 'run', 'all')
+
+# Extensión del artefacto que escribe cada comando
+EXTENSIONES = {
+    'lex': '.tokens',
+    'parse': '.ast',
+    'check': '.simbolos',
+    'ir': '.cuadruplos',
+    'opt': '.opt',
+    'llvm': '.ll',
+    'asm': '.s',
+}
+
+class ErrorCompilacion(Exception):
+    """Errores del programa fuente: se informan y el proceso termina con 1"""
+
+    def __init__(self, etapa, errores):
+        super().__init__(f"{len(errores)} errores {etapa}")
+        self.etapa = etapa
+        self.errores = errores
+
+class ErrorHerramienta(Exception):
+    """Falta una herramienta externa (llc, clang, cc) o falló: termina con 2"""
+
+# ============================================================
+# TEXTO DE CADA ETAPA
+# ============================================================
+def texto_tokens(tokens):
+    lineas = [f"{'LÍNEA':>5}  {'TOKEN':<12} LEXEMA"]
+    for tok in tokens:
+        lineas.append(f"{tok.lineno:>5}  {tok.type:<12} {tok.value}")
+    return "\n".join(lineas) + "\n"
+
+def texto_ast(raiz):
+    """Árbol indentado, un nodo por línea (recorrido iterativo)"""
+    lineas = []
+    pendientes = [(raiz, 0)]
+    while pendientes:
+        nodo, nivel = pendientes.pop()
+        if nodo is None:
+            continue
+        if not hasattr(nodo, 'children'):
+            lineas.append("  " * nivel + str(nodo))
+            continue
+        linea = f" (línea {nodo.lineno})" if getattr(nodo, 'lineno', 0) else ""
+        lineas.append("  " * nivel + repr(nodo) + linea)
+        pendientes.extend((hijo, nivel + 1) for hijo in reversed(nodo.children))
+    return "\n".join(lineas) + "\n"
+
+def texto_simbolos(simbolos):
+    lineas = [f"{'NOMBRE':<20} {'TIPO':<10} {'ALCANCE':<10} {'LÍNEA':>5}  VALOR"]
+    for simbolo in simbolos:
+        valor = "" if simbolo.valor is None else simbolo.valor
+        lineas.append(f"{simbolo.nombre:<20} {simbolo.tipo:<10} {simbolo.alcance:<10} "
+                      f"{simbolo.linea or '':>5}  {valor}")
+    return "\n".join(lineas) + "\n"
+
+# ============================================================
+# ETAPAS
+# ============================================================
+def _verificar_lexico(sesion):
+    errores = [f"Error léxico (línea {tok.lineno}): carácter no reconocido '{tok.value}'"
+               for tok in sesion.tokens.errores()]
+    if errores:
+        raise ErrorCompilacion('léxicos', errores)
+
+def _verificar_sintactico(sesion):
+    resultado = sesion.analisis_sintactico
+    if not resultado['success']:
+        raise ErrorCompilacion('sintácticos', [error.get('message', str(error)) if isinstance(error, dict)
+                                               else str(error) for error in resultado['errors']])
+
+def _verificar_semantico(sesion):
+    _verificar_sintactico(sesion)
+    errores = sesion.analisis_semantico['errors']
+    if errores:
+        raise ErrorCompilacion('semánticos', list(errores))
+
+def etapa_lex(sesion):
+    _verificar_lexico(sesion)
+    return texto_tokens(sesion.tokens)
+
+def etapa_parse(sesion):
+    _verificar_sintactico(sesion)
+    return texto_ast(sesion.ast)
+
+def etapa_check(sesion):
+    _verificar_semantico(sesion)
+    return texto_simbolos(sesion.symbol_table)
+
+def etapa_ir(sesion):
+    _verificar_semantico(sesion)
+    return sesion.codigo_intermedio[1]
+
+def etapa_opt(sesion):
+    _verificar_semantico(sesion)
+    cuadruplos, reporte = sesion.optimizacion
+    return reporte + "\n" + cuadruplos.texto("CÓDIGO INTERMEDIO OPTIMIZADO")
+
+def etapa_llvm(sesion):
+    _verificar_semantico(sesion)
+    return sesion.llvm_ir
+
+def _ejecutar_herramienta(sesion, nombre, argumentos, timeout=60):
+    import subprocess
+    try:
+        with sesion.medicion.etapa(nombre):
+            resultado = subprocess.run([nombre] + argumentos, capture_output=True, text=True, timeout=timeout)
+    except FileNotFoundError:
+        raise ErrorHerramienta(f"Herramienta '{nombre}' no encontrada. Instala LLVM.") from None
+    except subprocess.TimeoutExpired:
+        raise ErrorHerramienta(f"Tiempo de espera agotado en '{nombre}'") from None
+    if resultado.returncode != 0:
+        raise ErrorHerramienta(f"'{nombre}' falló:\n{resultado.stderr.strip()}")
+    return resultado
+
+def etapa_asm(sesion, directorio, base):
+    """Ensamblador del LLVM con llc (compartido con el IDE por la caché de artefactos).
+    Es código PIC: cc enlaza ejecutables PIE por defecto"""
+    codigo_llvm = etapa_llvm(sesion)
+    ruta_llvm = _escribir(directorio, base, '.ll', codigo_llvm)
+    ruta_asm = os.path.join(directorio, base + '.s')
+    ensamblador = cache.cargar_artefacto('ensamblador', (codigo_llvm,))
+    if ensamblador is None:
+        _ejecutar_herramienta(sesion, 'llc', ['-O2', '-relocation-model=pic', ruta_llvm, '-o', ruta_asm])
+        with open(ruta_asm, encoding='utf-8') as archivo:
+            ensamblador = archivo.read()
+        cache.guardar_artefacto('ensamblador', (codigo_llvm,), ensamblador)
+    else:
+        _escribir(directorio, base, '.s', ensamblador)
+    return ensamblador
+
+def etapa_ejecutable(sesion, directorio, base):
+    """Ejecutable con clang; sin clang, el ensamblador de llc enlazado con cc"""
+    import shutil
+    ruta_exe = os.path.join(directorio, base + ('.exe' if os.name == 'nt' else ''))
+    if shutil.which('clang'):
+        etapa_llvm(sesion)
+        ruta_llvm = _escribir(directorio, base, '.ll', sesion.llvm_ir)
+        _ejecutar_herramienta(sesion, 'clang', [ruta_llvm, '-o', ruta_exe])
+    else:
+        etapa_asm(sesion, directorio, base)
+        _ejecutar_herramienta(sesion, 'cc', [os.path.join(directorio, base + '.s'), '-o', ruta_exe])
+    return ruta_exe
+
+ETAPAS_TEXTO = {
+    'lex': etapa_lex,
+    'parse': etapa_parse,
+    'check': etapa_check,
+    'ir': etapa_ir,
+    'opt': etapa_opt,
+    'llvm': etapa_llvm,
+}
+
+# ============================================================
+# LÍNEA DE COMANDOS
+# ============================================================
+def _escribir(directorio, base, extension, texto):
+    ruta = os.path.join(directorio, base + extension)
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        archivo.write(texto)
+    return ruta
+
+def _leer_fuente(ruta):
+    if ruta == '-':
+        return sys.stdin.read(), 'programa'
+    with open(ruta, encoding='utf-8') as archivo:
+        return archivo.read(), os.path.splitext(os.path.basename(ruta))[0]
+
+def _compilar(comando, sesion, directorio, base):
+    """Ejecuta el comando; devuelve el código de salida"""
+    if comando in ETAPAS_TEXTO:
+        texto = ETAPAS_TEXTO[comando](sesion)
+        if directorio is None:
+            sys.stdout.write(texto)
+        else:
+            print(_escribir(directorio, base, EXTENSIONES[comando], texto))
+        return 0
+
+    if comando == 'all':
+        for etapa, generar in ETAPAS_TEXTO.items():
+            print(_escribir(directorio, base, EXTENSIONES[etapa], generar(sesion)))
+        etapa_asm(sesion, directorio, base)
+        print(os.path.join(directorio, base + '.s'))
+        print(etapa_ejecutable(sesion, directorio, base))
+        return 0
+
+    import tempfile
+    with tempfile.TemporaryDirectory(prefix='pythoncompiler-') as temporal:
+        if comando == 'asm':
+            ensamblador = etapa_asm(sesion, directorio or temporal, base)
+            if directorio is None:
+                sys.stdout.write(ensamblador)
+            else:
+                print(os.path.join(directorio, base + '.s'))
+            return 0
+
+        # run: el programa usa la entrada y salida estándar del proceso
+        import subprocess
+        ejecutable = etapa_ejecutable(sesion, directorio or temporal, base)
+        sys.stdout.flush()
+        with sesion.medicion.etapa('ejecucion'):
+            return subprocess.run([os.path.abspath(ejecutable)]).returncode
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m compilador',
+        description="Compila un programa sin la interfaz gráfica. Cada comando "
+                    "ejecuta las etapas necesarias y muestra (o escribe) su resultado")
+    parser.add_argument('comando', choices=COMANDOS,
+                        help="lex: tokens; parse: AST; check: tabla de símbolos; ir: cuádruplos; "
+                             "opt: cuádruplos optimizados; llvm: código LLVM; asm: ensamblador; "
+                             "run: compila y ejecuta; all: escribe todos los artefactos")
+    parser.add_argument('archivo', nargs='?', default='-',
+                        help="programa fuente ('-' o nada: entrada estándar)")
+    parser.add_argument('-o', '--salida', metavar='DIRECTORIO',
+                        help="directorio de los artefactos (por defecto, salida estándar; "
+                             "all usa el directorio actual)")
+    parser.add_argument('--medicion', action='store_true',
+                        help="mostrar en stderr el tiempo de arranque y de cada etapa")
+    parser.add_argument('--medicion-json', metavar='RUTA', help="escribir las mediciones en JSON")
+    parser.add_argument('--traza', metavar='NIVELES',
+                        help="niveles de traza, p. ej. 'debug' o 'aviso,semantico=debug'")
+    opciones = parser.parse_args(argumentos)
+
+    # La salida estándar lleva los artefactos (y la del programa en run): la
+    # traza va a stderr
+    traza.configurar(flujo=sys.stderr)
+    try:
+        if opciones.traza:
+            traza.configurar(niveles=opciones.traza)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        texto, base = _leer_fuente(opciones.archivo)
+    except OSError as e:
+        print(f"Error: no se pudo leer {opciones.archivo}: {e}", file=sys.stderr)
+        return 2
+    if not texto.strip():
+        print("Error: el programa está vacío", file=sys.stderr)
+        return 2
+
+    directorio = opciones.salida
+    if directorio is None and opciones.comando == 'all':
+        directorio = '.'
+    if directorio is not None:
+        os.makedirs(directorio, exist_ok=True)
+
+    sesion = CompilationSession(texto)
+    try:
+        codigo = _compilar(opciones.comando, sesion, directorio, base)
+    except ErrorCompilacion as e:
+        print(f"Errores {e.etapa}:", file=sys.stderr)
+        for error in e.errores:
+            print(f"  - {error}", file=sys.stderr)
+        codigo = 1
+    except (ErrorHerramienta, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        codigo = 2
+    except Exception as e:
+        # Una falla del compilador con una entrada válida: sin traceback
+        print(f"Error interno: {type(e).__name__}: {e}", file=sys.stderr)
+        codigo = 3
+
+    if opciones.medicion:
+        print(f"Arranque: {_ARRANQUE_MS:.1f} ms", file=sys.stderr)
+        if cache.ARRANQUE:
+            print(f"  {cache.reporte_arranque()}", file=sys.stderr)
+        print(sesion.medicion.resumen(), file=sys.stderr)
+    if opciones.medicion_json:
+        datos = sesion.medicion.como_dict()
+        datos['arranque_ms'] = _ARRANQUE_MS
+        with open(opciones.medicion_json, 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo, ensure_ascii=False, indent=2, default=str)
+    return codigo
+
+if __name__ == "__main__":
+    sys.exit(main())
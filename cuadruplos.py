@@ -0,0 +1,351 @@
+# cuadruplos.py - Código intermedio compacto: códigos enteros, columnas en arrays y operandos internados
+from array import array
+from collections.abc import Mapping
+from itertools import compress
+
+# Códigos de operación
+ASIGNAR = 0
+OPERACION = 1
+SALIDA = 2
+ENTRADA = 3
+ETIQUETA = 4
+SALTO = 5
+SALTO_SI = 6
+SALTO_SI_NO = 7
+
+# Códigos que terminan un bloque básico
+SALTOS = (SALTO, SALTO_SI, SALTO_SI_NO)
+
+# 'type' de cada código en la forma de dict de los cuádruplos
+TIPOS = ('assign', 'binary_op', 'output', 'input', 'label', 'goto', 'if_true', 'if_false')
+CODIGO_TIPO = {tipo: codigo for codigo, tipo in enumerate(TIPOS)}
+
+# Campos de cada código, en el orden de la forma de dict: (clave, columna).
+# Las etiquetas (de ETIQUETA y destino de los saltos) van en la columna destinos
+CAMPOS = (
+    (('target', 'destinos'), ('source', 'izquierdos')),
+    (('target', 'destinos'), ('operator', 'operadores'), ('left', 'izquierdos'), ('right', 'derechos')),
+    (('value', 'izquierdos'),),
+    (('target', 'destinos'),),
+    (('label', 'destinos'),),
+    (('label', 'destinos'),),
+    (('condition', 'izquierdos'), ('label', 'destinos')),
+    (('condition', 'izquierdos'), ('label', 'destinos')),
+)
+
+# Clases de operando
+NINGUNO = 0
+CONSTANTE = 1
+CADENA = 2
+TEMPORAL = 3
+VARIABLE = 4
+ROTULO = 5
+
+class Etiqueta(str):
+    """Nombre de una etiqueta de salto. Se interna aparte de los nombres de
+    variables, así que una variable L0 y la etiqueta L0 son operandos distintos"""
+    __slots__ = ()
+
+def _clase(valor):
+    if valor is None:
+        return NINGUNO
+    if valor.__class__ is Etiqueta:
+        return ROTULO
+    if isinstance(valor, (int, float)):
+        return CONSTANTE
+    if valor.startswith('"'):
+        return CADENA
+    if valor.startswith('temp_'):
+        return TEMPORAL
+    return VARIABLE
+
+def _clave(valor):
+    """Clave de internado: los nombres y None son su propia clave; las
+    constantes llevan su clase para que 1, 1.0 y True sean operandos distintos"""
+    return valor if valor.__class__ is str or valor is None else (valor.__class__, valor)
+
+class Operandos:
+    """Valores de los operandos (variables, temporales, constantes, cadenas y
+    operadores), cada uno guardado una sola vez. El id 0 es None.
+
+    clases guarda la clase de cada operando (NINGUNO, CONSTANTE, CADENA,
+    TEMPORAL, VARIABLE o ROTULO), calculada al internarlo"""
+    __slots__ = ('valores', 'clases', '_ids')
+
+    def __init__(self):
+        self.valores = [None]
+        self.clases = array('B', [NINGUNO])
+        self._ids = {_clave(None): 0}
+
+    def id(self, valor):
+        """Id del valor, agregándolo si es nuevo"""
+        try:
+            return self._ids[valor if valor.__class__ is str or valor is None else (valor.__class__, valor)]
+        except KeyError:
+            return self._agregar(valor)
+
+    def _agregar(self, valor):
+        nuevo = self._ids[_clave(valor)] = len(self.valores)
+        self.valores.append(valor)
+        self.clases.append(_clase(valor))
+        return nuevo
+
+    def clase(self, id_operando):
+        return self.clases[id_operando]
+
+    def __len__(self):
+        return len(self.valores)
+
+    def __getstate__(self):
+        return self.valores
+
+    def __setstate__(self, valores):
+        self.valores = valores
+        self.clases = array('B', map(_clase, valores))
+        self._ids = {_clave(valor): i for i, valor in enumerate(valores)}
+
+# Texto de las etiquetas y los saltos en los listados
+_TEXTO_SALTO = {
+    ETIQUETA: "{etiqueta}:",
+    SALTO: "GOTO {etiqueta}",
+    SALTO_SI: "IF {condicion} GOTO {etiqueta}",
+    SALTO_SI_NO: "IFFALSE {condicion} GOTO {etiqueta}",
+}
+
+class ProgramaCuadruplos:
+    """Cuádruplos guardados como columnas paralelas en arrays: código de
+    operación, destino, operador, operando izquierdo y derecho (ids de
+    operandos; 0 en los campos que el código no usa).
+
+    Los consumidores que esperan dicts pueden indexar o recorrer el programa:
+    cada elemento es una VistaCuadruplo, que se comporta como el dict
+    {'type': 'binary_op', 'target': ..., 'operator': ..., 'left': ..., 'right': ...}
+    sin crearlo. append() acepta esos dicts (las claves extra se ignoran)"""
+
+    def __init__(self, operandos=None):
+        self.operandos = operandos if operandos is not None else Operandos()
+        self.codigos = array('B')
+        self.destinos = array('I')
+        self.operadores = array('I')
+        self.izquierdos = array('I')
+        self.derechos = array('I')
+
+    @classmethod
+    def desde_dicts(cls, cuadruplos):
+        """Programa con los cuádruplos dados como dicts (o el mismo programa)"""
+        if isinstance(cuadruplos, ProgramaCuadruplos):
+            return cuadruplos
+        programa = cls()
+        for cuadruplo in cuadruplos:
+            programa.append(cuadruplo)
+        return programa
+
+    def agregar(self, codigo, destino=0, operador=0, izquierdo=0, derecho=0):
+        """Agrega un cuádruplo con ids de operandos ya internados"""
+        self.codigos.append(codigo)
+        self.destinos.append(destino)
+        self.operadores.append(operador)
+        self.izquierdos.append(izquierdo)
+        self.derechos.append(derecho)
+
+    def asignar(self, destino, fuente):
+        id_ = self.operandos.id
+        self.agregar(ASIGNAR, destino=id_(destino), izquierdo=id_(fuente))
+
+    def operacion(self, destino, operador, izquierdo, derecho):
+        id_ = self.operandos.id
+        self.agregar(OPERACION, id_(destino), id_(operador), id_(izquierdo), id_(derecho))
+
+    def operacion_temporal(self, operador, izquierdo, derecho):
+        """Agrega destino = izquierdo operador derecho con un temporal nuevo
+        como destino (temp_<índice del cuádruplo>) y devuelve su nombre"""
+        temporal = f"temp_{len(self.codigos)}"
+        operandos = self.operandos
+        id_ = operandos.id
+        # Es el cuádruplo más frecuente: se agrega sin pasar por agregar() y el
+        # temporal, que casi siempre es nuevo, se interna sin calcular su clase
+        destino = operandos._ids.get(temporal)
+        if destino is None:
+            destino = operandos._ids[temporal] = len(operandos.valores)
+            operandos.valores.append(temporal)
+            operandos.clases.append(TEMPORAL)
+        self.codigos.append(OPERACION)
+        self.destinos.append(destino)
+        self.operadores.append(id_(operador))
+        self.izquierdos.append(id_(izquierdo))
+        self.derechos.append(id_(derecho))
+        return temporal
+
+    def salida(self, valor):
+        self.agregar(SALIDA, izquierdo=self.operandos.id(valor))
+
+    def entrada(self, destino):
+        self.agregar(ENTRADA, destino=self.operandos.id(destino))
+
+    def etiqueta(self, nombre):
+        self.agregar(ETIQUETA, destino=self.operandos.id(Etiqueta(nombre)))
+
+    def salto(self, etiqueta):
+        self.agregar(SALTO, destino=self.operandos.id(Etiqueta(etiqueta)))
+
+    def salto_si(self, condicion, etiqueta):
+        """Salta a etiqueta si condicion es distinta de cero"""
+        id_ = self.operandos.id
+        self.agregar(SALTO_SI, destino=id_(Etiqueta(etiqueta)), izquierdo=id_(condicion))
+
+    def salto_si_no(self, condicion, etiqueta):
+        """Salta a etiqueta si condicion es cero"""
+        id_ = self.operandos.id
+        self.agregar(SALTO_SI_NO, destino=id_(Etiqueta(etiqueta)), izquierdo=id_(condicion))
+
+    def append(self, cuadruplo):
+        """Agrega un cuádruplo en forma de dict"""
+        try:
+            codigo = CODIGO_TIPO[cuadruplo['type']]
+        except KeyError:
+            raise ValueError(f"Tipo de cuádruplo desconocido: {cuadruplo.get('type')!r}") from None
+        id_ = self.operandos.id
+        ids = {columna: id_(Etiqueta(cuadruplo.get(clave)) if clave == 'label' else cuadruplo.get(clave))
+               for clave, columna in CAMPOS[codigo]}
+        self.agregar(codigo, ids.get('destinos', 0), ids.get('operadores', 0),
+                     ids.get('izquierdos', 0), ids.get('derechos', 0))
+
+    def copia(self):
+        """Copia independiente de las columnas (la tabla de operandos se comparte)"""
+        nuevo = ProgramaCuadruplos(self.operandos)
+        nuevo.codigos = array('B', self.codigos)
+        nuevo.destinos = array('I', self.destinos)
+        nuevo.operadores = array('I', self.operadores)
+        nuevo.izquierdos = array('I', self.izquierdos)
+        nuevo.derechos = array('I', self.derechos)
+        return nuevo
+
+    def mascara(self, *codigos):
+        """bytes con 1 en cada cuádruplo cuyo código está en codigos (0 en el resto)"""
+        tabla = bytes(1 if codigo in codigos else 0 for codigo in range(256))
+        return self.codigos.tobytes().translate(tabla)
+
+    def filas(self, *codigos):
+        """Índices de los cuádruplos con esos códigos"""
+        return compress(range(len(self.codigos)), self.mascara(*codigos))
+
+    def ids(self, columna, *codigos):
+        """Ids de la columna en los cuádruplos con esos códigos (con repetidos)"""
+        return compress(getattr(self, columna), self.mascara(*codigos))
+
+    def filtrar(self, mascara):
+        """Programa con los cuádruplos marcados con un valor verdadero en mascara"""
+        nuevo = ProgramaCuadruplos(self.operandos)
+        for columna in ('codigos', 'destinos', 'operadores', 'izquierdos', 'derechos'):
+            origen = getattr(self, columna)
+            setattr(nuevo, columna, array(origen.typecode, compress(origen, mascara)))
+        return nuevo
+
+    def valor(self, id_operando):
+        return self.operandos.valores[id_operando]
+
+    def instruccion(self, indice):
+        """Texto del cuádruplo (como en el listado de código intermedio)"""
+        valores = self.operandos.valores
+        codigo = self.codigos[indice]
+        if codigo == ASIGNAR:
+            return f"{valores[self.destinos[indice]]} = {valores[self.izquierdos[indice]]}"
+        if codigo == OPERACION:
+            return (f"{valores[self.destinos[indice]]} = {valores[self.izquierdos[indice]]} "
+                    f"{valores[self.operadores[indice]]} {valores[self.derechos[indice]]}")
+        if codigo == SALIDA:
+            return f"OUTPUT {valores[self.izquierdos[indice]]}"
+        if codigo == ENTRADA:
+            return f"INPUT {valores[self.destinos[indice]]}"
+        return _TEXTO_SALTO[codigo].format(etiqueta=valores[self.destinos[indice]],
+                                           condicion=valores[self.izquierdos[indice]])
+
+    def texto(self, titulo):
+        """Listado numerado con un encabezado '=== titulo ===' (mismo texto que instruccion())"""
+        valores = self.operandos.valores
+        lineas = [f"=== {titulo} ==="]
+        filas = zip(self.codigos, self.destinos, self.operadores, self.izquierdos, self.derechos)
+        for i, (codigo, destino, operador, izquierdo, derecho) in enumerate(filas):
+            if codigo == OPERACION:
+                lineas.append(f"{i:3d}. {valores[destino]} = {valores[izquierdo]} {valores[operador]} {valores[derecho]}")
+            elif codigo == ASIGNAR:
+                lineas.append(f"{i:3d}. {valores[destino]} = {valores[izquierdo]}")
+            elif codigo == SALIDA:
+                lineas.append(f"{i:3d}. OUTPUT {valores[izquierdo]}")
+            elif codigo == ENTRADA:
+                lineas.append(f"{i:3d}. INPUT {valores[destino]}")
+            else:
+                lineas.append(f"{i:3d}. " + _TEXTO_SALTO[codigo].format(etiqueta=valores[destino],
+                                                                        condicion=valores[izquierdo]))
+        return "\n".join(lineas) + "\n"
+
+    def bytes(self):
+        """Memoria aproximada de las columnas (sin la tabla de operandos)"""
+        columnas = (self.codigos, self.destinos, self.operadores, self.izquierdos, self.derechos)
+        return sum(columna.itemsize * len(columna) for columna in columnas)
+
+    def como_dicts(self):
+        return [dict(vista) for vista in self]
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [VistaCuadruplo(self, i) for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("índice de cuádruplo fuera de rango")
+        return VistaCuadruplo(self, indice)
+
+    def __iter__(self):
+        for i in range(len(self.codigos)):
+            yield VistaCuadruplo(self, i)
+
+    def __eq__(self, otro):
+        if isinstance(otro, (ProgramaCuadruplos, list, tuple)):
+            return len(self) == len(otro) and all(a == b for a, b in zip(self, otro))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"<ProgramaCuadruplos: {len(self)} cuádruplos, {len(self.operandos)} operandos>"
+
+class VistaCuadruplo(Mapping):
+    """Un cuádruplo de un ProgramaCuadruplos visto como dict de solo lectura
+    (mismas claves y orden que el dict que reemplaza)"""
+    __slots__ = ('programa', 'indice')
+
+    def __init__(self, programa, indice):
+        self.programa = programa
+        self.indice = indice
+
+    @property
+    def codigo(self):
+        return self.programa.codigos[self.indice]
+
+    def __getitem__(self, clave):
+        programa = self.programa
+        codigo = programa.codigos[self.indice]
+        if clave == 'type':
+            return TIPOS[codigo]
+        for nombre, columna in CAMPOS[codigo]:
+            if nombre == clave:
+                return programa.operandos.valores[getattr(programa, columna)[self.indice]]
+        raise KeyError(clave)
+
+    def __iter__(self):
+        yield 'type'
+        for nombre, _ in CAMPOS[self.programa.codigos[self.indice]]:
+            yield nombre
+
+    def __len__(self):
+        return 1 + len(CAMPOS[self.programa.codigos[self.indice]])
+
+    def copy(self):
+        return dict(self)
+
+    def __repr__(self):
+        return repr(dict(self))
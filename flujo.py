@@ -0,0 +1,214 @@
+# flujo.py - Bloques básicos y grafo de flujo de control del código intermedio
+from cuadruplos import ETIQUETA, SALTO, SALTOS
+
+class BloqueBasico:
+    """Cuádruplos inicio..fin-1 de un programa: solo se entra por el primero
+    (una ETIQUETA o el que sigue a un salto) y solo se sale por el último"""
+    __slots__ = ('indice', 'inicio', 'fin', 'etiqueta', 'sucesores', 'predecesores')
+
+    def __init__(self, indice, inicio, fin, etiqueta=None):
+        self.indice = indice
+        self.inicio = inicio
+        self.fin = fin
+        self.etiqueta = etiqueta
+        self.sucesores = []
+        self.predecesores = []
+
+    def filas(self):
+        return range(self.inicio, self.fin)
+
+    def __len__(self):
+        return self.fin - self.inicio
+
+    def __repr__(self):
+        etiqueta = f" {self.etiqueta}" if self.etiqueta is not None else ""
+        return f"<BloqueBasico B{self.indice}{etiqueta}: {self.inicio}..{self.fin - 1}>"
+
+class GrafoFlujo:
+    """Bloques básicos de un ProgramaCuadruplos, en el orden del programa, con
+    sus sucesores y predecesores. El primer bloque es la entrada; los bloques
+    sin sucesores terminan el programa.
+
+    Un salto condicional tiene como sucesores el bloque siguiente y el de su
+    etiqueta (en ese orden; uno solo si coinciden)"""
+
+    def __init__(self, programa):
+        self.programa = programa
+        self.bloques = []
+        self.por_etiqueta = {}
+        self._construir()
+
+    def _construir(self):
+        programa = self.programa
+        valores = programa.operandos.valores
+        codigos, destinos = programa.codigos, programa.destinos
+        total = len(programa)
+        if not total:
+            return
+
+        # Líderes: el primer cuádruplo, cada etiqueta y lo que sigue a un salto
+        lideres = {0}
+        lideres.update(programa.filas(ETIQUETA))
+        lideres.update(i + 1 for i in programa.filas(*SALTOS) if i + 1 < total)
+        inicios = sorted(lideres)
+        inicios.append(total)
+        for indice, (inicio, fin) in enumerate(zip(inicios, inicios[1:])):
+            etiqueta = valores[destinos[inicio]] if codigos[inicio] == ETIQUETA else None
+            bloque = BloqueBasico(indice, inicio, fin, etiqueta)
+            self.bloques.append(bloque)
+            if etiqueta is not None:
+                self.por_etiqueta[etiqueta] = bloque
+
+        for bloque in self.bloques:
+            ultimo = bloque.fin - 1
+            siguiente = self.bloques[bloque.indice + 1] if bloque.indice + 1 < len(self.bloques) else None
+            sucesores = []
+            if codigos[ultimo] in SALTOS:
+                if codigos[ultimo] != SALTO and siguiente is not None:
+                    sucesores.append(siguiente)
+                etiqueta = valores[destinos[ultimo]]
+                destino = self.por_etiqueta.get(etiqueta)
+                if destino is None:
+                    raise ValueError(f"Salto a una etiqueta inexistente: {etiqueta} (cuádruplo {ultimo})")
+                if destino not in sucesores:
+                    sucesores.append(destino)
+            elif siguiente is not None:
+                sucesores.append(siguiente)
+            bloque.sucesores = sucesores
+            for sucesor in sucesores:
+                sucesor.predecesores.append(bloque)
+
+    @property
+    def entrada(self):
+        return self.bloques[0] if self.bloques else None
+
+    def postorden_inverso(self):
+        """Bloques alcanzables desde la entrada en postorden inverso (cada
+        bloque antes que sus sucesores, salvo por las aristas de retorno)"""
+        if not self.bloques:
+            return []
+        visitados = {0}
+        orden = []
+        pila = [(self.bloques[0], iter(self.bloques[0].sucesores))]
+        while pila:
+            bloque, sucesores = pila[-1]
+            for sucesor in sucesores:
+                if sucesor.indice not in visitados:
+                    visitados.add(sucesor.indice)
+                    pila.append((sucesor, iter(sucesor.sucesores)))
+                    break
+            else:
+                pila.pop()
+                orden.append(bloque)
+        orden.reverse()
+        return orden
+
+    def texto(self):
+        """Listado por bloques, con los sucesores de cada uno"""
+        lineas = []
+        for bloque in self.bloques:
+            sucesores = ", ".join(f"B{s.indice}" for s in bloque.sucesores) or "fin"
+            lineas.append(f"B{bloque.indice} -> {sucesores}")
+            lineas.extend(f"  {i:3d}. {self.programa.instruccion(i)}" for i in bloque.filas())
+        return "\n".join(lineas) + "\n"
+
+    def __iter__(self):
+        return iter(self.bloques)
+
+    def __len__(self):
+        return len(self.bloques)
+
+    def __getitem__(self, indice):
+        return self.bloques[indice]
+
+class Dominadores:
+    """Árbol de dominadores y fronteras de dominancia de un GrafoFlujo
+    (algoritmo iterativo de Cooper, Harvey y Kennedy sobre el postorden inverso).
+
+    Todo se indexa por el índice del bloque: inmediato[b] es el dominador
+    inmediato de b (None para la entrada y los bloques inalcanzables),
+    hijos[b] los bloques que b domina inmediatamente y frontera[b] su frontera
+    de dominancia. El inicio del programa cuenta como un predecesor más de la
+    entrada, así que si hay saltos a la entrada esta es un punto de unión"""
+
+    def __init__(self, grafo):
+        self.grafo = grafo
+        total = len(grafo)
+        self.orden = [bloque.indice for bloque in grafo.postorden_inverso()]
+        self.inmediato = [None] * total
+        self.hijos = [[] for _ in range(total)]
+        self.frontera = [set() for _ in range(total)]
+        if total:
+            self._calcular()
+
+    def _calcular(self):
+        bloques = self.grafo.bloques
+        orden = self.orden
+        numero = [None] * len(bloques)
+        for posicion, indice in enumerate(orden):
+            numero[indice] = posicion
+        entrada = orden[0]
+        # Durante el cálculo la entrada es su propio dominador
+        inmediato = self.inmediato
+        inmediato[entrada] = entrada
+
+        cambio = True
+        while cambio:
+            cambio = False
+            for indice in orden[1:]:
+                nuevo = None
+                for predecesor in bloques[indice].predecesores:
+                    p = predecesor.indice
+                    if inmediato[p] is None:
+                        continue
+                    if nuevo is None:
+                        nuevo = p
+                        continue
+                    # Intersección: subir por el árbol hasta el ancestro común
+                    a, b = p, nuevo
+                    while a != b:
+                        while numero[a] > numero[b]:
+                            a = inmediato[a]
+                        while numero[b] > numero[a]:
+                            b = inmediato[b]
+                    nuevo = a
+                if inmediato[indice] != nuevo:
+                    inmediato[indice] = nuevo
+                    cambio = True
+        inmediato[entrada] = None
+
+        for indice in orden[1:]:
+            self.hijos[inmediato[indice]].append(indice)
+
+        # Fronteras: desde cada predecesor de un punto de unión hasta su dominador
+        for indice in orden:
+            predecesores = [p.indice for p in bloques[indice].predecesores if numero[p.indice] is not None]
+            if len(predecesores) + (indice == entrada) < 2:
+                continue
+            for p in predecesores:
+                while p is not None and p != inmediato[indice]:
+                    self.frontera[p].add(indice)
+                    p = inmediato[p]
+
+    def alcanzable(self, indice):
+        return indice == self.orden[0] or self.inmediato[indice] is not None
+
+    def domina(self, a, b):
+        """True si el bloque a domina al bloque b (todo bloque se domina a sí mismo)"""
+        while b is not None:
+            if a == b:
+                return True
+            b = self.inmediato[b]
+        return False
+
+    def orden_arbol(self):
+        """Bloques alcanzables en preorden del árbol de dominadores"""
+        if not self.orden:
+            return []
+        resultado = []
+        pila = [self.orden[0]]
+        while pila:
+            indice = pila.pop()
+            resultado.append(indice)
+            pila.extend(reversed(self.hijos[indice]))
+        return resultado
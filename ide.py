@@ -4,7 +4,13 @@ from tkinter import ttk, filedialog, messagebox
 from setuptools import Command
 from semantico import test_semantics
 from sintactico import ASTNode, parse_code
-from lexico import test_lexer
+from lexico import IncrementalLexer, IndiceLineas, TAM_BLOQUE
+from visitor import SALTAR, Visitor
+from sesion import CompilationSession
+from tabla_hash import TablaHash, hash_nombre
+from medicion import Medicion
+import traza
+import cache
 from sintactico import parse_code
 from tkinter import PhotoImage
 from pygments import lex
@@ -16,6 +22,11 @@ import re
 
 tk._default_root = None
 
+_traza = traza.canal('ide')
+
+# Cuádruplos que ejecuta el intérprete como máximo (corta los ciclos infinitos)
+MAX_PASOS_EJECUCION = 1000000
+
 
 # Palabras reservadas (deben coincidir con las definidas en lexico.py)
 reserved = {
@@ -25,43 +36,6 @@ reserved = {
 }
 
 
-class NodoHash:
-    def __init__(self, simbolo):
-        self.simbolo = simbolo
-        self.siguiente = None
-
-class TablaHash:
-    def __init__(self, tamaño=10):
-        self.tamaño = tamaño
-        self.tabla = [None] * tamaño
-    
-    def _hash(self, nombre):
-        """Función hash simple basada en el primer carácter"""
-        if not nombre:
-            return 0
-        return ord(nombre[0].upper()) % self.tamaño
-    
-    def insertar(self, simbolo):
-        """Inserta un símbolo en la tabla hash"""
-        indice = self._hash(simbolo['nombre'])
-        nuevo_nodo = NodoHash(simbolo)
-        
-        # Insertar al inicio de la lista enlazada
-        nuevo_nodo.siguiente = self.tabla[indice]
-        self.tabla[indice] = nuevo_nodo
-    
-    def obtener_todos(self):
-        """Obtiene todos los símbolos organizados por índice"""
-        resultado = []
-        for i in range(self.tamaño):
-            simbolos_indice = []
-            actual = self.tabla[i]
-            while actual:
-                simbolos_indice.append(actual.simbolo)
-                actual = actual.siguiente
-            resultado.append((i, simbolos_indice))
-        return resultado
-
 class TextLineNumbers(tk.Canvas):
     def __init__(self, *args, **kwargs):
         tk.Canvas.__init__(self, *args, **kwargs)
@@ -117,6 +91,8 @@ class TextLineNumbers(tk.Canvas):
 class CustomText(tk.Text):
     def __init__(self, *args, **kwargs):
         tk.Text.__init__(self, *args, **kwargs)
+        # Lexer incremental: se crea en el primer análisis y luego sigue cada edición
+        self.lexer_incremental = None
         self._orig = self._w + "_orig"
         self.tk.call("rename", self._w, self._orig)
         self.tk.createcommand(self._w, self._proxy)
@@ -162,11 +138,60 @@ class CustomText(tk.Text):
 
     def _proxy(self, *args):
         cmd = (self._orig,) + args
+        es_edicion = args[0] in ("insert", "replace", "delete")
+        edicion = self._rango_edicion(args) if es_edicion else None
         result = self.tk.call(cmd)
         
-        if args[0] in ("insert", "replace", "delete"):
+        if es_edicion:
+            if edicion is not None:
+                try:
+                    self.lexer_incremental.editar(*edicion)
+                except Exception:
+                    # Si algo falla se re-tokeniza todo en el próximo análisis
+                    self.lexer_incremental = None
             self.event_generate("<<TextModified>>")
         return result
+
+    def _offset(self, indice):
+        """Convierte un índice de Tk ("línea.columna") en offset de carácter.
+
+        Tk normaliza el índice y el lexer incremental da el inicio de la línea,
+        así que no se cuentan los caracteres desde el principio"""
+        linea, columna = str(self.tk.call(self._orig, "index", indice)).split(".")
+        return self.lexer_incremental.offset(int(linea), int(columna))
+
+    def _rango_edicion(self, args):
+        """(inicio, fin, nuevo) de un comando insert/delete/replace, en offsets de carácter"""
+        if self.lexer_incremental is None:
+            return None
+        try:
+            # El salto de línea final de Tk no se puede editar
+            ultimo = self.lexer_incremental.longitud - 1
+            inicio = min(self._offset(args[1]), ultimo)
+            if args[0] == "insert":
+                return inicio, inicio, ''.join(args[2::2])
+            if args[0] == "delete":
+                if len(args) > 3:
+                    # Varios rangos en un solo comando: se re-tokeniza todo
+                    self.lexer_incremental = None
+                    return None
+                fin = self._offset(args[2]) if len(args) > 2 else inicio + 1
+                return inicio, max(inicio, min(fin, ultimo)), ''
+            fin = min(self._offset(args[2]), ultimo)
+            return inicio, max(inicio, fin), ''.join(args[3::2])
+        except (tk.TclError, ValueError, IndexError):
+            self.lexer_incremental = None
+            return None
+
+    def obtener_tokens(self):
+        """TokenBuffer al día con el contenido del editor.
+
+        Solo se re-tokeniza lo editado; si el texto no coincide (por ejemplo
+        tras deshacer, que no pasa por el proxy) se tokeniza todo de nuevo"""
+        texto = self.get("1.0", tk.END)
+        if self.lexer_incremental is None or self.lexer_incremental.texto != texto:
+            self.lexer_incremental = IncrementalLexer(texto)
+        return self.lexer_incremental.tokens
         
     def _on_modified(self, event=None):
         if self.after_id:
@@ -208,7 +233,7 @@ class CustomText(tk.Text):
             self._highlight_other_tokens(text)
 
         except Exception as e:
-            print(f"Error general en highlight_syntax: {e}")
+            _traza.error(f"Error general en highlight_syntax: {e}")
             # Limpiar tags en caso de error
             for tag in self.tag_names():
                 self.tag_remove(tag, "1.0", tk.END)
@@ -308,7 +333,7 @@ class CustomText(tk.Text):
         except ClassNotFound:
             pass
         except Exception as e:
-            print(f"Error en el lexer: {e}")
+            _traza.error(f"Error en el lexer: {e}")
 
     def _highlight_comments(self, text):
         """Resalta los comentarios en el texto, incluyendo los multi-línea"""
@@ -400,7 +425,7 @@ class CustomText(tk.Text):
         except ClassNotFound:
             pass
         except Exception as e:
-            print(f"Error en el lexer: {e}")
+            _traza.error(f"Error en el lexer: {e}")
 
     def _is_valid_index(self, index):
         """Verifica si un índice de texto es válido"""
@@ -432,6 +457,82 @@ class CustomText(tk.Text):
                         self.editor.see(start)  # Hacer scroll a la posición del error
                 except (IndexError, ValueError):
                     continue
+
+class _TablaSintactica(Visitor):
+    """Llena la tabla sintáctica; el contexto es (fila padre, nivel)"""
+
+    def __init__(self, tabla, omitir):
+        super().__init__()
+        self.tabla = tabla
+        self.omitir = omitir
+
+    def visitar_defecto(self, node, contexto):
+        # Omitir nodos de lista: sus hijos quedan en la misma fila y nivel
+        if node.type in self.omitir:
+            return None
+        parent, level = contexto
+
+        # Información del nodo
+        node_name = node.type
+        node_value = getattr(node, 'value', '')
+        line = getattr(node, 'lineno', 'N/A')
+        
+        # Para identificadores y números, mostrar el valor
+        if node.type in ['identificador', 'numero'] and node_value:
+            node_name = f"{node_value} ({node.type})"
+        elif node_value and node.type != 'tipo':
+            node_name = f"{node.type}: {node_value}"
+        
+        # Insertar en la tabla
+        node_id = self.tabla.insert(
+            parent, "end", 
+            text=node_name,
+            values=(node.type, node_value, line, level)
+        )
+        return node.children, (node_id, level + 1)
+
+class _ArbolVisualAST(Visitor):
+    """Árbol visual del AST; el contexto es el id del nodo padre en el treeview"""
+
+    def __init__(self, ide, treeview):
+        super().__init__()
+        self.ide = ide
+        self.treeview = treeview
+
+    def _line_text(self, node):
+        line = getattr(node, 'lineno', None)
+        if line is None:
+            return ""
+        return f" [Línea: {max(1, line)}]"
+
+    def visitar_defecto(self, node, parent):
+        # Omitir nodos no deseados
+        if node.type in self.ide.NODOS_OMITIR:
+            return None
+
+        # Nodos normales
+        node_text = node.type
+        if hasattr(node, 'value') and node.value is not None:
+            node_text += f": {node.value}"
+        node_text += self._line_text(node)
+        
+        node_id = self.treeview.insert(parent, "end", text=node_text)
+        return node.children, node_id
+
+    # Caso especial: Asignaciones
+    def visitar_asignacion(self, node, parent):
+        assign_id = self.treeview.insert(parent, "end", text=f"={self._line_text(node)}")
+        
+        # Variable asignada
+        var_node = node.children[0]
+        var_line = getattr(var_node, 'lineno', None)
+        var_line_text = f" [Línea: {max(1, var_line)}]" if var_line else ""
+        self.treeview.insert(assign_id, "end", text=f"{var_node.value}{var_line_text}")
+        
+        # Expresión derecha
+        self.ide._build_expr_tree(self.treeview, assign_id, node.children[1])
+        return SALTAR
+
 class IDE:
     NODOS_OMITIR = {
         'lista_declaracion',
@@ -444,6 +545,8 @@ class IDE:
         self.root.title("IDE para Compilador")
         self.filepath = None
         self._user_inputs = {}
+        # Última sesión de compilación usada (sus mediciones van a la pestaña Rendimiento)
+        self._sesion = None
         self._setup_execution_tags()
         
         # Inicializar todos los atributos necesarios
@@ -455,6 +558,7 @@ class IDE:
         self.output_intermedio = None
         self.output_ejecucion = None
         self.output_hash = None
+        self.output_rendimiento = None
         
         # Crear componentes en orden correcto
         self.create_menu()
@@ -866,6 +970,28 @@ class IDE:
         hash_vsb.pack(side=tk.RIGHT, fill=tk.Y)
         hash_hsb.pack(side=tk.BOTTOM, fill=tk.X)
         
+        # ------------------------- Pestaña RENDIMIENTO -------------------------
+        self.tab_rendimiento = ttk.Frame(self.execution_tabs)
+        self.execution_tabs.add(self.tab_rendimiento, text="Rendimiento")
+
+        rendimiento_toolbar = tk.Frame(self.tab_rendimiento)
+        rendimiento_toolbar.pack(side=tk.TOP, fill=tk.X)
+        tk.Button(rendimiento_toolbar, text="Exportar JSON",
+                  command=lambda: self._exportar_medicion('json')).pack(side=tk.LEFT, padx=2, pady=2)
+        tk.Button(rendimiento_toolbar, text="Exportar Chrome trace",
+                  command=lambda: self._exportar_medicion('chrome')).pack(side=tk.LEFT, padx=2, pady=2)
+
+        self.output_rendimiento = tk.Text(
+            self.tab_rendimiento,
+            wrap=tk.NONE,
+            width=80,
+            height=10,
+            bg="white",
+            fg="black",
+            font=("Consolas", 10)
+        )
+        self.output_rendimiento.pack(fill=tk.BOTH, expand=True)
+        
 
         
         # Mostrar todas las pestañas
@@ -1070,8 +1196,11 @@ class IDE:
         if filepath:
             try:
                 with open(filepath, "r") as file:
+                    self.editor.lexer_incremental = None
                     self.editor.delete(1.0, tk.END)
-                    self.editor.insert(tk.END, file.read())
+                    # Insertar por bloques para no crear una copia del archivo completo
+                    for bloque in iter(lambda: file.read(TAM_BLOQUE), ''):
+                        self.editor.insert(tk.END, bloque)
                     self.filepath = filepath
                     # Programar el resaltado después de un pequeño retraso
                     self.editor.after(100, self.safe_highlight)
@@ -1083,11 +1212,11 @@ class IDE:
         try:
             self.editor.highlight_syntax()
         except Exception as e:
-            print(f"Error durante el resaltado: {e}")
+            _traza.error(f"Error durante el resaltado: {e}")
 
                 
         except Exception as e:
-            print(f"Error en highlight_syntax: {e}")
+            _traza.error(f"Error en highlight_syntax: {e}")
             # Si hay un error, al menos limpiar los tags para evitar inconsistencia
             for tag in self.tag_names():
                 self.tag_remove(tag, "1.0", tk.END)
@@ -1123,6 +1252,51 @@ class IDE:
         except tk.TclError:
             pass
 
+    def _sesion_actual(self):
+        """Sesión de compilación del texto del editor; se reutiliza mientras no cambie.
+
+        Usa los tokens del lexer incremental del editor, así que las etapas no
+        vuelven a tokenizar ni a analizar el mismo texto"""
+        input_text = self.editor.get(1.0, tk.END)
+        self._sesion = CompilationSession.para(
+            input_text, tokens=self.editor.obtener_tokens(),
+            generar_llvm=lambda quads, tabla: self._generate_complete_llvm(quads, tabla, input_text),
+            persistir=False)
+        # Al terminar el comando actual se muestran las etapas que midió
+        self.root.after_idle(self._mostrar_medicion)
+        return self._sesion
+
+    def _medicion(self):
+        """Mediciones de la sesión actual (las de herramientas externas también van ahí)"""
+        return self._sesion.medicion if self._sesion is not None else Medicion()
+
+    def _mostrar_medicion(self):
+        """Muestra en la pestaña Rendimiento el desglose por etapa de la última sesión"""
+        if self._sesion is None or self.output_rendimiento is None:
+            return
+        self.output_rendimiento.config(state=tk.NORMAL)
+        self.output_rendimiento.delete(1.0, tk.END)
+        self.output_rendimiento.insert(tk.END, "=== TIEMPO POR ETAPA ===\n\n")
+        self.output_rendimiento.insert(tk.END, self._sesion.medicion.resumen() + "\n")
+        self.output_rendimiento.config(state=tk.DISABLED)
+
+    def _exportar_medicion(self, formato):
+        """Guarda las mediciones de la última sesión como JSON o Chrome trace"""
+        if self._sesion is None:
+            messagebox.showinfo("Rendimiento", "Todavía no se compiló nada.")
+            return
+        ruta = filedialog.asksaveasfilename(defaultextension=".json",
+                                            filetypes=[("JSON", "*.json"), ("Todos los archivos", "*.*")])
+        if not ruta:
+            return
+        try:
+            if formato == 'chrome':
+                self._sesion.medicion.a_chrome(ruta)
+            else:
+                self._sesion.medicion.a_json(ruta)
+        except OSError as e:
+            messagebox.showerror("Rendimiento", f"No se pudo guardar: {e}")
+
     def compile_lexico(self):
         try:
             # Limpiar resultados anteriores
@@ -1132,72 +1306,55 @@ class IDE:
             
             # Obtener texto actual
             input_text = self.editor.get(1.0, tk.END)
-            lines = input_text.split('\n')
             
             if not input_text.strip():
                 self.output_errores.insert(tk.END, "El editor está vacío.\n", "no_errors")
                 self.output_errores.config(state=tk.DISABLED)
                 return
                 
-            # Procesar análisis léxico
-            tokens = test_lexer(input_text)
+            # Procesar análisis léxico (re-tokeniza solo lo editado)
+            tokens = self._sesion_actual().tokens
+            
+            # Mostrar tokens válidos (filas generadas bajo demanda)
+            for fila in tokens.filas_tabla():
+                self.token_tree.insert("", tk.END, values=fila)
+            
             error_count = 0
             self.output_errores.insert(tk.END, "=== ERRORES LÉXICOS ===\n", "error_header")
             
-            # Nueva estrategia para calcular posiciones
-            current_pos = 0
-            line_num = 1
-            line_start_pos = 0
-            
-            for tok in tokens:
-                # Calcular línea y columna basado en el texto
-                while current_pos < tok.lexpos and line_num <= len(lines):
-                    line_end = line_start_pos + len(lines[line_num-1])
-                    if tok.lexpos >= line_end:
-                        current_pos = line_end + 1  # +1 por el \n
-                        line_start_pos = current_pos
-                        line_num += 1
-                    else:
-                        current_pos = tok.lexpos
-                
-                col_num = tok.lexpos - line_start_pos
+            # Línea y columna por búsqueda binaria en los inicios de línea
+            indice = tokens.indice_lineas()
+            
+            for tok in tokens.errores():
+                line_num, col_num = indice.posicion(tok.lexpos)
                 
-                # Mostrar tokens válidos
-                if hasattr(tok, 'type') and tok.type != 'ERROR':
-                    self.token_tree.insert("", tk.END, values=(tok.value, tok.type, getattr(tok, 'subtoken', '')))
-                    continue
-                    
                 # Procesar errores
-                if getattr(tok, 'type', '') == 'ERROR':
-                    error_count += 1
-                    
-                    if line_num > len(lines):
-                        continue
-                        
-                    current_line = lines[line_num-1] if line_num <= len(lines) else ""
-                    
-                    # Ajustar para errores específicos
-                    error_value = str(tok.value)
-                    error_length = len(error_value)
-                    error_start = col_num
-                    
-                    if '@' in error_value:  # Caso sum@r
-                        error_start += error_value.index('@')
-                        error_length = 1
-                    elif error_value.count('.') > 1:  # Caso 34.34.34.34
-                        first_dot = error_value.index('.')
-                        error_start += error_value.index('.', first_dot + 1)
-                        error_length = 1
-                    elif '.' in error_value and any(c.isalpha() for c in error_value):  # Caso 32.algo
-                        error_start += error_value.index('.')
-                        error_length = len(error_value) - error_value.index('.')
-                    
-                    # Mostrar información del error
-                    error_msg = (f"Error {error_count}: '{tok.value}'\n"
-                                f"Línea: {line_num}, Columna: {error_start + 1}\n"
-                                f"Contexto: {current_line[:error_start]}>>>{current_line[error_start:error_start+error_length]}<<<{current_line[error_start+error_length:]}\n\n")
-                    
-                    self.output_errores.insert(tk.END, error_msg, "error_detail")
+                error_count += 1
+                
+                current_line = indice.linea_texto(input_text, line_num)
+                
+                # Ajustar para errores específicos
+                error_value = str(tok.value)
+                error_length = len(error_value)
+                error_start = col_num
+                
+                if '@' in error_value:  # Caso sum@r
+                    error_start += error_value.index('@')
+                    error_length = 1
+                elif error_value.count('.') > 1:  # Caso 34.34.34.34
+                    first_dot = error_value.index('.')
+                    error_start += error_value.index('.', first_dot + 1)
+                    error_length = 1
+                elif '.' in error_value and any(c.isalpha() for c in error_value):  # Caso 32.algo
+                    error_start += error_value.index('.')
+                    error_length = len(error_value) - error_value.index('.')
+                
+                # Mostrar información del error
+                error_msg = (f"Error {error_count}: '{tok.value}'\n"
+                            f"Línea: {line_num}, Columna: {error_start + 1}\n"
+                            f"Contexto: {current_line[:error_start]}>>>{current_line[error_start:error_start+error_length]}<<<{current_line[error_start+error_length:]}\n\n")
+                
+                self.output_errores.insert(tk.END, error_msg, "error_detail")
             
             # Mostrar resumen
             if error_count == 0:
@@ -1224,7 +1381,8 @@ class IDE:
         input_text = self.editor.get(1.0, tk.END)
         
         try:
-            result = parse_code(input_text)
+            # El parser consume los tokens y el índice de líneas del lexer del editor
+            result = self._sesion_actual().analisis_sintactico
             
             self.output_errores.insert(tk.END, "=== ERRORES SINTÁCTICOS ===\n", "error_header")
             
@@ -1252,7 +1410,8 @@ class IDE:
                     self.output_errores.insert(tk.END, f"\nTotal de errores sintácticos: {error_count}\n", "error_header")
                 
                 if input_text.strip():
-                    self._highlight_error_in_editor(result.get('errors', []), input_text)
+                    self._highlight_error_in_editor(result.get('errors', []), input_text,
+                                                    result.get('indice_lineas'))
                     
         except Exception as e:
             error_msg = f"Error durante el análisis sintáctico: {str(e)}\n"
@@ -1266,40 +1425,7 @@ class IDE:
         """Llena la tabla sintáctica con la información del AST"""
         self.token_tree_sintactico.delete(*self.token_tree_sintactico.get_children())
         
-        def add_ast_node(parent, node, level=0):
-            if not isinstance(node, ASTNode):
-                return
-                
-            # Omitir nodos de lista
-            if node.type in self.NODOS_OMITIR:
-                for child in node.children:
-                    add_ast_node(parent, child, level)
-                return
-            
-            # Información del nodo
-            node_name = node.type
-            node_value = getattr(node, 'value', '')
-            line = getattr(node, 'lineno', 'N/A')
-            
-            # Para identificadores y números, mostrar el valor
-            if node.type in ['identificador', 'numero'] and node_value:
-                node_name = f"{node_value} ({node.type})"
-            elif node_value and node.type != 'tipo':
-                node_name = f"{node.type}: {node_value}"
-            
-            # Insertar en la tabla
-            node_id = self.token_tree_sintactico.insert(
-                parent, "end", 
-                text=node_name,
-                values=(node.type, node_value, line, level)
-            )
-            
-            # Procesar hijos
-            if hasattr(node, 'children'):
-                for child in node.children:
-                    add_ast_node(node_id, child, level + 1)
-        
-        add_ast_node("", ast_node)
+        _TablaSintactica(self.token_tree_sintactico, self.NODOS_OMITIR).recorrer(ast_node, ("", 0))
         
     
     def _mostrar_analisis_semantico_completo(self, tabla_simbolos):
@@ -1384,8 +1510,7 @@ class IDE:
                 return
                 
             # Ejecutar análisis semántico
-            from semantico import test_semantics
-            result = test_semantics(input_text)
+            result = self._sesion_actual().analisis_semantico
             
             # Mostrar resultados en panel de errores
             self.output_errores.insert(tk.END, "=== RESULTADOS DEL ANALISIS SEMANTICO ===\n", "error_header")
@@ -1440,8 +1565,8 @@ class IDE:
             self.output_intermedio.insert(tk.END, "=== PROCESANDO CÓDIGO ===\n")
             
             # Análisis sintáctico
-            from sintactico import parse_code
-            result = parse_code(input_text)
+            sesion = self._sesion_actual()
+            result = sesion.analisis_sintactico
             
             if not result['success']:
                 self.output_intermedio.insert(tk.END, "ERRORES SINTÁCTICOS:\n")
@@ -1452,45 +1577,23 @@ class IDE:
             
             self.output_intermedio.insert(tk.END, "Análisis sintáctico exitoso\n")
             
-            # Análisis semántico
-            from semantico import test_semantics
-            semantic_result = test_semantics(input_text)
-            
-            # Generar código intermedio
-            from intermedio import generate_intermediate_code
-            
-            symbol_table_dict = {}
-            for sym in semantic_result['symbol_table']:
-                symbol_table_dict[sym['nombre']] = sym
-            
-            quadruples, intermedio_str = generate_intermediate_code(result['ast'], symbol_table_dict)
+            # Análisis semántico y código intermedio
+            quadruples, intermedio_str = sesion.codigo_intermedio
             
             # Mostrar código intermedio ORIGINAL
             self.output_intermedio.insert(tk.END, "\n" + intermedio_str)
             
             # Aplicar optimizaciones
-            from optimizacion import optimize_intermediate_code
-            optimized_quads, optimization_report = optimize_intermediate_code(quadruples)
+            optimized_quads, optimization_report = sesion.optimizacion
             
             # Mostrar REPORTE DE OPTIMIZACIONES
             self.output_intermedio.insert(tk.END, "\n" + optimization_report)
             
             # Mostrar código OPTIMIZADO
-            self.output_intermedio.insert(tk.END, "\n=== CÓDIGO INTERMEDIO OPTIMIZADO ===\n")
-            for i, quad in enumerate(optimized_quads):
-                self.output_intermedio.insert(tk.END, f"{i:3d}. ")
-                if quad['type'] == 'assign':
-                    self.output_intermedio.insert(tk.END, f"{quad['target']} = {quad['source']}")
-                elif quad['type'] == 'binary_op':
-                    self.output_intermedio.insert(tk.END, f"{quad['target']} = {quad['left']} {quad['operator']} {quad['right']}")
-                elif quad['type'] == 'output':
-                    self.output_intermedio.insert(tk.END, f"OUTPUT {quad['value']}")
-                elif quad['type'] == 'input':
-                    self.output_intermedio.insert(tk.END, f"INPUT {quad['target']}")
-                self.output_intermedio.insert(tk.END, "\n")
+            self.output_intermedio.insert(tk.END, "\n" + optimized_quads.texto("CÓDIGO INTERMEDIO OPTIMIZADO"))
             
             # GENERAR Y MOSTRAR CÓDIGO ENSAMBLADOR
-            self._generate_and_show_assembly(optimized_quads, symbol_table_dict, input_text)
+            self._generate_and_show_assembly(sesion.llvm_ir)
             
             self.output_intermedio.config(state=tk.DISABLED)
             
@@ -1500,8 +1603,8 @@ class IDE:
             self.output_intermedio.insert(tk.END, traceback.format_exc())
             self.output_intermedio.config(state=tk.DISABLED)
 
-    def _generate_and_show_assembly(self, quadruples, symbol_table, input_text):
-        """Genera y muestra código ensamblador usando LLVM"""
+    def _generate_and_show_assembly(self, llvm_code):
+        """Genera y muestra código ensamblador a partir del código LLVM"""
         import os
         import subprocess
         import tempfile
@@ -1509,9 +1612,6 @@ class IDE:
         try:
             self.output_intermedio.insert(tk.END, "\n=== GENERANDO CÓDIGO ENSAMBLADOR ===\n")
             
-            # Generar código LLVM
-            llvm_code = self._generate_complete_llvm(quadruples, symbol_table, input_text)
-            
             # Crear archivos temporales
             base_name = "programa"
             llvm_file = f"{base_name}.ll"
@@ -1525,17 +1625,25 @@ class IDE:
             
             # Compilar a ensamblador
             try:
-                # Usar llc para generar assembly
-                result = subprocess.run(['llc', '-O2', llvm_file, '-o', asm_file], 
-                                    capture_output=True, text=True, timeout=30)
-                
-                if result.returncode == 0:
+                # El mismo LLVM ya compilado antes: se toma de la caché de artefactos
+                assembly_code = cache.cargar_artefacto('ensamblador', (llvm_code,))
+                if assembly_code is not None:
+                    with open(asm_file, 'w') as f:
+                        f.write(assembly_code)
+                else:
+                    # Usar llc para generar assembly
+                    with self._medicion().etapa('llc'):
+                        result = subprocess.run(['llc', '-O2', '-relocation-model=pic', llvm_file, '-o', asm_file], 
+                                            capture_output=True, text=True, timeout=30)
+                    if result.returncode == 0:
+                        with open(asm_file, 'r') as f:
+                            assembly_code = f.read()
+                        cache.guardar_artefacto('ensamblador', (llvm_code,), assembly_code)
+                
+                if assembly_code is not None:
                     self.output_intermedio.insert(tk.END, f"✓ Código ensamblador generado: {asm_file}\n")
                     
-                    # Leer y mostrar el ensamblador
-                    with open(asm_file, 'r') as f:
-                        assembly_code = f.read()
-                    
+                    # Mostrar el ensamblador
                     self.output_intermedio.insert(tk.END, "\n=== CÓDIGO ENSAMBLADOR ===\n")
                     self.output_intermedio.insert(tk.END, assembly_code)
                     
@@ -1624,9 +1732,62 @@ class IDE:
         
         # Procesar cuádruplos
         temp_counter = 0
+        block_counter = 0
+        block_closed = False
+        
+        # Función para obtener valores de operandos CORREGIDA
+        def get_operand_value(op):
+            if isinstance(op, int):
+                return str(op), None
+            elif isinstance(op, str):
+                if op.startswith('t'):
+                    return f'%{op}', None
+                elif op in global_vars:
+                    nonlocal temp_counter
+                    temp_load = f'%temp_op_{temp_counter}'
+                    temp_counter += 1
+                    return temp_load, f'  {temp_load} = load i32, i32* @{op}'
+                else:
+                    try:
+                        return str(int(op)), None
+                    except:
+                        return '0', None
+            return '0', None
         
         for quad in quadruples:
-            if quad['type'] == 'assign':
+            # Etiquetas y saltos: cada etiqueta empieza un bloque LLVM
+            if quad['type'] == 'label':
+                if not block_closed:
+                    llvm_lines.append(f'  br label %bloque.{quad["label"]}')
+                llvm_lines.append(f'bloque.{quad["label"]}:')
+                block_closed = False
+                continue
+            if block_closed:
+                # Código después de un GOTO: LLVM lo necesita dentro de un bloque
+                llvm_lines.append(f'bloque.s{block_counter}:')
+                block_counter += 1
+                block_closed = False
+            
+            if quad['type'] == 'goto':
+                llvm_lines.append(f'  br label %bloque.{quad["label"]}')
+                block_closed = True
+                
+            elif quad['type'] in ('if_true', 'if_false'):
+                condition, condition_code = get_operand_value(quad['condition'])
+                if condition_code:
+                    llvm_lines.append(condition_code)
+                test = f'%temp_cond_{temp_counter}'
+                temp_counter += 1
+                following = f'bloque.s{block_counter}'
+                block_counter += 1
+                llvm_lines.append(f'  {test} = icmp ne i32 {condition}, 0')
+                if quad['type'] == 'if_true':
+                    llvm_lines.append(f'  br i1 {test}, label %bloque.{quad["label"]}, label %{following}')
+                else:
+                    llvm_lines.append(f'  br i1 {test}, label %{following}, label %bloque.{quad["label"]}')
+                llvm_lines.append(f'{following}:')
+                
+            elif quad['type'] == 'assign':
                 target = quad['target']
                 source = quad['source']
                 
@@ -1661,25 +1822,6 @@ class IDE:
                 right = quad['right']
                 operator = quad['operator']
                 
-                # Función para obtener valores de operandos CORREGIDA
-                def get_operand_value(op):
-                    if isinstance(op, int):
-                        return str(op), None
-                    elif isinstance(op, str):
-                        if op.startswith('t'):
-                            return f'%{op}', None
-                        elif op in global_vars:
-                            nonlocal temp_counter
-                            temp_load = f'%temp_op_{temp_counter}'
-                            temp_counter += 1
-                            return temp_load, f'  {temp_load} = load i32, i32* @{op}'
-                        else:
-                            try:
-                                return str(int(op)), None
-                            except:
-                                return '0', None
-                    return '0', None
-                
                 left_val, left_code = get_operand_value(left)
                 right_val, right_code = get_operand_value(right)
                 
@@ -1698,6 +1840,17 @@ class IDE:
                     llvm_lines.append(f'  %{target} = mul i32 {left_val}, {right_val}')
                 elif operator == '/':
                     llvm_lines.append(f'  %{target} = sdiv i32 {left_val}, {right_val}')
+                elif operator == '%':
+                    llvm_lines.append(f'  %{target} = srem i32 {left_val}, {right_val}')
+                elif operator in ('<', '<=', '>', '>=', '==', '!='):
+                    predicate = {'<': 'slt', '<=': 'sle', '>': 'sgt', '>=': 'sge', '==': 'eq', '!=': 'ne'}[operator]
+                    llvm_lines.append(f'  %{target}.i1 = icmp {predicate} i32 {left_val}, {right_val}')
+                    llvm_lines.append(f'  %{target} = zext i1 %{target}.i1 to i32')
+                elif operator in ('&&', '||'):
+                    llvm_lines.append(f'  %{target}.a = icmp ne i32 {left_val}, 0')
+                    llvm_lines.append(f'  %{target}.b = icmp ne i32 {right_val}, 0')
+                    llvm_lines.append(f'  %{target}.i1 = {"and" if operator == "&&" else "or"} i1 %{target}.a, %{target}.b')
+                    llvm_lines.append(f'  %{target} = zext i1 %{target}.i1 to i32')
                     
             elif quad['type'] == 'output':
                 value = quad['value']
@@ -1726,6 +1879,8 @@ class IDE:
                 llvm_lines.append(f'  call i32 (i8*, ...) @__isoc99_scanf(i8* getelementptr inbounds ([3 x i8], [3 x i8]* @.str_int, i32 0, i32 0), i32* @{target})')
         
         # Retorno
+        if block_closed:
+            llvm_lines.append(f'bloque.s{block_counter}:')
         llvm_lines.append('  ret i32 0')
         llvm_lines.append('}')
         
@@ -1771,8 +1926,9 @@ class IDE:
             # Optimizar LLVM
             if os.path.exists(llvm_file):
                 try:
-                    subprocess.run(['opt', '-O3', '-S', llvm_file, '-o', opt_llvm_file], 
-                                capture_output=True, check=True)
+                    with self._medicion().etapa('opt'):
+                        subprocess.run(['opt', '-O3', '-S', llvm_file, '-o', opt_llvm_file], 
+                                    capture_output=True, check=True)
                     self.output_intermedio.insert(tk.END, f"\nLLVM optimizado: {opt_llvm_file}\n")
                 except:
                     # Si opt no está disponible, copiar el archivo original
@@ -1782,20 +1938,22 @@ class IDE:
             
             # Compilar a assembly
             try:
-                subprocess.run(['llc', '-O3', opt_llvm_file, '-o', asm_file], 
-                            capture_output=True, check=True)
+                with self._medicion().etapa('llc'):
+                    subprocess.run(['llc', '-O3', opt_llvm_file, '-o', asm_file], 
+                                capture_output=True, check=True)
                 self.output_intermedio.insert(tk.END, f"Assembly: {asm_file}\n")
             except:
                 self.output_intermedio.insert(tk.END, f"No se pudo generar assembly (llc no disponible)\n")
             
             # Compilar a ejecutable
             try:
-                if os.name == 'nt':  # Windows
-                    subprocess.run(['clang', opt_llvm_file, '-o', exe_file], 
-                                capture_output=True, check=True)
-                else:  # Linux/Mac
-                    subprocess.run(['clang', opt_llvm_file, '-o', exe_file], 
-                                capture_output=True, check=True)
+                with self._medicion().etapa('clang'):
+                    if os.name == 'nt':  # Windows
+                        subprocess.run(['clang', opt_llvm_file, '-o', exe_file], 
+                                    capture_output=True, check=True)
+                    else:  # Linux/Mac
+                        subprocess.run(['clang', opt_llvm_file, '-o', exe_file], 
+                                    capture_output=True, check=True)
                 self.output_intermedio.insert(tk.END, f"Ejecutable: {exe_file}\n")
             except:
                 self.output_intermedio.insert(tk.END, f"No se pudo generar ejecutable (clang no disponible)\n")
@@ -1825,8 +1983,8 @@ class IDE:
             self.output_ejecucion.insert(tk.END, "=" * 50 + "\n")
             
             # PASO 1: Análisis sintáctico
-            from sintactico import parse_code
-            result = parse_code(input_text)
+            sesion = self._sesion_actual()
+            result = sesion.analisis_sintactico
             
             if not result['success']:
                 self.output_ejecucion.insert(tk.END, "ERRORES SINTÁCTICOS:\n")
@@ -1836,8 +1994,7 @@ class IDE:
                 return
             
             # PASO 2: Análisis semántico  
-            from semantico import test_semantics
-            semantic_result = test_semantics(input_text)
+            semantic_result = sesion.analisis_semantico
             
             if semantic_result['errors']:
                 self.output_ejecucion.insert(tk.END, "ERRORES SEMÁNTICOS:\n")
@@ -1847,19 +2004,11 @@ class IDE:
                 return
             
             # PASO 3: Generar código intermedio
-            from intermedio import generate_intermediate_code
-            
-            symbol_table_dict = {}
-            for sym in semantic_result['symbol_table']:
-                symbol_table_dict[sym['nombre']] = sym
-            
-            quadruples, intermedio_str = generate_intermediate_code(result['ast'], symbol_table_dict)
-            
-            # ELIMINAR TODOS LOS DUPLICADOS DE LOS CUÁDRUPLOS
-            cleaned_quadruples = self._remove_duplicate_quadruples(quadruples)
+            symbol_table_dict = sesion.tabla_simbolos
+            quadruples, intermedio_str = sesion.codigo_intermedio
             
             # DETECTAR si hay instrucciones de input (cin)
-            input_instructions = [q for q in cleaned_quadruples if q['type'] == 'input']
+            input_instructions = [q for q in quadruples if q['type'] == 'input']
             
             # PASO 4: SI HAY INPUTS, BLOQUEAR hasta que se ingresen TODOS
             user_inputs = {}
@@ -1869,16 +2018,14 @@ class IDE:
                 # EJECUTAR PARCIALMENTE HASTA EL PRIMER INPUT PARA CAPTURAR OUTPUTS
                 temp_memory = {}
                 
-                for quad in cleaned_quadruples:
+                for quad in self._follow_jumps(quadruples, temp_memory):
                     # Si encontramos un input, detenemos la ejecución parcial
                     if quad['type'] == 'input':
                         break
                     
                     # Ejecutar la instrucción actual
                     if quad['type'] == 'assign':
-                        target = quad['target']
-                        source = quad['source']
-                        temp_memory[target] = source
+                        temp_memory[quad['target']] = self._operand_value(quad['source'], temp_memory)
                             
                     elif quad['type'] == 'binary_op':
                         result = self._execute_binary_operation(quad, temp_memory)
@@ -1887,7 +2034,7 @@ class IDE:
                             
                     elif quad['type'] == 'output':
                         value = quad['value']
-                        if value.startswith('"'):  # String literal
+                        if isinstance(value, str) and value.startswith('"'):  # String literal
                             output_text = value.strip('"')
                             previous_outputs.append(output_text)
                         else:  # Variable
@@ -1895,7 +2042,8 @@ class IDE:
                             previous_outputs.append(str(output_value))
                 
                 # DEBUG: Mostrar qué outputs se capturaron
-                print(f"DEBUG: Outputs capturados para ventana: {previous_outputs}")
+                if _traza.debug_activo:
+                    _traza.debug(f"DEBUG: Outputs capturados para ventana: {previous_outputs}")
                 
                 # Crear ventana de inputs con tabla de símbolos y outputs anteriores
                 input_window = self._create_blocking_input_window(input_instructions, symbol_table_dict, previous_outputs)
@@ -1928,7 +2076,7 @@ class IDE:
             self.output_ejecucion.update()
             
             # PASO 5: EJECUTAR el programa completo
-            execution_success = self._execute_program(cleaned_quadruples, user_inputs)
+            execution_success = self._execute_program(quadruples, user_inputs)
             
             self.output_ejecucion.insert(tk.END, "=" * 50 + "\n")
             if execution_success:
@@ -1942,46 +2090,50 @@ class IDE:
             self.output_ejecucion.insert(tk.END, f"ERROR durante ejecución: {str(e)}\n")
             self.output_ejecucion.config(state=tk.DISABLED)
     
-    def _remove_duplicate_quadruples(self, quadruples):
-        """Elimina cuádruplos duplicados CORREGIDO - conserva cálculos"""
-        seen = set()
-        unique_quads = []
-        
-        for quad in quadruples:
-            # Crear una representación única de cada cuádruplo
-            if quad['type'] == 'assign':
-                # CONSERVAR asignaciones a diferentes variables
-                key = f"assign_{quad['target']}_{quad['source']}"
-            elif quad['type'] == 'binary_op':
-                # CONSERVAR operaciones con diferentes targets
-                key = f"binary_{quad['target']}_{quad['left']}_{quad['operator']}_{quad['right']}"
-            elif quad['type'] == 'output':
-                # CONSERVAR outputs diferentes
-                key = f"output_{quad['value']}"
-            elif quad['type'] == 'input':
-                # CONSERVAR inputs diferentes
-                key = f"input_{quad['target']}"
-            else:
-                key = str(quad)  # Para tipos desconocidos
-            
-            if key not in seen:
-                seen.add(key)
-                unique_quads.append(quad)
+    def _follow_jumps(self, quadruples, memory):
+        """Recorre los cuádruplos en el orden de ejecución: resuelve aquí las
+        etiquetas y los saltos (con las condiciones de memory) y devuelve el
+        resto de las instrucciones, que ejecuta quien llama"""
+        quads = list(quadruples)
+        labels = {quad['label']: i for i, quad in enumerate(quads) if quad['type'] == 'label'}
+        i = 0
+        steps = 0
+        while i < len(quads):
+            steps += 1
+            if steps > MAX_PASOS_EJECUCION:
+                raise RuntimeError(f"se ejecutaron más de {MAX_PASOS_EJECUCION} instrucciones (¿ciclo infinito?)")
+            quad = quads[i]
+            i += 1
+            kind = quad['type']
+            if kind == 'label':
+                continue
+            if kind == 'goto':
+                i = labels[quad['label']]
+            elif kind in ('if_true', 'if_false'):
+                condition = bool(self._operand_value(quad['condition'], memory))
+                if condition == (kind == 'if_true'):
+                    i = labels[quad['label']]
             else:
-                print(f"→ Eliminado duplicado: {quad}")
-        
-        return unique_quads
+                yield quad
+
+    def _operand_value(self, operand, memory):
+        """Valor de un operando: variable o temporal en memoria, o constante"""
+        value = memory.get(operand, operand) if isinstance(operand, str) else operand
+        if isinstance(value, str) and not value.startswith('"'):
+            try:
+                value = float(value) if '.' in value else int(value)
+            except ValueError:
+                value = 0
+        return value
 
     def _execute_program(self, quadruples, user_inputs):
-        """Ejecuta el programa con los inputs proporcionados - EVITA DUPLICADOS"""
+        """Ejecuta el programa con los inputs proporcionados, siguiendo los saltos"""
         memory = {}
         
         try:
-            for i, quad in enumerate(quadruples):
+            for quad in self._follow_jumps(quadruples, memory):
                 if quad['type'] == 'assign':
-                    target = quad['target']
-                    source = quad['source']
-                    memory[target] = source
+                    memory[quad['target']] = self._operand_value(quad['source'], memory)
                     
                 elif quad['type'] == 'binary_op':
                     result = self._execute_binary_operation(quad, memory)
@@ -2304,20 +2456,8 @@ class IDE:
         operator = quad['operator']
         
         # Obtener valores
-        left_val = memory.get(left, left) if isinstance(left, str) else left
-        right_val = memory.get(right, right) if isinstance(right, str) else right
-        
-        # Convertir strings a números si es necesario
-        if isinstance(left_val, str):
-            try:
-                left_val = float(left_val) if '.' in str(left_val) else int(left_val)
-            except:
-                left_val = 0
-        if isinstance(right_val, str):
-            try:
-                right_val = float(right_val) if '.' in str(right_val) else int(right_val)
-            except:
-                right_val = 0
+        left_val = self._operand_value(left, memory)
+        right_val = self._operand_value(right, memory)
         
         # Ejecutar operación
         if operator == '+': 
@@ -2328,6 +2468,25 @@ class IDE:
             return left_val * right_val
         elif operator == '/': 
             return left_val / right_val if right_val != 0 else 0
+        elif operator == '%':
+            return left_val % right_val if right_val != 0 else 0
+        # Comparaciones y operadores lógicos: 1 o 0, como en el código LLVM
+        elif operator == '<':
+            return int(left_val < right_val)
+        elif operator == '<=':
+            return int(left_val <= right_val)
+        elif operator == '>':
+            return int(left_val > right_val)
+        elif operator == '>=':
+            return int(left_val >= right_val)
+        elif operator == '==':
+            return int(left_val == right_val)
+        elif operator == '!=':
+            return int(left_val != right_val)
+        elif operator == '&&':
+            return int(bool(left_val) and bool(right_val))
+        elif operator == '||':
+            return int(bool(left_val) or bool(right_val))
         else: 
             return 0
 
@@ -2336,7 +2495,7 @@ class IDE:
         """Ejecuta una instrucción de output"""
         value = quad['value']
         
-        if value.startswith('"'):  # String literal
+        if isinstance(value, str) and value.startswith('"'):  # String literal
             output_text = value.strip('"')
             self.output_ejecucion.insert(tk.END, output_text)
         else:  # Variable o expresión
@@ -2353,7 +2512,8 @@ class IDE:
         memory = {}
         
         for i, quad in enumerate(quadruples):
-            print(f"Ejecutando cuádruplo {i}: {quad}")
+            if _traza.debug_activo:
+                _traza.debug(f"Ejecutando cuádruplo {i}: {quad}")
             
             if quad['type'] == 'assign':
                 target = quad['target']
@@ -2422,7 +2582,8 @@ class IDE:
         memory = {}
         
         for i, quad in enumerate(quadruples):
-            print(f"Ejecutando cuádruplo {i}: {quad}")
+            if _traza.debug_activo:
+                _traza.debug(f"Ejecutando cuádruplo {i}: {quad}")
             
             if quad['type'] == 'assign':
                 target = quad['target']
@@ -2498,7 +2659,7 @@ class IDE:
                         memory[target] = user_input
                         
                 except Exception as e:
-                    print(f"Error con input: {e}")
+                    _traza.error(f"Error con input: {e}")
                     memory[target] = 0
 
     
@@ -2681,14 +2842,16 @@ class IDE:
         """Genera código LLVM CORREGIDO - VERSIÓN SIMPLIFICADA"""
         llvm_lines = []
         
-        print("=== DEPURACIÓN LLVM: INICIANDO ===")
-        print(f"Cuádruplos a procesar: {len(quadruples)}")
-        for i, q in enumerate(quadruples):
-            print(f"  {i}: {q}")
+        if _traza.debug_activo:
+            _traza.debug("=== DEPURACIÓN LLVM: INICIANDO ===")
+            _traza.debug(f"Cuádruplos a procesar: {len(quadruples)}")
+            for i, q in enumerate(quadruples):
+                _traza.debug(f"  {i}: {q}")
         
         # Si no hay cuádruplos, generar código mínimo
         if not quadruples:
-            print("→ No hay cuádruplos, generando código mínimo")
+            if _traza.debug_activo:
+                _traza.debug("→ No hay cuádruplos, generando código mínimo")
             llvm_lines.append('target datalayout = "e-m:e-p270:32:32-p271:32:32-p272:64:64-i64:64-f80:128-n8:16:32:64-S128"')
             llvm_lines.append('target triple = "x86_64-pc-linux-gnu"')
             llvm_lines.append('')
@@ -2867,7 +3030,8 @@ class IDE:
         llvm_lines.append('  ret i32 0')
         llvm_lines.append('}')
         
-        print("=== DEPURACIÓN LLVM: FIN ===")
+        if _traza.debug_activo:
+            _traza.debug("=== DEPURACIÓN LLVM: FIN ===")
         return '\n'.join(llvm_lines)
 
     def _optimize_quadruples(self, quadruples, input_text):
@@ -2875,7 +3039,8 @@ class IDE:
         if not quadruples:
             return quadruples
         
-        print("=== OPTIMIZACIÓN CORREGIDA: INICIANDO ===")
+        if _traza.debug_activo:
+            _traza.debug("=== OPTIMIZACIÓN CORREGIDA: INICIANDO ===")
         
         try:
             # Paso 1: Encontrar TODAS las variables usadas en CUALQUIER operación
@@ -2916,7 +3081,8 @@ class IDE:
                     if target and isinstance(target, str):
                         used_vars.add(target)
             
-            print(f"Variables usadas en cualquier operación: {used_vars}")
+            if _traza.debug_activo:
+                _traza.debug(f"Variables usadas en cualquier operación: {used_vars}")
             
             # Paso 2: Encontrar todas las variables declaradas (en el código fuente)
             declared_vars = set()
@@ -2932,11 +3098,13 @@ class IDE:
                         if var_name and var_name.isidentifier():
                             declared_vars.add(var_name)
             
-            print(f"Variables declaradas: {declared_vars}")
+            if _traza.debug_activo:
+                _traza.debug(f"Variables declaradas: {declared_vars}")
             
             # Paso 3: Encontrar variables NO utilizadas en NINGUNA operación
             unused_vars = declared_vars - used_vars
-            print(f"Variables realmente no utilizadas: {unused_vars}")
+            if _traza.debug_activo:
+                _traza.debug(f"Variables realmente no utilizadas: {unused_vars}")
             
             # Paso 4: Eliminar SOLO asignaciones a variables realmente no utilizadas
             optimized_quads = []
@@ -2955,27 +3123,32 @@ class IDE:
                     if target in unused_vars:
                         keep_quad = False
                         removed_assignments += 1
-                        print(f"→ ELIMINADA asignación a variable realmente no usada: {target}")
+                        if _traza.debug_activo:
+                            _traza.debug(f"→ ELIMINADA asignación a variable realmente no usada: {target}")
                 
                 if keep_quad:
                     optimized_quads.append(quad)
             
             # Si no hay variables no utilizadas, retornar sin cambios
             if not unused_vars:
-                print("→ No hay variables realmente no utilizadas para optimizar")
+                if _traza.debug_activo:
+                    _traza.debug("→ No hay variables realmente no utilizadas para optimizar")
                 return optimized_quads
             
-            print(f"=== OPTIMIZACIÓN CORREGIDA: RESUMEN ===")
-            print(f"Variables eliminadas: {len(unused_vars)}")
-            print(f"Asignaciones eliminadas: {removed_assignments}")
-            print(f"Cuádruplos originales: {len(quadruples)}")
-            print(f"Cuádruplos optimizados: {len(optimized_quads)}")
-            print("=== OPTIMIZACIÓN CORREGIDA: FIN ===")
+            if _traza.debug_activo:
+                _traza.debug(f"=== OPTIMIZACIÓN CORREGIDA: RESUMEN ===")
+                _traza.debug(f"Variables eliminadas: {len(unused_vars)}")
+                _traza.debug(f"Asignaciones eliminadas: {removed_assignments}")
+            if _traza.info_activo:
+                _traza.info(f"Cuádruplos originales: {len(quadruples)}")
+                _traza.info(f"Cuádruplos optimizados: {len(optimized_quads)}")
+            if _traza.debug_activo:
+                _traza.debug("=== OPTIMIZACIÓN CORREGIDA: FIN ===")
             
             return optimized_quads
             
         except Exception as e:
-            print(f"Error durante optimización: {e}")
+            _traza.error(f"Error durante optimización: {e}")
             # En caso de error, retornar los cuádruplos originales
             return quadruples
     
@@ -3101,8 +3274,9 @@ class IDE:
             
             # Optimizar LLVM (si opt está disponible)
             try:
-                result = subprocess.run(['opt', '-O3', '-S', llvm_file, '-o', opt_llvm_file], 
-                                    capture_output=True, text=True, timeout=10)
+                with self._medicion().etapa('opt'):
+                    result = subprocess.run(['opt', '-O3', '-S', llvm_file, '-o', opt_llvm_file], 
+                                        capture_output=True, text=True, timeout=10)
                 if result.returncode == 0:
                     self.output_intermedio.insert(tk.END, f"• {opt_llvm_file} (optimizado)\n")
                 else:
@@ -3115,8 +3289,9 @@ class IDE:
             
             # Compilar a assembly (si llc está disponible)
             try:
-                result = subprocess.run(['llc', '-O3', opt_llvm_file, '-o', asm_file], 
-                                    capture_output=True, text=True, timeout=10)
+                with self._medicion().etapa('llc'):
+                    result = subprocess.run(['llc', '-O3', opt_llvm_file, '-o', asm_file], 
+                                        capture_output=True, text=True, timeout=10)
                 if result.returncode == 0:
                     self.output_intermedio.insert(tk.END, f"• {asm_file}\n")
                 else:
@@ -3126,8 +3301,9 @@ class IDE:
             
             # Compilar a ejecutable (si clang está disponible)
             try:
-                result = subprocess.run(['clang', opt_llvm_file, '-o', exe_file], 
-                                    capture_output=True, text=True, timeout=10)
+                with self._medicion().etapa('clang'):
+                    result = subprocess.run(['clang', opt_llvm_file, '-o', exe_file], 
+                                        capture_output=True, text=True, timeout=10)
                 if result.returncode == 0:
                     self.output_intermedio.insert(tk.END, f"• {exe_file}\n")
                 else:
@@ -3305,42 +3481,40 @@ class IDE:
         self.hash_tree.column("Índice", width=100, anchor=tk.CENTER)
         self.hash_tree.column("Símbolos", width=400, anchor=tk.W)
         
-        # Crear tabla hash
-        tabla_hash = TablaHash(10)
+        # Crear tabla hash (crece sola según el factor de carga)
+        tabla_hash = TablaHash()
         
         # Insertar todos los símbolos
         for simbolo in simbolos:
             tabla_hash.insertar(simbolo)
         
+        # Buscar cada nombre una vez para medir los sondeos
+        for simbolo in simbolos:
+            tabla_hash.buscar(simbolo['nombre'])
+        
         # Obtener símbolos organizados por índice
         indices = tabla_hash.obtener_todos()
+        stats = tabla_hash.estadisticas()
         
         # Colores suaves para diferentes índices
         colores = ['#e8f4fd', '#f0f8ff', '#f8f8ff', '#fff8f0', '#f8fff8', 
                 '#fff8f8', '#f8f0ff', '#fff0f8', '#f0fff8', '#f8f8f0']
         
-        # Estadísticas
-        total_simbolos = 0
-        colisiones = 0
-        
         # Mostrar en el treeview
         for indice, simbolos_indice in indices:
-            total_simbolos += len(simbolos_indice)
-            if len(simbolos_indice) > 1:
-                colisiones += len(simbolos_indice) - 1
-                
+            color = indice % len(colores)
             if simbolos_indice:
-                # Calcular función hash del primer símbolo
-                primer_caracter = simbolos_indice[0]['nombre'][0] if simbolos_indice[0]['nombre'] else '?'
-                hash_calculado = ord(primer_caracter.upper()) % 10
+                # Hash completo del primer símbolo y su índice
+                primer_nombre = simbolos_indice[0]['nombre']
+                hash_calculado = hash_nombre(primer_nombre)
                 
                 # Crear nodo padre para el índice
                 padre = self.hash_tree.insert("", "end", text="", 
                                             values=(
                                                 f"Índice {indice}", 
-                                                f"{len(simbolos_indice)} símbolo(s) - Hash: '{primer_caracter}' → {hash_calculado}"
+                                                f"{len(simbolos_indice)} símbolo(s) - Hash: '{primer_nombre}' → {hash_calculado} mod {tabla_hash.tamaño} = {indice}"
                                             ),
-                                            tags=(f'color{indice}',))
+                                            tags=(f'color{color}',))
                 
                 # Agregar símbolos como hijos
                 for i, simbolo in enumerate(simbolos_indice):
@@ -3355,7 +3529,7 @@ class IDE:
                     
                     self.hash_tree.insert(padre, "end", text="", 
                                         values=("", info),
-                                        tags=(f'color{indice}',))
+                                        tags=(f'color{color}',))
                 
                 # Expandir el nodo padre
                 self.hash_tree.item(padre, open=True)
@@ -3363,17 +3537,20 @@ class IDE:
                 # Índice vacío
                 self.hash_tree.insert("", "end", text="", 
                                     values=(f"Índice {indice}", "Vacío"),
-                                    tags=(f'color{indice}',))
+                                    tags=(f'color{color}',))
         
         # Configurar tags para colores
-        for i in range(10):
+        for i in range(len(colores)):
             self.hash_tree.tag_configure(f'color{i}', background=colores[i])
         
         # Mostrar estadísticas en un nodo especial al inicio
-        if total_simbolos > 0:
+        if stats['elementos'] > 0:
             stats_padre = self.hash_tree.insert("", 0, text="", 
                                             values=("📊 ESTADÍSTICAS", 
-                                                    f"Total: {total_simbolos} símbolos | Colisiones: {colisiones} | Factor de carga: {total_simbolos/10:.2f}"),
+                                                    f"Total: {stats['elementos']} símbolos | Tamaño: {stats['tamaño']} | "
+                                                    f"Colisiones: {stats['colisiones']} | Factor de carga: {stats['factor_carga']:.2f} | "
+                                                    f"Cadena más larga: {stats['cadena_mas_larga']} | "
+                                                    f"Sondeos por búsqueda: {stats['sondeos_promedio']:.2f}"),
                                             tags=('stats',))
             self.hash_tree.tag_configure('stats', background='#ffeaa7', font=('Arial', 10, 'bold'))
             self.hash_tree.item(stats_padre, open=True)
@@ -3471,62 +3648,16 @@ class IDE:
                 command=ast_window.destroy).pack(side=tk.RIGHT, padx=5)
 
     def _build_ast_tree(self, treeview, parent, node):
-        """Construye recursivamente el árbol visual mejorado"""
-        if not isinstance(node, ASTNode):
-            return
-            
-        # Obtener texto para cálculo de posición
-        input_text = self.editor.get("1.0", tk.END)
-        lines = input_text.split('\n')
-        total_lines = len(lines)
-        
-        # Omitir nodos no deseados
-        if node.type in self.NODOS_OMITIR:
-            for child in node.children:
-                self._build_ast_tree(treeview, parent, child)
-            return
-        
-        # Calcular línea ajustada
-        line = getattr(node, 'lineno', None)
-        line_text = ""
-        if line is not None:
-            adjusted_line = max(1, line - (total_lines - 1))
-            line_text = f" [Línea: {adjusted_line}]"
-                
-        # Caso especial: Asignaciones
-        if node.type == 'asignacion':
-            assign_text = f"={line_text}"
-            assign_id = treeview.insert(parent, "end", text=assign_text)
-            
-            # Variable asignada
-            var_node = node.children[0]
-            var_line = getattr(var_node, 'lineno', None)
-            var_line_text = f" [Línea: {max(1, var_line - (total_lines - 1))}]" if var_line else ""
-            treeview.insert(assign_id, "end", text=f"{var_node.value}{var_line_text}")
-            
-            # Expresión derecha
-            self._build_expr_tree(treeview, assign_id, node.children[1], total_lines)
-            return
-        
-        # Nodos normales
-        node_text = node.type
-        if hasattr(node, 'value') and node.value is not None:
-            node_text += f": {node.value}"
-        node_text += line_text
-        
-        node_id = treeview.insert(parent, "end", text=node_text)
-        
-        # Procesar hijos
-        if hasattr(node, 'children'):
-            for child in node.children:
-                self._build_ast_tree(treeview, node_id, child)
-    def _build_expr_tree(self, treeview, parent, node, total_lines):
+        """Construye el árbol visual mejorado (las líneas del AST de la sesión son absolutas)"""
+        _ArbolVisualAST(self, treeview).recorrer(node, parent)
+
+    def _build_expr_tree(self, treeview, parent, node):
         """Versión final que muestra correctamente la jerarquía de operaciones"""
         if not isinstance(node, ASTNode):
             return
 
         line = getattr(node, 'lineno', None)
-        line_text = f" [Línea: {max(1, line - (total_lines - 1))}]" if line is not None else ""
+        line_text = f" [Línea: {max(1, line)}]" if line is not None else ""
 
         # Caso especial para asignaciones
         if node.type == 'asignacion':
@@ -3535,10 +3666,10 @@ class IDE:
             # Variable asignada
             var_node = node.children[0]
             var_line = getattr(var_node, 'lineno', line)
-            treeview.insert(assign_id, "end", text=f"{var_node.value} [Línea: {max(1, var_line - (total_lines - 1))}]")
+            treeview.insert(assign_id, "end", text=f"{var_node.value} [Línea: {max(1, var_line)}]")
             
             # Expresión derecha
-            self._build_expr_tree(treeview, assign_id, node.children[1], total_lines)
+            self._build_expr_tree(treeview, assign_id, node.children[1])
             return
 
         # Caso para operaciones binarias
@@ -3551,10 +3682,10 @@ class IDE:
                 for child in node.children:
                     if isinstance(child, ASTNode):
                         if child.type == 'expresion_binaria':
-                            self._build_expr_tree(treeview, op_id, child, total_lines)
+                            self._build_expr_tree(treeview, op_id, child)
                         else:
                             child_line = getattr(child, 'lineno', line)
-                            line_t = f" [Línea: {max(1, child_line - (total_lines - 1))}]" if child_line else ""
+                            line_t = f" [Línea: {max(1, child_line)}]" if child_line else ""
                             treeview.insert(op_id, "end", text=f"{child.value}{line_t}")
                     else:
                         treeview.insert(op_id, "end", text=f"{child}{line_text}")
@@ -3563,7 +3694,7 @@ class IDE:
                 # Para otros tipos de operaciones binarias, mostrar como nodo genérico
                 node_id = treeview.insert(parent, "end", text=f"{node.type}{line_text}")
                 for child in node.children:
-                    self._build_expr_tree(treeview, node_id, child, total_lines)
+                    self._build_expr_tree(treeview, node_id, child)
                 return
 
         # Caso para identificadores y literales
@@ -3574,20 +3705,20 @@ class IDE:
         # Caso genérico para otros nodos
         node_id = treeview.insert(parent, "end", text=f"{node.type}{line_text}")
         for child in node.children:
-            self._build_expr_tree(treeview, node_id, child, total_lines)
+            self._build_expr_tree(treeview, node_id, child)
             
-        def _insert_child(self, treeview, parent_id, child, parent_line, total_lines):
+        def _insert_child(self, treeview, parent_id, child, parent_line):
             """Método auxiliar simplificado para insertar hijos"""
             if isinstance(child, ASTNode):
                 child_line = getattr(child, 'lineno', parent_line)
-                line_text = f" [Línea: {max(1, child_line - (total_lines - 1))}]" if child_line is not None else ""
+                line_text = f" [Línea: {max(1, child_line)}]" if child_line is not None else ""
                 
                 if hasattr(child, 'value') and not getattr(child, 'children', []):
                     treeview.insert(parent_id, "end", text=f"{child.value}{line_text}")
                 else:
-                    self._build_expr_tree(treeview, parent_id, child, total_lines)
+                    self._build_expr_tree(treeview, parent_id, child)
             else:
-                line_text = f" [Línea: {max(1, parent_line - (total_lines - 1))}]" if parent_line is not None else ""
+                line_text = f" [Línea: {max(1, parent_line)}]" if parent_line is not None else ""
                 treeview.insert(parent_id, "end", text=f"{child}{line_text}")
     
 
@@ -3607,28 +3738,34 @@ class IDE:
         tree.item(item, open=False)
 
 
-    def _highlight_error_in_editor(self, errors, input_text=None):
+    def _highlight_error_in_editor(self, errors, input_text=None, indice=None):
         """Resalta errores en el editor con ubicación precisa"""
         if input_text is None:
             input_text = self.editor.get("1.0", tk.END)
+        if indice is None:
+            indice = IndiceLineas.desde_texto(input_text)
         
-        input_lines = input_text.split('\n')
         self.editor.tag_remove("ERROR", "1.0", tk.END)
         
         for error in errors:
             try:
-                line = error.get('line', 1)
-                column = error.get('column', 1)
+                if error.get('lexpos') is not None:
+                    # Posición exacta del token
+                    line, column = indice.posicion(error['lexpos'])
+                    column += 1
+                else:
+                    line = error.get('line', 1)
+                    column = error.get('column', 1)
                 
                 # Ajustar para índices basados en 1 vs basados en 0
                 line = max(1, int(line))
                 column = max(1, int(column))
                 
                 # Verificar que la línea existe
-                if line > len(input_lines):
+                if line > len(indice):
                     continue
                     
-                current_line = input_lines[line-1]
+                current_line = indice.linea_texto(input_text, line)
                 
                 # Ajustar columna si es mayor que la longitud de la línea
                 column = min(column, len(current_line)+1)
@@ -3647,7 +3784,7 @@ class IDE:
                     self.editor.see(start_pos)
                     
             except (ValueError, KeyError, tk.TclError) as e:
-                print(f"Error al resaltar: {str(e)}")
+                _traza.error(f"Error al resaltar: {str(e)}")
                 continue
 
 
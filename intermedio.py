@@ -1,84 +1,65 @@
 # intermedio.py - VERSIÓN CORREGIDA QUE PROCESA EL AST REAL
+import cache
+import traza
+from cuadruplos import ProgramaCuadruplos
+from visitor import SALTAR, Accion, Visitor
+
+_traza = traza.canal('intermedio')
 
 class IntermediateCodeGenerator:
     def __init__(self):
-        self.quadruples = []
+        self.quadruples = ProgramaCuadruplos()
         self.symbol_table = {}
+        self.label_counter = 0
         
     def generate(self, ast, symbol_table):
-        """Genera código intermedio procesando el AST real"""
-        self.quadruples = []
+        """Genera código intermedio procesando el AST real (ver cuadruplos.py)"""
+        self.quadruples = ProgramaCuadruplos()
         self.symbol_table = symbol_table
+        self.label_counter = 0
         
-        print("GENERANDO CÓDIGO INTERMEDIO DESDE AST REAL")
+        if _traza.info_activo:
+            _traza.info("GENERANDO CÓDIGO INTERMEDIO DESDE AST REAL")
         
         # Procesar el AST real en lugar de usar datos fijos
         self._process_node(ast)
         
-        print(f"Generados {len(self.quadruples)} cuádruplos desde AST:")
-        for i, quad in enumerate(self.quadruples):
-            print(f"  {i}: {quad}")
+        if _traza.info_activo:
+            _traza.info(f"Generados {len(self.quadruples)} cuádruplos desde AST:")
+        if _traza.debug_activo:
+            for i, quad in enumerate(self.quadruples):
+                _traza.debug(f"  {i}: {quad}")
         
         return self.quadruples
     
     def _process_node(self, node):
-        """Procesa recursivamente los nodos del AST"""
-        if not node or not hasattr(node, 'type'):
-            return
-            
-        node_type = node.type
-        print(f"DEBUG INTERMEDIO: Procesando nodo {node_type}")
-        
-        if node_type == 'programa':
-            self._process_program(node)
-        elif node_type == 'sentencia':
-            self._process_statement(node)
-        elif node_type == 'lista_sentencias':
-            self._process_statement_list(node)
-        elif node_type == 'asignacion':
-            self._process_assignment(node)
-        elif node_type == 'output':
-            self._process_output(node)
-        elif node_type == 'input' or node_type == 'input_list':
-            self._process_input(node)
-        elif node_type == 'expresion_binaria':
-            return self._process_binary_expression(node)
-        elif node_type == 'identificador':
-            return node.value
-        elif node_type == 'numero':
-            return node.value
-        
-        # Procesar hijos recursivamente
-        if hasattr(node, 'children'):
-            for child in node.children:
-                self._process_node(child)
+        """Procesa los nodos del AST (recorrido iterativo, ver _RecorridoIntermedio)"""
+        _RecorridoIntermedio(self).recorrer(node)
     
     def _process_program(self, node):
         """Procesa el nodo programa"""
-        print("DEBUG: Procesando programa")
-        if hasattr(node, 'children'):
-            for child in node.children:
-                self._process_node(child)
+        if _traza.debug_activo:
+            _traza.debug("DEBUG: Procesando programa")
+        return node.children
     
     def _process_statement_list(self, node):
         """Procesa lista de sentencias"""
-        print("DEBUG: Procesando lista de sentencias")
-        if hasattr(node, 'children'):
-            for child in node.children:
-                self._process_node(child)
+        if _traza.debug_activo:
+            _traza.debug("DEBUG: Procesando lista de sentencias")
+        return node.children
     
     def _process_statement(self, node):
         """Procesa una sentencia individual"""
         if not node or not hasattr(node, 'children') or not node.children:
-            return
+            return []
             
         # El primer hijo contiene el tipo real de sentencia
-        statement_node = node.children[0]
-        self._process_node(statement_node)
+        return [node.children[0]]
     
     def _process_assignment(self, node):
         """Procesa una asignación: variable = expresión"""
-        print("DEBUG: Procesando asignación")
+        if _traza.debug_activo:
+            _traza.debug("DEBUG: Procesando asignación")
         if hasattr(node, 'children') and len(node.children) >= 2:
             target = node.children[0]
             source = node.children[1]
@@ -88,119 +69,303 @@ class IntermediateCodeGenerator:
                 # Procesar la expresión del lado derecho
                 source_value = self._process_expression(source)
                 
-                self.quadruples.append({
-                    'type': 'assign',
-                    'target': var_name,
-                    'source': source_value
-                })
-                print(f"DEBUG: Asignación {var_name} = {source_value}")
+                self.quadruples.asignar(var_name, source_value)
+                if _traza.debug_activo:
+                    _traza.debug(f"DEBUG: Asignación {var_name} = {source_value}", destino=var_name)
     
     def _process_expression(self, node):
-        """Procesa una expresión y retorna su valor"""
+        """Procesa una expresión y retorna su valor.
+
+        Recorre la expresión con una pila explícita (como Visitor), así que una
+        expresión larga no llega al límite de recursión: cada operación se
+        genera después de sus operandos, primero el izquierdo"""
+        valores = []
+        pila = [(node, False)]
+        while pila:
+            node, operandos_listos = pila.pop()
+            if operandos_listos:
+                if node.type == 'expresion_binaria':
+                    right_val = valores.pop()
+                    left_val = valores.pop()
+                    operator = getattr(node, 'value', '+')
+                    temp_var = self.quadruples.operacion_temporal(operator, left_val, right_val)
+                    if _traza.debug_activo:
+                        _traza.debug(f"DEBUG: Operación binaria {temp_var} = {left_val} {operator} {right_val}", destino=temp_var, operador=operator)
+                    valores.append(temp_var)
+                elif node.type == 'expresion_unaria':
+                    # -x se genera como 0 - x
+                    valores.append(self.quadruples.operacion_temporal('-', 0, valores.pop()))
+                else:
+                    # !x se genera como x == 0
+                    valores.append(self.quadruples.operacion_temporal('==', valores.pop(), 0))
+                continue
+            operandos = self._operandos(node)
+            if operandos is None:
+                valores.append(self._valor_directo(node))
+            else:
+                pila.append((node, True))
+                pila.extend((operando, False) for operando in reversed(operandos))
+        return valores[0]
+
+    def _operandos(self, node):
+        """Operandos que hay que calcular antes de generar el nodo, o None si
+        su valor sale directo del nodo"""
         if not node:
             return None
-            
-        if node.type == 'identificador':
-            return node.value
-        elif node.type == 'numero':
+        if node.type == 'expresion_binaria':
+            if not hasattr(node, 'children') or len(node.children) < 2:
+                return None
+            return node.children[:2]
+        if node.type == 'expresion_unaria' and node.children and node.children[0].type != 'numero':
+            return node.children[:1]
+        if node.type == 'operacion_unaria' and node.children:
+            return node.children[:1]
+        return None
+
+    def _valor_directo(self, node):
+        """Valor de un nodo sin operandos que calcular"""
+        if not node:
+            return None
+        if node.type in ('identificador', 'numero'):
             return node.value
-        elif node.type == 'expresion_binaria':
-            return self._process_binary_expression(node)
-        
+        if node.type == 'booleano':
+            return 1 if node.value == 'true' else 0
+        if node.type == 'expresion_unaria' and node.children:
+            # -constante es directamente la constante negativa
+            return -node.children[0].value
         return None
     
     def _process_binary_expression(self, node):
-        """Procesa una expresión binaria y genera cuádruplo"""
-        if not hasattr(node, 'children') or len(node.children) < 2:
-            return None
-            
-        left = node.children[0]
-        right = node.children[1]
-        operator = getattr(node, 'value', '+')
-        
-        left_val = self._process_expression(left)
-        right_val = self._process_expression(right)
-        
-        # Crear un temporal para el resultado
-        temp_var = f"temp_{len(self.quadruples)}"
-        
-        self.quadruples.append({
-            'type': 'binary_op',
-            'target': temp_var,
-            'operator': operator,
-            'left': left_val,
-            'right': right_val
-        })
-        
-        print(f"DEBUG: Operación binaria {temp_var} = {left_val} {operator} {right_val}")
-        return temp_var
+        """Procesa una expresión binaria y genera sus cuádruplos"""
+        return self._process_expression(node)
     
     def _process_output(self, node):
         """Procesa sentencia de output: cout << valor"""
-        print("DEBUG: Procesando output")
+        if _traza.debug_activo:
+            _traza.debug("DEBUG: Procesando output")
         if hasattr(node, 'children'):
             for child in node.children:
                 if hasattr(child, 'type'):
                     if child.type == 'string_literal':
                         # Output de string literal
                         value = getattr(child, 'value', '')
-                        self.quadruples.append({
-                            'type': 'output',
-                            'value': f'"{value}"'
-                        })
-                        print(f"DEBUG: Output string: '{value}'")
+                        self.quadruples.salida(f'"{value}"')
+                        if _traza.debug_activo:
+                            _traza.debug(f"DEBUG: Output string: '{value}'")
                     elif child.type == 'identificador':
                         # Output de variable
                         value = child.value
-                        self.quadruples.append({
-                            'type': 'output', 
-                            'value': value
-                        })
-                        print(f"DEBUG: Output variable: {value}")
+                        self.quadruples.salida(value)
+                        if _traza.debug_activo:
+                            _traza.debug(f"DEBUG: Output variable: {value}")
+                    else:
+                        # Output de una expresión: se calcula en un temporal
+                        value = self._process_expression(child)
+                        if value is not None:
+                            self.quadruples.salida(value)
+                            if _traza.debug_activo:
+                                _traza.debug(f"DEBUG: Output expresión: {value}")
     
     def _process_input(self, node):
         """Procesa sentencia de input: cin >> variable"""
-        print(f"DEBUG INTERMEDIO INPUT: Procesando input de tipo {node.type}")
+        if _traza.debug_activo:
+            _traza.debug(f"DEBUG INTERMEDIO INPUT: Procesando input de tipo {node.type}")
         
         if node.type == 'input':
             # Input simple: cin >> variable;
             if node.children and hasattr(node.children[0], 'value'):
                 var_name = node.children[0].value
-                print(f"DEBUG INTERMEDIO INPUT: Variable: '{var_name}'")
-                self.quadruples.append({
-                    'type': 'input',
-                    'target': var_name
-                })
+                if _traza.debug_activo:
+                    _traza.debug(f"DEBUG INTERMEDIO INPUT: Variable: '{var_name}'")
+                self.quadruples.entrada(var_name)
         elif node.type == 'input_list':
             # Múltiples inputs: cin >> var1 >> var2;
             for child in node.children:
                 if hasattr(child, 'value'):
                     var_name = child.value
-                    print(f"DEBUG INTERMEDIO INPUT: Variable múltiple: '{var_name}'")
-                    self.quadruples.append({
-                        'type': 'input', 
-                        'target': var_name
-                    })
+                    if _traza.debug_activo:
+                        _traza.debug(f"DEBUG INTERMEDIO INPUT: Variable múltiple: '{var_name}'")
+                    self.quadruples.entrada(var_name)
     
+    # ============================================================
+    # ESTRUCTURAS DE CONTROL
+    # ============================================================
+    # La condición se genera al procesar el nodo; lo que sigue (cuerpos,
+    # saltos y etiquetas) se devuelve en orden para que el recorrido lo genere
+    # después, como Accion los saltos y etiquetas
+    def _new_label(self):
+        label = f"L{self.label_counter}"
+        self.label_counter += 1
+        return label
+
+    def _emit_label(self, label):
+        self.quadruples.etiqueta(label)
+
+    def _emit_jump(self, label):
+        self.quadruples.salto(label)
+
+    def _process_condition(self, node, label, jump_if=False):
+        """Genera la condición y un salto a label si su valor es jump_if"""
+        condition = self._process_expression(node)
+        if jump_if:
+            self.quadruples.salto_si(condition, label)
+        else:
+            self.quadruples.salto_si_no(condition, label)
+
+    def _process_if(self, node):
+        """if (c) s  ->  IFFALSE c GOTO fin; s; fin:"""
+        condition, body = node.children[0], node.children[1]
+        end = self._new_label()
+        if _traza.debug_activo:
+            _traza.debug(f"DEBUG: Procesando if (fin {end})")
+        self._process_condition(condition, end)
+        return [body, Accion(self._emit_label, end)]
+
+    def _process_if_else(self, node):
+        """if (c) s1 else s2  ->  IFFALSE c GOTO sino; s1; GOTO fin; sino: s2; fin:"""
+        condition, body, else_body = node.children[0], node.children[1], node.children[2]
+        else_label, end = self._new_label(), self._new_label()
+        if _traza.debug_activo:
+            _traza.debug(f"DEBUG: Procesando if-else (sino {else_label}, fin {end})")
+        self._process_condition(condition, else_label)
+        return [body, Accion(self._emit_jump, end), Accion(self._emit_label, else_label),
+                else_body, Accion(self._emit_label, end)]
+
+    def _process_while(self, node):
+        """while (c) s  ->  inicio: IFFALSE c GOTO fin; s; GOTO inicio; fin:"""
+        condition, body = node.children[0], node.children[1]
+        start, end = self._new_label(), self._new_label()
+        if _traza.debug_activo:
+            _traza.debug(f"DEBUG: Procesando while (inicio {start}, fin {end})")
+        self._emit_label(start)
+        self._process_condition(condition, end)
+        return [body, Accion(self._emit_jump, start), Accion(self._emit_label, end)]
+
+    def _process_do_while(self, node):
+        """do s while (c)  ->  inicio: s; IF c GOTO inicio
+        (do s until c salta mientras la condición sea falsa)"""
+        body, condition = node.children[0], node.children[1]
+        start = self._new_label()
+        if _traza.debug_activo:
+            _traza.debug(f"DEBUG: Procesando {node.type} (inicio {start})")
+        self._emit_label(start)
+        return [body, Accion(self._process_condition, condition, start, node.type == 'do_while')]
+
+    def _process_switch(self, node):
+        """switch (e) { case v: s ... default: d }  ->  por cada caso
+        t = e == v; IFFALSE t GOTO siguiente; s; GOTO fin; siguiente:
+        y al final d; fin: (los casos no continúan en el siguiente)"""
+        value = self._process_expression(node.children[0])
+        end = self._new_label()
+        if _traza.debug_activo:
+            _traza.debug(f"DEBUG: Procesando switch sobre {value} (fin {end})")
+        items, default = [], None
+        for case in self._switch_cases(node.children[1:]):
+            if case.type == 'default':
+                default = case
+                continue
+            next_case = self._new_label()
+            items += [Accion(self._process_case_test, value, case.children[0], next_case),
+                      case.children[1], Accion(self._emit_jump, end), Accion(self._emit_label, next_case)]
+        if default is not None and default.children:
+            items.append(default.children[0])
+        items.append(Accion(self._emit_label, end))
+        return items
+
+    def _switch_cases(self, nodes):
+        """Nodos case y default en orden (las listas de casos se anidan por la izquierda)"""
+        cases, pending = [], list(reversed(nodes))
+        while pending:
+            node = pending.pop()
+            if node is None or not hasattr(node, 'type'):
+                continue
+            if node.type in ('casos', 'case_list'):
+                pending.extend(reversed(node.children))
+            elif node.type in ('case', 'default'):
+                cases.append(node)
+        return cases
+
+    def _process_case_test(self, value, case_value, label):
+        test = self.quadruples.operacion_temporal('==', value, self._process_expression(case_value))
+        self.quadruples.salto_si_no(test, label)
+
     def get_quadruples_string(self):
         """Convierte los cuádruplos a string legible"""
-        result = "=== CÓDIGO INTERMEDIO GENERADO DESDE AST ===\n"
-        for i, quad in enumerate(self.quadruples):
-            result += f"{i:3d}. "
-            if quad['type'] == 'assign':
-                result += f"{quad['target']} = {quad['source']}"
-            elif quad['type'] == 'binary_op':
-                result += f"{quad['target']} = {quad['left']} {quad['operator']} {quad['right']}"
-            elif quad['type'] == 'output':
-                result += f"OUTPUT {quad['value']}"
-            elif quad['type'] == 'input':
-                result += f"INPUT {quad['target']}"
-            result += "\n"
-        return result
-
-def generate_intermediate_code(ast, symbol_table):
-    """Función principal para generar código intermedio"""
-    generator = IntermediateCodeGenerator()
-    quadruples = generator.generate(ast, symbol_table)
-    intermedio_str = generator.get_quadruples_string()
-    return quadruples, intermedio_str
\ No newline at end of file
+        return self.quadruples.texto("CÓDIGO INTERMEDIO GENERADO DESDE AST")
+
+class _RecorridoIntermedio(Visitor):
+    """Recorrido de generación: cada sentencia se genera una sola vez, en el
+    orden del programa"""
+
+    def __init__(self, generador):
+        super().__init__()
+        self.generador = generador
+
+    def visitar(self, nodo, contexto):
+        if _traza.debug_activo:
+            _traza.debug(f"DEBUG INTERMEDIO: Procesando nodo {nodo.type}", nodo=nodo.type)
+        return self._despacho.get(nodo.type, self.visitar_defecto)(nodo, contexto)
+
+    def visitar_programa(self, nodo, contexto):
+        return self.generador._process_program(nodo), contexto
+
+    def visitar_sentencia(self, nodo, contexto):
+        return self.generador._process_statement(nodo), contexto
+
+    def visitar_lista_sentencias(self, nodo, contexto):
+        return self.generador._process_statement_list(nodo), contexto
+
+    # Las sentencias simples generan sus expresiones completas y no se
+    # recorren sus hijos
+    def visitar_asignacion(self, nodo, contexto):
+        self.generador._process_assignment(nodo)
+        return SALTAR
+
+    def visitar_output(self, nodo, contexto):
+        self.generador._process_output(nodo)
+        return SALTAR
+
+    def visitar_input(self, nodo, contexto):
+        self.generador._process_input(nodo)
+        return SALTAR
+    visitar_input_list = visitar_input
+
+    def visitar_if(self, nodo, contexto):
+        return self.generador._process_if(nodo), contexto
+    visitar_if_then = visitar_if
+
+    def visitar_if_else(self, nodo, contexto):
+        return self.generador._process_if_else(nodo), contexto
+    visitar_if_then_else = visitar_if_else
+
+    def visitar_while(self, nodo, contexto):
+        return self.generador._process_while(nodo), contexto
+
+    def visitar_do_while(self, nodo, contexto):
+        return self.generador._process_do_while(nodo), contexto
+    visitar_do_until = visitar_do_while
+
+    def visitar_switch(self, nodo, contexto):
+        return self.generador._process_switch(nodo), contexto
+
+    # Las expresiones se evalúan completas y no se recorren sus hijos
+    def visitar_expresion_binaria(self, nodo, contexto):
+        self.generador._process_binary_expression(nodo)
+        return SALTAR
+
+    def visitar_identificador(self, nodo, contexto):
+        return SALTAR
+    visitar_numero = visitar_identificador
+
+def generate_intermediate_code(ast, symbol_table, fuente=None):
+    """Función principal para generar código intermedio.
+
+    fuente es el texto del que salen ast y symbol_table; si se pasa, el
+    resultado se guarda en la caché de artefactos bajo ese texto"""
+    def generar():
+        generator = IntermediateCodeGenerator()
+        quadruples = generator.generate(ast, symbol_table)
+        return quadruples, generator.get_quadruples_string()
+    if fuente is None:
+        return generar()
+    return cache.artefacto('intermedio', (fuente, symbol_table), generar)
\ No newline at end of file
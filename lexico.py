@@ -1,5 +1,21 @@
+import codecs
+import importlib.util
+import io
+import mmap
+import os
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
 import ply.lex as lex
 
+import cache
+import traza
+
+_traza = traza.canal('lexico')
+
 reserved = {
     'if': 'IF', 'else': 'ELSE', 'end': 'END', 'do': 'DO', 'while': 'WHILE', 'for': 'FOR', 'default': 'DEFAULT',
     'switch': 'SWITCH', 'case': 'CASE', 'int': 'INT', 'float': 'FLOAT', 'function': 'FUNCTION', 'return': 'RETURN', 'void': 'VOID', 'params': 'PARAMS',
@@ -67,8 +83,9 @@ t_CIN = r'cin'
 def reset_lexer():
     """Reinicia el estado interno del lexer"""
     global lexer
-    lexer = lex.lex()
-    print("DEBUG: Lexer reiniciado")
+    lexer = _construir_lexer()
+    if _traza.debug_activo:
+        _traza.debug("DEBUG: Lexer reiniciado")
 
 # Tokens numéricos
 def t_REAL(t):
@@ -137,28 +154,960 @@ def t_error(t):
     return t
 
 # Construcción del lexer
-lexer = lex.lex()
+def _construir_lexer():
+    """Crea el lexer de PLY con las tablas guardadas en la caché del usuario.
+
+    El archivo lextab se identifica por la huella de tokens y reglas: si
+    existe se carga sin validar las reglas otra vez; si no, se genera y se
+    escribe de forma atómica"""
+    inicio = time.perf_counter()
+    modulo = sys.modules[__name__]
+    reglas = sorted((nombre, valor if isinstance(valor, str) else valor.__doc__)
+                    for nombre, valor in globals().items() if nombre.startswith('t_'))
+    nombre = f"lextab_{cache.huella(lex.__tabversion__, tokens, reserved, reglas)}"
+    try:
+        ruta = os.path.join(cache.directorio_cache(), nombre + '.py')
+    except OSError:
+        ruta = None
+
+    if ruta and os.path.exists(ruta):
+        try:
+            spec = importlib.util.spec_from_file_location(nombre, ruta)
+            tabla = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(tabla)
+            nuevo = lex.lex(module=modulo, optimize=1, lextab=tabla)
+            cache.registrar_arranque('lexer', inicio, 'caché')
+            return nuevo
+        except Exception as e:
+            _traza.aviso(f"Tabla del lexer inválida, se regenera ({e})")
+
+    nuevo = lex.lex(module=modulo)
+    if ruta:
+        try:
+            # writetab recibe un nombre de módulo, sin la extensión .py
+            cache.reemplazo_atomico(ruta, lambda temporal: nuevo.writetab(
+                os.path.splitext(os.path.basename(temporal))[0], os.path.dirname(temporal)))
+        except OSError as e:
+            _traza.aviso(f"No se pudo guardar la tabla del lexer: {e}")
+    cache.registrar_arranque('lexer', inicio, 'generado')
+    return nuevo
+
+lexer = _construir_lexer()
 
 # Función de prueba
-def test_lexer(input_text):
-    lexer.input(input_text)
-    tokens = []
-    
-    # Crear archivo temporal
-    import tempfile
-    temp_file = tempfile.NamedTemporaryFile(mode='w+', suffix='.txt', delete=False)
-    temp_file.write("TOKENS GENERADOS:\n")
-    temp_file.write("----------------\n")
-    
+def test_lexer(input_text, volcar=False):
+    """Tokeniza el texto en un TokenBuffer en memoria. No pasa por la caché de
+    artefactos: leer los tokens de disco cuesta más que volver a tokenizar.
+
+    El volcado a archivo temporal solo se hace si se pide con volcar=True"""
+    tokens = TokenBuffer.desde_texto(input_text)
+    if volcar:
+        ruta = tokens.volcar()
+        if _traza.info_activo:
+            _traza.info(f"Tokens guardados en archivo temporal: {ruta}")
+    return tokens
+
+
+# ============================================================
+# MOTOR ALTERNATIVO: REGEX MAESTRA DE UNA SOLA PASADA
+# ============================================================
+def _reglas_en_orden_ply():
+    """Devuelve las reglas (nombre, regex) en el mismo orden que PLY:
+    primero las reglas función por línea de definición y después las
+    reglas string ordenadas por longitud de la regex (mayor a menor)"""
+    funciones = []
+    cadenas = []
+    for nombre, regla in list(globals().items()):
+        if not nombre.startswith('t_') or nombre in ('t_ignore', 't_error'):
+            continue
+        if callable(regla):
+            funciones.append((regla.__code__.co_firstlineno, nombre[2:], regla.__doc__))
+        else:
+            cadenas.append((nombre[2:], regla))
+    funciones.sort()
+    cadenas.sort(key=lambda regla: len(regla[1]), reverse=True)
+    return [(nombre, regex) for _, nombre, regex in funciones] + cadenas
+
+def _construir_regex_maestra():
+    """Combina todas las clases de token en una sola regex con grupos nombrados.
+
+    Los espacios y tabs (t_ignore) se absorben como prefijo de cada match en
+    lugar de producir matches propios. Las reglas string que solo contienen
+    letras (if, while, ...) se omiten porque t_ID siempre las captura antes.
+    Las reglas que empiezan con letra o salto de línea se adelantan: ninguna
+    otra regla viva comparte su primer carácter, así que el resultado es el
+    mismo que con el orden de PLY."""
+    reglas = [(nombre, regex) for nombre, regex in _reglas_en_orden_ply()
+              if nombre in ('TRUE', 'FALSE', 'ID') or not re.fullmatch(r'[A-Za-z_]\w*', regex)]
+    primero = ['newline', 'TRUE', 'FALSE', 'ID']
+    reglas = ([regla for nombre in primero for regla in reglas if regla[0] == nombre] +
+              [regla for regla in reglas if regla[0] not in primero])
+
+    partes = [f"(?P<{nombre}>{regex})" for nombre, regex in reglas]
+    # Cualquier otro carácter (salvo los ignorados) es un error léxico, como en t_error
+    ignorar = re.escape(t_ignore)
+    partes.append(f"(?P<error>[^{ignorar}])")
+    return re.compile(f"[{ignorar}]*(?:{'|'.join(partes)})", re.VERBOSE)
+
+def _construir_hash_perfecto(palabras):
+    """Busca (M, A) tal que h(w) = (ord(w[0]) + 3*ord(w[-1]) + A*len(w)) % M
+    no tenga colisiones entre las palabras reservadas"""
+    n = len(palabras)
+    for m in range(n, 8 * n):
+        for a in range(1, 64):
+            tabla = [None] * m
+            for palabra in palabras:
+                h = (ord(palabra[0]) + 3 * ord(palabra[-1]) + a * len(palabra)) % m
+                if tabla[h] is not None:
+                    break
+                tabla[h] = (palabra, reserved[palabra])
+            else:
+                return m, a, tabla
+    raise ValueError("No se encontró un hash perfecto para las palabras reservadas")
+
+_REGEX_MAESTRA = _construir_regex_maestra()
+_HASH_M, _HASH_A, _TABLA_RESERVADAS = cache.cargar_o_construir(
+    'reservadas',
+    cache.huella(sorted(reserved.items()), _construir_hash_perfecto.__code__.co_code),
+    lambda: _construir_hash_perfecto(sorted(reserved)))
+
+# Acciones por grupo de la regex maestra
+_TIPO_FINAL = {'ERROR_REAL': 'ERROR', 'ERROR_AT': 'ERROR', 'error': 'ERROR'}
+_CONVERSION = {
+    'REAL': float,
+    'NUMBER': int,
+    'STRING_LITERAL': lambda valor: valor[1:-1],
+}
+
+# Estado del lexer al inicio de una línea
+LIMPIO, EN_COMENTARIO, EN_CADENA = 0, 1, 2
+
+def _a_lextokens(tuplas):
+    """Convierte tuplas (tipo, valor, lineno, lexpos, fin) en LexToken de PLY"""
+    LexToken = lex.LexToken
+    for tipo, valor, linea, lexpos, _ in tuplas:
+        tok = LexToken()
+        tok.type = tipo
+        tok.value = valor
+        tok.lineno = linea
+        tok.lexpos = lexpos
+        yield tok
+
+class MasterLexer:
+    """Lexer de una sola pasada sobre la regex maestra.
+
+    Produce los mismos tipos, valores, lexpos y lineno que el lexer de PLY
+    y ofrece la misma interfaz (input/token), así que se puede pasar al parser."""
+
+    def __init__(self):
+        self.lexdata = ''
+        self.lexpos = 0
+        self.lineno = 1
+        self._generador = None
+
+    def input(self, data):
+        """Igual que PLY: no reinicia lineno"""
+        self.lexdata = data
+        self.lexpos = 0
+        self._generador = self.tokenize(data, self.lineno)
+
+    def token(self):
+        if self._generador is None:
+            return None
+        tok = next(self._generador, None)
+        if tok is None:
+            self._generador = None
+        else:
+            self.lexpos = tok.lexpos
+        return tok
+
+    def __iter__(self):
+        return iter(self.token, None)
+
+    def tokenize(self, data, lineno=1):
+        """Generador de LexToken sobre todo el texto"""
+        return _a_lextokens(self.escanear(data, lineno))
+
+    def escanear(self, data, lineno=1, pos=0, multilinea=None, limite=None):
+        """Generador de tuplas (tipo, valor, lineno, lexpos, fin) sin crear objetos LexToken.
+
+        Empieza en el offset pos. Si se pasa la lista multilinea, se le agregan
+        (inicio, fin, estado) de los comentarios de bloque (EN_COMENTARIO) y
+        cadenas (EN_CADENA) que abarcan más de una línea. Con limite se detiene
+        antes del primer token que termina en o después de ese offset y deja en
+        lexpos/lineno el punto desde donde hay que continuar"""
+        tabla = _TABLA_RESERVADAS
+        hash_m = _HASH_M
+        hash_a = _HASH_A
+        tipo_final = _TIPO_FINAL
+        conversion = _CONVERSION
+        if limite is None:
+            limite = len(data) + 1
+
+        for m in _REGEX_MAESTRA.finditer(data, pos):
+            fin = m.end()
+            if fin >= limite:
+                # El token podría continuar en el texto que todavía no se leyó
+                self.lexpos = m.start()
+                self.lineno = lineno
+                return
+            tipo = m.lastgroup
+            if tipo == 'ID':
+                valor = m.group(tipo)
+                entrada = tabla[(ord(valor[0]) + 3 * ord(valor[-1]) + hash_a * len(valor)) % hash_m]
+                if entrada is not None and entrada[0] == valor:
+                    tipo = entrada[1]
+                yield tipo, valor, lineno, m.start('ID'), fin
+                continue
+            if tipo == 'newline':
+                lineno += len(m.group(tipo))
+                self.lineno = lineno
+                continue
+            if tipo == 'COMMENT':
+                if multilinea is not None and '\n' in m.group(tipo):
+                    multilinea.append((m.start(tipo), m.end(), EN_COMENTARIO))
+                continue
+
+            valor = m.group(tipo)
+            if tipo in conversion:
+                if tipo == 'STRING_LITERAL' and multilinea is not None and '\n' in valor:
+                    multilinea.append((m.start(tipo), m.end(), EN_CADENA))
+                valor = conversion[tipo](valor)
+            elif tipo in tipo_final:
+                tipo = tipo_final[tipo]
+            yield tipo, valor, lineno, m.start(m.lastindex), fin
+        self.lineno = lineno
+        self.lexpos = len(data)
+
+def tokenize(input_text, lineno=1):
+    """Tokeniza con el motor de regex maestra (sin archivo temporal)"""
+    return list(MasterLexer().tokenize(input_text, lineno))
+
+# ============================================================
+# BUFFER COMPACTO DE TOKENS (COLUMNAS EN ARRAYS)
+# ============================================================
+TIPOS_TOKEN = sorted(set(tokens))
+_ID_TIPO = {tipo: i for i, tipo in enumerate(TIPOS_TOKEN)}
+
+class TokenView:
+    """Vista ligera de un token dentro de un TokenBuffer (misma interfaz que LexToken)"""
+    __slots__ = ('buffer', 'indice')
+
+    def __init__(self, buffer, indice):
+        self.buffer = buffer
+        self.indice = indice
+
+    @property
+    def type(self):
+        return TIPOS_TOKEN[self.buffer.tipos[self.indice]]
+
+    @property
+    def value(self):
+        return self.buffer.valores_internados[self.buffer.valores[self.indice]]
+
+    @property
+    def lineno(self):
+        return self.buffer.lineas[self.indice]
+
+    @property
+    def lexpos(self):
+        return self.buffer.inicios[self.indice]
+
+    @property
+    def end(self):
+        return self.buffer.finales[self.indice]
+
+    def __repr__(self):
+        return f"LexToken({self.type},{self.value!r},{self.lineno},{self.lexpos})"
+
+class TokenBuffer:
+    """Tokens guardados como columnas paralelas en arrays:
+    id de tipo, offset de inicio, offset de fin, línea e índice del valor internado"""
+
+    def __init__(self, texto=''):
+        self.texto = texto
+        self.tipos = array('B')
+        self.inicios = array('I')
+        self.finales = array('I')
+        self.lineas = array('I')
+        self.valores = array('I')
+        self.valores_internados = []
+        self._indice_valor = {}
+        self._indice_lineas = None
+
+    @classmethod
+    def desde_texto(cls, texto, lineno=1):
+        """Tokeniza el texto completo con el motor de regex maestra"""
+        buffer = cls(texto)
+        buffer.extender(MasterLexer().escanear(texto, lineno))
+        return buffer
+
+    def _internar(self, valor):
+        # 1 == 1.0 en un dict, así que los valores no-str se distinguen por su clase
+        clave = valor if valor.__class__ is str else (valor.__class__, valor)
+        indice = self._indice_valor.get(clave)
+        if indice is None:
+            indice = len(self.valores_internados)
+            self._indice_valor[clave] = indice
+            self.valores_internados.append(valor)
+        return indice
+
+    def agregar(self, tipo, valor, lineno, lexpos, fin):
+        self.tipos.append(_ID_TIPO[tipo])
+        self.inicios.append(lexpos)
+        self.finales.append(fin)
+        self.lineas.append(lineno)
+        self.valores.append(self._internar(valor))
+
+    def extender(self, tuplas):
+        """Agrega tuplas (tipo, valor, lineno, lexpos, fin) como las de MasterLexer.escanear"""
+        id_tipo = _ID_TIPO
+        indice_valor = self._indice_valor
+        internados = self.valores_internados
+        tipos, inicios, finales = self.tipos.append, self.inicios.append, self.finales.append
+        lineas, valores = self.lineas.append, self.valores.append
+        for tipo, valor, lineno, lexpos, fin in tuplas:
+            clave = valor if valor.__class__ is str else (valor.__class__, valor)
+            indice = indice_valor.get(clave)
+            if indice is None:
+                indice = indice_valor[clave] = len(internados)
+                internados.append(valor)
+            tipos(id_tipo[tipo])
+            inicios(lexpos)
+            finales(fin)
+            lineas(lineno)
+            valores(indice)
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [TokenView(self, i) for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("índice de token fuera de rango")
+        return TokenView(self, indice)
+
+    def __iter__(self):
+        for i in range(len(self.tipos)):
+            yield TokenView(self, i)
+
+    def tipo(self, indice):
+        return TIPOS_TOKEN[self.tipos[indice]]
+
+    def lextokens(self):
+        """LexToken de PLY para cada token, creados bajo demanda (entrada del parser)"""
+        internados = self.valores_internados
+        return _a_lextokens(zip((TIPOS_TOKEN[t] for t in self.tipos),
+                                (internados[v] for v in self.valores),
+                                self.lineas, self.inicios, self.finales))
+
+    def valor(self, indice):
+        return self.valores_internados[self.valores[indice]]
+
+    def filas_tabla(self):
+        """Filas (lexema, token, subtoken) para la tabla de tokens del IDE, generadas bajo demanda"""
+        id_error = _ID_TIPO['ERROR']
+        valores_internados = self.valores_internados
+        for id_tipo, id_valor in zip(self.tipos, self.valores):
+            if id_tipo != id_error:
+                yield (valores_internados[id_valor], TIPOS_TOKEN[id_tipo], '')
+
+    def errores(self):
+        """Vistas de los tokens ERROR en orden de aparición"""
+        id_error = _ID_TIPO['ERROR']
+        for i, id_tipo in enumerate(self.tipos):
+            if id_tipo == id_error:
+                yield TokenView(self, i)
+
+    def indice_lineas(self):
+        """IndiceLineas del texto tokenizado (se construye una sola vez)"""
+        if self._indice_lineas is None:
+            self._indice_lineas = IndiceLineas.desde_texto(self.texto)
+        return self._indice_lineas
+
+    def bytes_por_token(self):
+        columnas = (self.tipos, self.inicios, self.finales, self.lineas, self.valores)
+        return sum(columna.itemsize for columna in columnas)
+
+    def volcar(self, ruta=None):
+        """Escribe los tokens en un archivo de texto (temporal si no se da ruta) y devuelve la ruta"""
+        import tempfile
+        if ruta is None:
+            archivo = tempfile.NamedTemporaryFile(mode='w+', suffix='.txt', delete=False)
+        else:
+            archivo = open(ruta, 'w')
+        with archivo:
+            archivo.write("TOKENS GENERADOS:\n")
+            archivo.write("----------------\n")
+            for tok in self:
+                archivo.write(f"{tok.type:<10} {tok.value:<10} linea {tok.lineno} pos {tok.lexpos}\n")
+        return archivo.name
+
+class IndiceLineas:
+    """Offset de inicio de cada línea del texto.
+
+    Convierte un lexpos en (línea, columna) por búsqueda binaria en lugar de
+    recorrer el texto línea por línea. Las líneas son físicas, así que
+    también cuentan los saltos dentro de comentarios y cadenas."""
+    __slots__ = ('inicios',)
+
+    def __init__(self, inicios):
+        self.inicios = inicios
+
+    @classmethod
+    def desde_texto(cls, texto):
+        inicios = array('I', [0])
+        agregar = inicios.append
+        p = texto.find('\n')
+        while p != -1:
+            agregar(p + 1)
+            p = texto.find('\n', p + 1)
+        return cls(inicios)
+
+    def __len__(self):
+        return len(self.inicios)
+
+    def linea(self, lexpos):
+        """Número de línea (desde 1) del offset"""
+        return bisect_right(self.inicios, lexpos)
+
+    def posicion(self, lexpos):
+        """(línea desde 1, columna desde 0) del offset"""
+        linea = bisect_right(self.inicios, lexpos)
+        return linea, lexpos - self.inicios[linea - 1]
+
+    def inicio(self, linea):
+        return self.inicios[linea - 1]
+
+    def linea_texto(self, texto, linea):
+        """Contenido de la línea sin el salto final"""
+        inicio = self.inicios[linea - 1]
+        fin = texto.find('\n', inicio)
+        return texto[inicio:] if fin == -1 else texto[inicio:fin]
+
+# ============================================================
+# LEXER INCREMENTAL PARA EL EDITOR
+# ============================================================
+
+# Líneas por trozo del lexer incremental (un trozo tiene más si un comentario
+# o una cadena no deja cortarlo antes)
+LINEAS_POR_TROZO = 32
+
+class _Trozo:
+    """Líneas consecutivas del texto con sus tokens.
+
+    Empieza en un inicio de línea LIMPIO y termina después de un salto de
+    línea (o al final del texto), así que ningún token lo cruza. Offsets
+    relativos al inicio del trozo y lineno relativo al de su primera línea.
+    pendiente: tiene una comilla o un '/*' sin cerrar; comillas y cierres:
+    su texto tiene '"' o '*/' que cerrarían uno anterior"""
+    __slots__ = ('texto', 'lineas', 'saltos', 'tipos', 'inicios', 'finales', 'linenos', 'valores',
+                 'pendiente', 'comillas', 'cierres')
+
+def _pendientes(tokens, internados):
+    """Lo que quedó sin cerrar entre los tokens (un TokenBuffer o un _Trozo):
+    '"' por una comilla sola (ERROR) y '/*' por DIVIDE seguido de TIMES pegado.
+    Su resultado depende del texto posterior"""
+    tipos = tokens.tipos
+    encontrados = set()
+    id_error, id_divide, id_times = _ID_TIPO['ERROR'], _ID_TIPO['DIVIDE'], _ID_TIPO['TIMES']
+    for id_tipo, clase in ((id_error, '"'), (id_divide, '/*')):
+        i = 0
+        while True:
+            try:
+                i = tipos.index(id_tipo, i)
+            except ValueError:
+                break
+            if id_tipo == id_error:
+                pendiente = internados[tokens.valores[i]] == '"'
+            else:
+                pendiente = (i + 1 < len(tipos) and tipos[i + 1] == id_times
+                             and tokens.inicios[i + 1] == tokens.finales[i])
+            if pendiente:
+                encontrados.add(clase)
+                break
+            i += 1
+    return encontrados
+
+class IncrementalLexer:
+    """Mantiene los tokens de un texto y los actualiza edición por edición.
+
+    El texto se guarda en trozos de unas LINEAS_POR_TROZO líneas que empiezan
+    en un inicio de línea LIMPIO, cada uno con sus tokens e inicios de línea
+    relativos al trozo. Una tabla guarda dónde empieza cada trozo (offset,
+    línea física, lineno y primer token); los trozos que siguen a una edición
+    se desplazan de forma diferida, así que solo se actualizan las entradas
+    entre una edición y la siguiente.
+
+    Cada edición vuelve a tokenizar los trozos que toca; los siguientes solo
+    si una comilla o un '/*' sin cerrar puede cerrarse en ellos, y los
+    anteriores solo si la edición puede cerrar una comilla o un '/*' que
+    quedó abierto antes. El texto completo y el TokenBuffer se arman recién
+    cuando se piden"""
+
+    # Columnas de la tabla de trozos
+    _OFFSET, _LINEA, _LINENO, _TOKEN = range(4)
+
+    def __init__(self, texto=''):
+        self.cargar(texto)
+
+    def cargar(self, texto):
+        """Tokeniza el texto completo y rearma todos los trozos"""
+        self.valores_internados = []
+        self._indice_valor = {}
+        self._trozos = []
+        self._tabla = tuple(array('I') for _ in range(4))
+        # Las entradas de la tabla desde _desde en adelante todavía no tienen
+        # sumado _desplazamiento
+        self._desde = 0
+        self._desplazamiento = [0, 0, 0, 0]
+        self._con_pendiente = 0
+        self.longitud = 0
+        self._reemplazar_trozos(0, 0, *self._escanear(texto, 1), 1)
+        self._texto = texto
+        self._buffer = None
+
+    @property
+    def texto(self):
+        if self._texto is None:
+            self._texto = ''.join(trozo.texto for trozo in self._trozos)
+        return self._texto
+
+    @property
+    def tokens(self):
+        """TokenBuffer del texto completo; se arma al pedirlo y sirve hasta la próxima edición"""
+        if self._buffer is None:
+            self._fijar(len(self._trozos))
+            buffer = TokenBuffer(self.texto)
+            buffer.valores_internados = self.valores_internados
+            buffer._indice_valor = self._indice_valor
+            inicios_linea = array('I')
+            offsets, _, linenos, _ = self._tabla
+            for trozo, base, lineno in zip(self._trozos, offsets, linenos):
+                buffer.tipos.extend(trozo.tipos)
+                buffer.valores.extend(trozo.valores)
+                buffer.inicios.extend(array('I', [x + base for x in trozo.inicios]))
+                buffer.finales.extend(array('I', [x + base for x in trozo.finales]))
+                buffer.lineas.extend(array('I', [x + lineno for x in trozo.linenos]))
+                inicios_linea.extend(array('I', [x + base for x in trozo.lineas]))
+            if buffer.texto.endswith('\n'):
+                inicios_linea.append(len(buffer.texto))
+            buffer._indice_lineas = IndiceLineas(inicios_linea)
+            self._buffer = buffer
+        return self._buffer
+
+    def offset(self, linea, columna):
+        """Offset de (línea desde 1, columna desde 0) sin recorrer el texto"""
+        fisica = linea - 1
+        if fisica >= self._total(self._LINEA):
+            # La línea vacía después del último salto de línea
+            return self.longitud
+        k = self._buscar(self._LINEA, fisica)
+        trozo = self._trozos[k]
+        return self._inicio(self._OFFSET, k) + trozo.lineas[fisica - self._inicio(self._LINEA, k)] + columna
+
+    def editar(self, inicio, fin, nuevo):
+        """Reemplaza texto[inicio:fin] por nuevo y vuelve a tokenizar los trozos afectados.
+
+        Devuelve (primer_token, eliminados, insertados) con el rango de tokens
+        de los trozos que se rearmaron"""
+        self._texto = None
+        self._buffer = None
+        ultimo = len(self._trozos) - 1
+        a = self._buscar(self._OFFSET, inicio)
+        b = max(a, self._buscar(self._OFFSET, fin - 1))
+        revisar_anteriores = self._con_pendiente > 0
+        while True:
+            base = self._inicio(self._OFFSET, a)
+            viejo = ''.join(trozo.texto for trozo in self._trozos[a:b + 1])
+            texto = viejo[:inicio - base] + nuevo + viejo[fin - base:]
+            if b < ultimo and not texto.endswith('\n'):
+                # La última línea sigue en el trozo siguiente
+                b += 1
+                continue
+            if revisar_anteriores:
+                # Una comilla o un '/*' sin cerrar en un trozo anterior se
+                # cierra si la edición agrega una comilla, forma un '*/' o
+                # cambia un escape (una barra antes de un salto de línea no
+                # escapa nada y deja la comilla sin cerrar)
+                revisar_anteriores = False
+                entorno = texto[max(0, inicio - base - 1):inicio - base + len(nuevo) + 1]
+                if '"' in nuevo or '*/' in entorno or '\\' in entorno or '\\' in viejo[inicio - base:fin - base]:
+                    anterior = next((k for k in range(a) if self._trozos[k].pendiente), a)
+                    if anterior < a:
+                        a = anterior
+                        continue
+            lineno = self._inicio(self._LINENO, a)
+            buffer, multilinea = self._escanear(texto, lineno)
+            pendientes = _pendientes(buffer, self.valores_internados)
+            if b < ultimo and pendientes and self._cierre_despues(b + 1, pendientes):
+                # Lo que quedó abierto puede cerrarse más adelante: se agregan trozos
+                b = min(ultimo, b + (b - a + 1))
+                continue
+            break
+        primer = self._inicio(self._TOKEN, a)
+        eliminados, insertados = self._reemplazar_trozos(a, b + 1, buffer, multilinea, lineno)
+        return primer, eliminados, insertados
+
+    # ---------- tabla de trozos con desplazamiento diferido ----------
+    def _inicio(self, columna, k):
+        valor = self._tabla[columna][k]
+        return valor + self._desplazamiento[columna] if k >= self._desde else valor
+
+    def _total(self, columna):
+        """Valor de la columna al final del texto"""
+        k = len(self._trozos) - 1
+        trozo = self._trozos[k]
+        tamaño = (len(trozo.texto), len(trozo.lineas), trozo.saltos, len(trozo.tipos))[columna]
+        return self._inicio(columna, k) + tamaño
+
+    def _buscar(self, columna, valor):
+        """Último trozo que empieza en o antes de valor"""
+        datos = self._tabla[columna]
+        desde = self._desde
+        if desde < len(datos) and valor >= datos[desde] + self._desplazamiento[columna]:
+            return bisect_right(datos, valor - self._desplazamiento[columna], desde) - 1
+        return max(0, bisect_right(datos, valor, 0, desde) - 1)
+
+    def _fijar(self, hasta):
+        """Suma el desplazamiento diferido a las entradas anteriores a hasta"""
+        if self._desde < hasta:
+            for datos, d in zip(self._tabla, self._desplazamiento):
+                if d:
+                    datos[self._desde:hasta] = array('I', [x + d for x in datos[self._desde:hasta]])
+            self._desde = hasta
+        if self._desde >= len(self._trozos):
+            self._desplazamiento = [0, 0, 0, 0]
+
+    def _desplazar(self, desde, deltas):
+        """Desplaza las entradas desde el trozo desde en adelante"""
+        if desde < self._desde:
+            for datos, d in zip(self._tabla, deltas):
+                if d:
+                    datos[desde:self._desde] = array('I', [x + d for x in datos[desde:self._desde]])
+        else:
+            self._fijar(desde)
+        self._desplazamiento = [x + d for x, d in zip(self._desplazamiento, deltas)]
+
+    # ---------- trozos ----------
+    def _escanear(self, texto, lineno):
+        """(TokenBuffer, multilinea) del texto, con la tabla de valores compartida"""
+        buffer = TokenBuffer(texto)
+        buffer.valores_internados = self.valores_internados
+        buffer._indice_valor = self._indice_valor
+        multilinea = []
+        buffer.extender(MasterLexer().escanear(texto, lineno, 0, multilinea))
+        return buffer, multilinea
+
+    def _cierre_despues(self, k, pendientes):
+        """Algún trozo desde k tiene una comilla o un '*/' que cerraría lo pendiente"""
+        comillas, cierres = '"' in pendientes, '/*' in pendientes
+        return any((comillas and trozo.comillas) or (cierres and trozo.cierres)
+                   for trozo in self._trozos[k:])
+
+    def _reemplazar_trozos(self, a, b, buffer, multilinea, lineno):
+        """Reemplaza los trozos [a, b) por los del texto del buffer, que empieza
+        donde empezaba el trozo a (con ese lineno). Devuelve (eliminados,
+        insertados) en tokens"""
+        nuevos = self._cortar(buffer, multilinea, lineno)
+        if not nuevos and a == 0 and b == len(self._trozos):
+            # El texto vacío es un trozo vacío
+            nuevos = [self._trozo(buffer, 0, 0, 0, 0, array('I', [0]), lineno, lineno)]
+        viejos = self._trozos[a:b]
+        self._fijar(b)
+        # Solo cargar agrega trozos al final (de una tabla vacía)
+        posicion = [self._inicio(columna, a) for columna in range(4)] if a < len(self._trozos) else [0, 0, lineno, 0]
+        filas = ([], [], [], [])
+        for trozo in nuevos:
+            for fila, valor in zip(filas, posicion):
+                fila.append(valor)
+            posicion = [posicion[0] + len(trozo.texto), posicion[1] + len(trozo.lineas),
+                        posicion[2] + trozo.saltos, posicion[3] + len(trozo.tipos)]
+        for datos, fila in zip(self._tabla, filas):
+            datos[a:b] = array('I', fila)
+        self._trozos[a:b] = nuevos
+        self._desde += len(nuevos) - (b - a)
+
+        cambio = [0, 0, 0, 0]
+        for trozos, signo in ((nuevos, 1), (viejos, -1)):
+            for trozo in trozos:
+                cambio[0] += signo * len(trozo.texto)
+                cambio[1] += signo * len(trozo.lineas)
+                cambio[2] += signo * trozo.saltos
+                cambio[3] += signo * len(trozo.tipos)
+                self._con_pendiente += signo * trozo.pendiente
+        self._desplazar(a + len(nuevos), cambio)
+        self.longitud += cambio[0]
+        eliminados = sum(len(trozo.tipos) for trozo in viejos)
+        return eliminados, eliminados + cambio[3]
+
+    def _cortar(self, buffer, multilinea, lineno):
+        """Parte el texto del buffer en trozos de unas LINEAS_POR_TROZO líneas,
+        cortando solo en inicios de línea LIMPIOS (ni en comentarios ni en cadenas)"""
+        texto = buffer.texto
+        # Inicios de línea y (offset, lineno) de cada corte
+        inicios_linea = array('I', [0])
+        cortes = [(0, lineno)]
+        spans = iter(multilinea)
+        span = next(spans, None)
+        lineas = 1
+        p = texto.find('\n') + 1
+        while p:
+            while span is not None and span[1] <= p:
+                span = next(spans, None)
+            if span is None or span[0] >= p:
+                lineno += 1
+                if lineas >= LINEAS_POR_TROZO and p < len(texto):
+                    cortes.append((p, lineno))
+                    lineas = 0
+            if p == len(texto):
+                break
+            inicios_linea.append(p)
+            lineas += 1
+            p = texto.find('\n', p) + 1
+        cortes.append((len(texto), lineno))
+
+        trozos = []
+        for (inicio, lineno_inicio), (fin, lineno_fin) in zip(cortes, cortes[1:]):
+            if inicio == fin:
+                continue
+            t0 = bisect_left(buffer.inicios, inicio)
+            t1 = bisect_left(buffer.inicios, fin)
+            l0 = bisect_left(inicios_linea, inicio)
+            l1 = bisect_left(inicios_linea, fin)
+            lineas_trozo = array('I', [x - inicio for x in inicios_linea[l0:l1]])
+            trozos.append(self._trozo(buffer, inicio, fin, t0, t1, lineas_trozo, lineno_inicio, lineno_fin))
+        return trozos
+
+    def _trozo(self, buffer, inicio, fin, t0, t1, lineas, lineno_inicio, lineno_fin):
+        trozo = _Trozo()
+        trozo.texto = buffer.texto[inicio:fin]
+        trozo.lineas = lineas
+        trozo.saltos = lineno_fin - lineno_inicio
+        trozo.tipos = buffer.tipos[t0:t1]
+        trozo.valores = buffer.valores[t0:t1]
+        trozo.inicios = array('I', [x - inicio for x in buffer.inicios[t0:t1]])
+        trozo.finales = array('I', [x - inicio for x in buffer.finales[t0:t1]])
+        trozo.linenos = array('I', [x - lineno_inicio for x in buffer.lineas[t0:t1]])
+        trozo.pendiente = bool(_pendientes(trozo, buffer.valores_internados))
+        trozo.comillas = '"' in trozo.texto
+        trozo.cierres = '*/' in trozo.texto
+        return trozo
+
+# ============================================================
+# LEXER POR FLUJO (ARCHIVOS GRANDES Y MMAP)
+# ============================================================
+# Caracteres leídos por bloque
+TAM_BLOQUE = 1 << 16
+
+def _leer_bloques(fuente, tam_bloque=TAM_BLOQUE):
+    """Genera bloques de texto de una ruta, un archivo (texto o binario) o un mmap.
+
+    Los bytes se decodifican como UTF-8 de forma incremental y los saltos de
+    línea CRLF se traducen a LF igual que al abrir el archivo en modo texto"""
+    if isinstance(fuente, (str, os.PathLike)):
+        with open(fuente, 'r', encoding='utf-8') as archivo:
+            yield from _leer_bloques(archivo, tam_bloque)
+        return
+
+    if isinstance(fuente, mmap.mmap):
+        # Por rebanadas, sin mover la posición del mmap
+        crudos = (fuente[i:i + tam_bloque] for i in range(0, len(fuente), tam_bloque))
+    else:
+        crudos = iter(lambda: fuente.read(tam_bloque) or None, None)
+
+    decodificador = None
+    for bloque in crudos:
+        if isinstance(bloque, str):
+            yield bloque
+            continue
+        if decodificador is None:
+            decodificador = io.IncrementalNewlineDecoder(
+                codecs.getincrementaldecoder('utf-8')(), translate=True)
+        yield decodificador.decode(bloque)
+    if decodificador is not None:
+        yield decodificador.decode(b'', final=True)
+
+def escanear_flujo(fuente, lineno=1, tam_bloque=TAM_BLOQUE):
+    """Generador de tuplas (tipo, valor, lineno, lexpos, fin) leyendo la fuente por bloques.
+
+    Produce lo mismo que MasterLexer().escanear(texto_completo). Solo se
+    retiene el texto que aún no forma un token seguro: el último token del
+    bloque (podría continuar en el siguiente) o una cadena o comentario de
+    bloque cuyo cierre todavía no se leyó"""
+    lexer = MasterLexer()
+    pendiente = ''   # Texto leído que aún no se tokenizó
+    base = 0         # Offset global de pendiente[0]
+    cierre = None    # Cierre que falta de una cadena o comentario abierto
+    visto = 0        # Hasta dónde ya se buscó ese cierre en pendiente
+
+    for bloque in _leer_bloques(fuente, tam_bloque):
+        pendiente += bloque
+        if cierre is not None:
+            if pendiente.find(cierre, visto) == -1:
+                visto = max(0, len(pendiente) - len(cierre) + 1)
+                continue
+            cierre = None
+
+        for tipo, valor, linea, inicio, fin in lexer.escanear(pendiente, lineno, 0, None, len(pendiente)):
+            if tipo == 'ERROR' and valor == '"':
+                cierre = '"'
+            elif tipo == 'DIVIDE' and pendiente.startswith('*', fin):
+                cierre = '*/'
+            if cierre is not None:
+                # Comilla o /* sin cerrar: se re-tokeniza cuando llegue el cierre
+                corte = inicio
+                lineno = linea
+                visto = max(0, len(pendiente) - len(cierre) + 1) - corte
+                break
+            yield tipo, valor, linea, base + inicio, base + fin
+        else:
+            corte = lexer.lexpos
+            lineno = lexer.lineno
+        base += corte
+        pendiente = pendiente[corte:]
+
+    # Fin de la fuente: lo pendiente se tokeniza como texto final
+    for tipo, valor, linea, inicio, fin in lexer.escanear(pendiente, lineno):
+        yield tipo, valor, linea, base + inicio, base + fin
+
+def tokenize_stream(fuente, lineno=1, tam_bloque=TAM_BLOQUE):
+    """Generador de LexToken de una ruta, archivo o mmap sin cargarlo completo en memoria"""
+    return _a_lextokens(escanear_flujo(fuente, lineno, tam_bloque))
+
+# ============================================================
+# BENCHMARK DE RENDIMIENTO (PLY vs REGEX MAESTRA)
+# ============================================================
+def _programa_sintetico(repeticiones):
+    """Genera un programa grande con todas las clases de token"""
+    bloque = (
+        "    int a{i}, b{i};\n"
+        "    float r{i};\n"
+        "    /* comentario\n       de bloque {i} */\n"
+        "    a{i} = {i} * 2 + (b{i} - 3) % 7;\n"
+        "    r{i} = 3.14 * a{i}; // comentario de línea\n"
+        "    if (a{i} >= 10 && b{i} != 0 || !true) {{ cout << \"texto {i}\"; }}\n"
+        "    while (a{i} < 100) a{i} = a{i} + 1;\n"
+        "    cin >> b{i};\n"
+    )
+    partes = ["main {\n"]
+    for i in range(repeticiones):
+        partes.append(bloque.format(i=i))
+    partes.append("    32. @ 3.4.5\n}\n")
+    return ''.join(partes)
+
+def _tokens_ply(texto):
+    lexer_ply = lexer.clone()
+    lexer_ply.lineno = 1
+    lexer_ply.input(texto)
+    resultado = []
     while True:
-        tok = lexer.token()
+        tok = lexer_ply.token()
         if not tok:
             break
-        tokens.append(tok)
-        # Escribir cada token en el archivo
-        temp_file.write(f"{tok.type:<10} {tok.value:<10} linea {tok.lineno} pos {tok.lexpos}\n")
-    
-    temp_file.close()
-    print(f"Tokens guardados en archivo temporal: {temp_file.name}")
-    
-    return tokens
+        resultado.append(tok)
+    return resultado
+
+def _memoria_asignada(funcion, texto):
+    """Bytes que siguen asignados tras construir los tokens (vía tracemalloc)"""
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        resultado = funcion(texto)
+        actual, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return actual, len(resultado)
+
+def benchmark_lexico(texto=None, repeticiones=3):
+    """Mide tokens/seg y MB/seg del lexer PLY y del motor de regex maestra"""
+    if texto is None:
+        texto = _programa_sintetico(20000)
+    megabytes = len(texto.encode('utf-8')) / (1024 * 1024)
+
+    motores = {
+        'ply': _tokens_ply,
+        'maestra': tokenize,
+        'tuplas': lambda texto: list(MasterLexer().escanear(texto)),
+        'buffer': TokenBuffer.desde_texto,
+    }
+    resultados = {}
+    salidas = {}
+    for nombre, motor in motores.items():
+        mejor = None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            toks = motor(texto)
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+        salidas[nombre] = [t[:4] if isinstance(t, tuple) else (t.type, t.value, t.lineno, t.lexpos) for t in toks]
+        resultados[nombre] = {
+            'tokens': len(toks),
+            'segundos': mejor,
+            'tokens_por_seg': len(toks) / mejor if mejor else 0.0,
+            'mb_por_seg': megabytes / mejor if mejor else 0.0,
+        }
+
+    resultados['equivalentes'] = salidas['ply'] == salidas['maestra'] == salidas['tuplas'] == salidas['buffer']
+    resultados['aceleracion'] = resultados['ply']['segundos'] / resultados['maestra']['segundos']
+
+    print(f"Texto: {megabytes:.2f} MB")
+    for nombre in motores:
+        r = resultados[nombre]
+        print(f"{nombre:<8} {r['tokens']:>9} tokens  {r['segundos']:.3f} s  "
+              f"{r['tokens_por_seg']:>12,.0f} tokens/s  {r['mb_por_seg']:.2f} MB/s")
+    print(f"Aceleración: {resultados['aceleracion']:.2f}x  |  Salida idéntica: {resultados['equivalentes']}")
+
+    # Memoria por token: lista de LexToken contra TokenBuffer
+    for nombre, funcion in (('ply', _tokens_ply), ('buffer', TokenBuffer.desde_texto)):
+        total, cantidad = _memoria_asignada(funcion, texto)
+        resultados[nombre]['bytes_por_token'] = total / cantidad if cantidad else 0.0
+        print(f"Memoria {nombre:<8} {resultados[nombre]['bytes_por_token']:.1f} bytes/token")
+    return resultados
+
+def benchmark_incremental(lineas=(1000, 10000, 100000)):
+    """Mide la latencia por edición del lexer incremental según el tamaño del texto.
+
+    En cada tamaño escribe y borra una sentencia carácter por carácter al
+    principio, en el medio y al final del programa, y compara los tokens con
+    los de tokenizar el texto completo"""
+    sentencia = "    x = a0 * 3 + (b0 - 1);\n"
+    resultados = {}
+    for cantidad in lineas:
+        texto = _programa_sintetico(max(1, cantidad // 9))
+        lexer_inc = IncrementalLexer(texto)
+        tiempos = []
+        for posicion in (texto.find("    cin"), texto.find("    cin", len(texto) // 2), texto.rfind("    cin")):
+            ediciones = [(posicion + i, posicion + i, c) for i, c in enumerate(sentencia)]
+            ediciones += [(posicion + i, posicion + i + 1, '') for i in reversed(range(len(sentencia)))]
+            for edicion in ediciones:
+                inicio = time.perf_counter()
+                lexer_inc.editar(*edicion)
+                tiempos.append(time.perf_counter() - inicio)
+        # Cada sentencia se escribió y se borró: el texto es el original
+        esperado = TokenBuffer.desde_texto(texto)
+        obtenido = lexer_inc.tokens
+        columnas = ('tipos', 'inicios', 'finales', 'lineas')
+        equivalentes = (obtenido.texto == texto
+                        and all(getattr(obtenido, c) == getattr(esperado, c) for c in columnas)
+                        and all(obtenido.valor(i) == esperado.valor(i) for i in range(len(esperado)))
+                        and obtenido.indice_lineas().inicios == esperado.indice_lineas().inicios)
+        tiempos.sort()
+        resultados[cantidad] = {
+            'lineas': texto.count('\n'),
+            'ediciones': len(tiempos),
+            'mediana_ms': tiempos[len(tiempos) // 2] * 1000,
+            'maximo_ms': tiempos[-1] * 1000,
+            'equivalentes': equivalentes,
+        }
+        r = resultados[cantidad]
+        print(f"{r['lineas']:>7} líneas  {r['ediciones']} ediciones  mediana {r['mediana_ms']:.3f} ms  "
+              f"máximo {r['maximo_ms']:.3f} ms  |  Tokens idénticos: {equivalentes}")
+    return resultados
+
+if __name__ == "__main__":
+    benchmark_lexico()
+    benchmark_incremental()
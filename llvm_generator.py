@@ -1,39 +1,63 @@
 # llvm_generator.py - VERSIÓN MEJORADA CON SOPORTE PARA VARIABLES
+import traza
+from cuadruplos import (ASIGNAR, OPERACION, SALIDA, ENTRADA, ETIQUETA, SALTO, SALTO_SI, SALTO_SI_NO,
+                        CADENA, TEMPORAL, VARIABLE, ProgramaCuadruplos)
+
+_traza = traza.canal('llvm')
+
+# Operadores de comparación -> predicado de icmp
+_COMPARACIONES = {'<': 'slt', '<=': 'sle', '>': 'sgt', '>=': 'sge', '==': 'eq', '!=': 'ne'}
+# Operadores lógicos -> instrucción sobre i1
+_LOGICOS = {'&&': 'and', '||': 'or'}
+
+# Clases de operando que viven en memoria (un alloca cada una)
+_EN_MEMORIA = (TEMPORAL, VARIABLE)
+
+def _cadena_llvm(texto):
+    """(contenido escapado para c"...", cantidad de bytes) de texto con su 0 final"""
+    datos = texto.encode('utf-8') + b'\0'
+    escapado = ''.join(chr(b) if 32 <= b < 127 and b not in (34, 92) else f'\\{b:02X}' for b in datos)
+    return escapado, len(datos)
+
 class LLVMGenerator:
     def __init__(self):
         self.llvm_code = []
         self.temp_counter = 0
         self.string_counter = 0
-        self.variables = set()
+        self.block_counter = 0
+        self.block_closed = False
+        self.variables = {}
+        self.strings = []
         
     def generate(self, quadruples, symbol_table):
-        """Genera código LLVM a partir de cuádruplos"""
+        """Genera código LLVM a partir de cuádruplos (ProgramaCuadruplos o lista de dicts)"""
+        quadruples = ProgramaCuadruplos.desde_dicts(quadruples)
         self.llvm_code = []
         self.temp_counter = 0
         self.string_counter = 0
-        self.variables = set()
+        self.block_counter = 0
+        self.block_closed = False
+        self.variables = {}
+        self.strings = []
         self.symbol_table = symbol_table
         
-        print(f"DEBUG LLVM: Generando código desde {len(quadruples)} cuádruplos")
+        if _traza.info_activo:
+            _traza.info(f"DEBUG LLVM: Generando código desde {len(quadruples)} cuádruplos")
         
-        # Recopilar todas las variables
-        for quad in quadruples:
-            if quad['type'] == 'assign':
-                self.variables.add(quad['target'])
-            elif quad['type'] == 'output' and quad.get('value_type') == 'variable':
-                self.variables.add(quad['value'])
-            elif quad['type'] == 'binary_op':
-                self.variables.add(quad['target'])
-                if isinstance(quad['left'], str) and not quad['left'].startswith('"'):
-                    self.variables.add(quad['left'])
-                if isinstance(quad['right'], str) and not quad['right'].startswith('"'):
-                    self.variables.add(quad['right'])
+        # Recopilar todas las variables y temporales, en el orden en que
+        # aparecen: cada uno tiene su alloca al comienzo de main
+        valores, clases = quadruples.operandos.valores, quadruples.operandos.clases
+        for columna in zip(quadruples.destinos, quadruples.izquierdos, quadruples.derechos):
+            for operando in columna:
+                if clases[operando] in _EN_MEMORIA:
+                    self.variables[valores[operando]] = None
         
         # Cabecera
         self._add_header()
         
-        # Declaraciones
+        # Declaraciones (las cadenas de las salidas se agregan al final, aquí)
         self._add_declarations()
+        fin_declaraciones = len(self.llvm_code)
         
         # Función main
         self._add_function_header()
@@ -45,9 +69,12 @@ class LLVMGenerator:
         self._generate_from_quadruples(quadruples)
         
         # Retorno
+        if self.block_closed:
+            self._generate_label(self._new_block_label())
         self._add_code("ret i32 0")
         self._add_code("}")
         
+        self.llvm_code[fin_declaraciones:fin_declaraciones] = self.strings
         return "\n".join(self.llvm_code)
     
     def _add_header(self):
@@ -60,13 +87,15 @@ class LLVMGenerator:
         """Agrega declaraciones de funciones y strings"""
         self.llvm_code.append('; Declaraciones de funciones externas')
         self.llvm_code.append('declare i32 @printf(i8*, ...)')
+        self.llvm_code.append('declare i32 @scanf(i8*, ...)')
         self.llvm_code.append('')
         
         # Strings de formato
         self.llvm_code.append('; Strings de formato')
         self.llvm_code.append('@.str_int = private unnamed_addr constant [4 x i8] c"%d\\0A\\00"')
         self.llvm_code.append('@.str_float = private unnamed_addr constant [4 x i8] c"%f\\0A\\00"')
-        self.llvm_code.append('@.str_string = private unnamed_addr constant [4 x i8] c"%s\\00"')
+        self.llvm_code.append('@.str_string = private unnamed_addr constant [3 x i8] c"%s\\00"')
+        self.llvm_code.append('@.str_read = private unnamed_addr constant [3 x i8] c"%d\\00"')
         self.llvm_code.append('')
     
     def _add_function_header(self):
@@ -78,9 +107,8 @@ class LLVMGenerator:
         if self.variables:
             self.llvm_code.append('; Inicialización de variables')
             for var in self.variables:
-                if not var.startswith('t'):  # No inicializar temporales
-                    self._add_code(f"%{var} = alloca i32")
-                    self._add_code(f"store i32 0, i32* %{var}")
+                self._add_code(f"%{var} = alloca i32")
+                self._add_code(f"store i32 0, i32* %{var}")
             self.llvm_code.append('')
     
     def _add_code(self, code):
@@ -89,38 +117,92 @@ class LLVMGenerator:
     
     def _generate_from_quadruples(self, quadruples):
         """Genera código desde cuádruplos"""
-        for i, quad in enumerate(quadruples):
-            print(f"DEBUG LLVM: Procesando cuádruplo {i}: {quad}")
+        valores, clases = quadruples.operandos.valores, quadruples.operandos.clases
+        for i, (codigo, destino, operador, izquierdo, derecho) in enumerate(zip(
+                quadruples.codigos, quadruples.destinos, quadruples.operadores,
+                quadruples.izquierdos, quadruples.derechos)):
+            if _traza.debug_activo:
+                quad = quadruples[i]
+                _traza.debug(f"DEBUG LLVM: Procesando cuádruplo {i}: {quad}", indice=i, cuadruplo=quad)
             
-            if quad['type'] == 'assign':
-                self._generate_assignment(quad)
-            elif quad['type'] == 'binary_op':
-                self._generate_binary_operation(quad)
-            elif quad['type'] == 'output':
-                self._generate_output(quad)
+            if codigo == ETIQUETA:
+                self._generate_label(valores[destino])
+                continue
+            if self.block_closed:
+                # Código después de un GOTO: LLVM lo necesita dentro de un bloque
+                self._generate_label(self._new_block_label())
+            
+            if codigo == ASIGNAR:
+                source_type = 'variable' if clases[izquierdo] in _EN_MEMORIA else 'direct'
+                self._generate_assignment(valores[destino], valores[izquierdo], source_type)
+            elif codigo == OPERACION:
+                self._generate_binary_operation(valores[destino], valores[operador],
+                                                valores[izquierdo], valores[derecho])
+            elif codigo == SALIDA:
+                # Las expresiones constantes llegan ya calculadas
+                if clases[izquierdo] == CADENA:
+                    value_type = 'string'
+                elif clases[izquierdo] in _EN_MEMORIA:
+                    value_type = 'variable'
+                else:
+                    value_type = 'number'
+                self._generate_output(valores[izquierdo], value_type)
+            elif codigo == ENTRADA:
+                self._generate_input(valores[destino])
+            elif codigo == SALTO:
+                self._generate_jump(valores[destino])
+            elif codigo in (SALTO_SI, SALTO_SI_NO):
+                self._generate_conditional_jump(valores[izquierdo], valores[destino], codigo == SALTO_SI)
+    
+    def _block_name(self, label):
+        """Nombre LLVM del bloque de una etiqueta (no choca con las variables)"""
+        return f"bloque.{label}"
+    
+    def _new_block_label(self):
+        label = f"s{self.block_counter}"
+        self.block_counter += 1
+        return label
+    
+    def _generate_label(self, label):
+        """Empieza el bloque de label; si el anterior sigue abierto, salta a él"""
+        if not self.block_closed:
+            self._add_code(f"br label %{self._block_name(label)}")
+        self.llvm_code.append(f"{self._block_name(label)}:")
+        self.block_closed = False
     
-    def _generate_assignment(self, quad):
+    def _generate_jump(self, label):
+        """Genera código para GOTO"""
+        self._add_code(f"br label %{self._block_name(label)}")
+        self.block_closed = True
+    
+    def _generate_conditional_jump(self, condition, label, jump_if):
+        """Genera código para IF/IFFALSE condición GOTO label: si no salta,
+        sigue en un bloque nuevo"""
+        value = self._load_operand(condition)
+        test = self._new_temp()
+        self._add_code(f"{test} = icmp ne i32 {value}, 0")
+        target = f"%{self._block_name(label)}"
+        following = self._new_block_label()
+        next_block = f"%{self._block_name(following)}"
+        if jump_if:
+            self._add_code(f"br i1 {test}, label {target}, label {next_block}")
+        else:
+            self._add_code(f"br i1 {test}, label {next_block}, label {target}")
+        self.llvm_code.append(f"{self._block_name(following)}:")
+    
+    def _generate_assignment(self, target, source, source_type='direct'):
         """Genera código para asignación"""
-        target = quad['target']
-        source = quad['source']
-        source_type = quad.get('source_type', 'direct')
-        
         if source_type == 'direct':
             # Asignación directa: a = 5
-            self._add_code(f"store i32 {source}, i32* %{target}")
+            self._add_code(f"store i32 {self._load_operand(source)}, i32* %{target}")
         else:
             # Asignación desde variable: a = b
             temp = self._new_temp()
             self._add_code(f"{temp} = load i32, i32* %{source}")
             self._add_code(f"store i32 {temp}, i32* %{target}")
     
-    def _generate_binary_operation(self, quad):
+    def _generate_binary_operation(self, target, operator, left, right):
         """Genera código para operación binaria"""
-        target = quad['target']
-        left = quad['left']
-        right = quad['right']
-        operator = quad['operator']
-        
         # Cargar operandos
         left_val = self._load_operand(left)
         right_val = self._load_operand(right)
@@ -135,25 +217,33 @@ class LLVMGenerator:
             self._add_code(f"{temp} = mul i32 {left_val}, {right_val}")
         elif operator == '/':
             self._add_code(f"{temp} = sdiv i32 {left_val}, {right_val}")
+        elif operator == '%':
+            self._add_code(f"{temp} = srem i32 {left_val}, {right_val}")
+        elif operator in _COMPARACIONES:
+            # Las comparaciones dan 0 o 1 como i32
+            comparison = self._new_temp()
+            self._add_code(f"{comparison} = icmp {_COMPARACIONES[operator]} i32 {left_val}, {right_val}")
+            self._add_code(f"{temp} = zext i1 {comparison} to i32")
+        elif operator in _LOGICOS:
+            left_bool, right_bool, result = self._new_temp(), self._new_temp(), self._new_temp()
+            self._add_code(f"{left_bool} = icmp ne i32 {left_val}, 0")
+            self._add_code(f"{right_bool} = icmp ne i32 {right_val}, 0")
+            self._add_code(f"{result} = {_LOGICOS[operator]} i1 {left_bool}, {right_bool}")
+            self._add_code(f"{temp} = zext i1 {result} to i32")
         
         # Almacenar resultado
         self._add_code(f"store i32 {temp}, i32* %{target}")
     
-    def _generate_output(self, quad):
+    def _generate_output(self, value, value_type='string'):
         """Genera código para output"""
-        value = quad['value']
-        value_type = quad.get('value_type', 'string')
-        
         if value_type == 'string':
-            # Output de string literal
-            string_content = value.strip('"')
+            # Output de string literal: su constante va con las declaraciones
+            string_content, size = _cadena_llvm(value[1:-1])
             str_name = f"@.str_{self.string_counter}"
             self.string_counter += 1
+            self.strings.append(f'{str_name} = private unnamed_addr constant [{size} x i8] c"{string_content}"')
             
-            # Agregar string constante
-            self.llvm_code.insert(-2, f'{str_name} = private unnamed_addr constant [{len(string_content) + 1} x i8] c"{string_content}\\00"')
-            
-            self._add_code(f'call i32 (i8*, ...) @printf(i8* getelementptr inbounds ([4 x i8], [4 x i8]* @.str_string, i32 0, i32 0), i8* getelementptr inbounds ([{len(string_content) + 1} x i8], [{len(string_content) + 1} x i8]* {str_name}, i32 0, i32 0))')
+            self._add_code(f'call i32 (i8*, ...) @printf(i8* getelementptr inbounds ([3 x i8], [3 x i8]* @.str_string, i32 0, i32 0), i8* getelementptr inbounds ([{size} x i8], [{size} x i8]* {str_name}, i32 0, i32 0))')
         
         elif value_type in ['variable', 'number']:
             # Output de variable o número
@@ -164,14 +254,21 @@ class LLVMGenerator:
                 value_to_print = temp
             else:
                 # Valor directo
-                value_to_print = value
+                value_to_print = self._load_operand(value)
             
             self._add_code(f'call i32 (i8*, ...) @printf(i8* getelementptr inbounds ([4 x i8], [4 x i8]* @.str_int, i32 0, i32 0), i32 {value_to_print})')
     
+    def _generate_input(self, target):
+        """Genera código para INPUT: lee un entero con scanf. Si no hay qué
+        leer queda 0: cin siempre define la variable (el optimizador cuenta con eso)"""
+        self._add_code(f"store i32 0, i32* %{target}")
+        self._add_code(f'call i32 (i8*, ...) @scanf(i8* getelementptr inbounds ([3 x i8], [3 x i8]* @.str_read, i32 0, i32 0), i32* %{target})')
+    
     def _load_operand(self, operand):
-        """Carga un operando (constante o variable)"""
-        if isinstance(operand, int):
-            return str(operand)
+        """Carga un operando (constante o variable). El código solo maneja
+        i32: una constante real se trunca"""
+        if isinstance(operand, (int, float)):
+            return str(int(operand))
         elif operand.isdigit():
             return operand
         else:
@@ -182,7 +279,7 @@ class LLVMGenerator:
     
     def _new_temp(self):
         """Genera un nuevo temporal"""
-        temp = f"%t{self.temp_counter}"
+        temp = f"%.t{self.temp_counter}"
         self.temp_counter += 1
         return temp
 
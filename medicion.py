@@ -0,0 +1,139 @@
+# medicion.py - Tiempo, CPU, memoria y cantidad de elementos por etapa de compilación
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# PYTHONCOMPILER_TRACEMALLOC=1 mide también la memoria asignada en cada etapa
+# (tracemalloc hace más lento todo el proceso mientras está activo)
+MEMORIA_ACTIVA = os.environ.get('PYTHONCOMPILER_TRACEMALLOC', '0') == '1'
+
+def configurar(memoria=None):
+    """Activa o desactiva la medición de memoria con tracemalloc"""
+    global MEMORIA_ACTIVA
+    if memoria is not None:
+        MEMORIA_ACTIVA = memoria
+        if memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not memoria and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+def _cpu():
+    """CPU del proceso más la de los procesos hijos ya terminados (opt, llc, clang)"""
+    hijos = os.times()
+    return time.process_time() + hijos.children_user + hijos.children_system
+
+class Etapa:
+    """Medición de una etapa. elementos guarda conteos (tokens, nodos, símbolos,
+    cuádruplos, líneas); un conteo puede ser una función sin argumentos que
+    se evalúa solo al exportar"""
+    __slots__ = ('nombre', 'profundidad', 'inicio', 'pared', 'cpu', 'bytes', 'elementos')
+
+    def __init__(self, nombre, profundidad, inicio, elementos):
+        self.nombre = nombre
+        self.profundidad = profundidad
+        self.inicio = inicio
+        self.pared = None
+        self.cpu = None
+        self.bytes = None
+        self.elementos = elementos
+
+    def contar(self, **elementos):
+        self.elementos.update(elementos)
+
+    def como_dict(self, origen):
+        return {
+            'etapa': self.nombre,
+            'profundidad': self.profundidad,
+            'inicio_ms': (self.inicio - origen) * 1000,
+            'pared_ms': self.pared * 1000 if self.pared is not None else None,
+            'cpu_ms': self.cpu * 1000 if self.cpu is not None else None,
+            'bytes': self.bytes,
+            'elementos': {nombre: valor() if callable(valor) else valor
+                          for nombre, valor in self.elementos.items()},
+        }
+
+class Medicion:
+    """Etapas medidas de una compilación, en orden de inicio.
+
+        with medicion.etapa('semantico') as etapa:
+            ...
+            etapa.contar(simbolos=len(tabla))
+
+    Las etapas pueden anidarse (p. ej. lexico dentro de sintactico cuando el
+    análisis sintáctico pide los tokens)"""
+
+    def __init__(self):
+        self.origen = time.perf_counter()
+        self.etapas = []
+        self._profundidad = 0
+
+    @contextmanager
+    def etapa(self, nombre, **elementos):
+        registro = Etapa(nombre, self._profundidad, time.perf_counter(), elementos)
+        self.etapas.append(registro)
+        self._profundidad += 1
+        memoria = MEMORIA_ACTIVA and tracemalloc.is_tracing()
+        bytes_antes = tracemalloc.get_traced_memory()[0] if memoria else 0
+        cpu_antes = _cpu()
+        try:
+            yield registro
+        finally:
+            registro.pared = time.perf_counter() - registro.inicio
+            registro.cpu = _cpu() - cpu_antes
+            if memoria:
+                registro.bytes = tracemalloc.get_traced_memory()[0] - bytes_antes
+            self._profundidad -= 1
+
+    def como_dict(self):
+        etapas = [etapa.como_dict(self.origen) for etapa in self.etapas]
+        return {
+            'etapas': etapas,
+            'total_ms': sum(e['pared_ms'] or 0 for e in etapas if e['profundidad'] == 0),
+        }
+
+    def a_json(self, ruta=None):
+        """Mediciones como texto JSON (y escritas en ruta si se indica)"""
+        texto = json.dumps(self.como_dict(), ensure_ascii=False, indent=2, default=str)
+        if ruta:
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write(texto)
+        return texto
+
+    def a_chrome(self, ruta=None):
+        """Eventos en formato Chrome trace (chrome://tracing, Perfetto)"""
+        pid, tid = os.getpid(), threading.get_ident()
+        eventos = []
+        for etapa in self.como_dict()['etapas']:
+            if etapa['pared_ms'] is None:
+                continue
+            argumentos = dict(etapa['elementos'], cpu_ms=etapa['cpu_ms'])
+            if etapa['bytes'] is not None:
+                argumentos['bytes'] = etapa['bytes']
+            eventos.append({'name': etapa['etapa'], 'cat': 'compilador', 'ph': 'X',
+                            'ts': etapa['inicio_ms'] * 1000, 'dur': etapa['pared_ms'] * 1000,
+                            'pid': pid, 'tid': tid, 'args': argumentos})
+        traza = {'traceEvents': eventos, 'displayTimeUnit': 'ms'}
+        if ruta:
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                json.dump(traza, archivo, ensure_ascii=False, default=str)
+        return traza
+
+    def resumen(self):
+        """Tabla de texto con una línea por etapa"""
+        lineas = [f"{'ETAPA':<22} {'PARED ms':>10} {'CPU ms':>10} {'MEMORIA':>11}  ELEMENTOS"]
+        datos = self.como_dict()
+        for etapa in datos['etapas']:
+            nombre = "  " * etapa['profundidad'] + etapa['etapa']
+            pared = f"{etapa['pared_ms']:.1f}" if etapa['pared_ms'] is not None else "-"
+            cpu = f"{etapa['cpu_ms']:.1f}" if etapa['cpu_ms'] is not None else "-"
+            memoria = f"{etapa['bytes'] / 1024:.1f} KB" if etapa['bytes'] is not None else "-"
+            elementos = ", ".join(f"{nombre_e}: {valor}" for nombre_e, valor in etapa['elementos'].items())
+            lineas.append(f"{nombre:<22} {pared:>10} {cpu:>10} {memoria:>11}  {elementos}")
+        lineas.append(f"{'TOTAL':<22} {datos['total_ms']:>10.1f}")
+        return "\n".join(lineas)
+
+if MEMORIA_ACTIVA:
+    configurar(memoria=True)
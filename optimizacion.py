@@ -1,174 +1,492 @@
 # optimizacion.py - OPTIMIZADOR MEJORADO
+from collections import defaultdict
+from itertools import compress
+
+import traza
+from cuadruplos import (ASIGNAR, OPERACION, SALIDA, ETIQUETA, SALTO, SALTO_SI, SALTO_SI_NO, CONSTANTE,
+                        TEMPORAL, ProgramaCuadruplos)
+from ssa import FormaSSA, sin_recolector
+
+_traza = traza.canal('optimizacion')
+
+# Valores de la propagación de constantes además de los ids de constantes:
+# todavía sin calcular y no constante
+_DESCONOCIDO = -1
+_NO_CONSTANTE = -2
+
+# Operadores en los que el orden de los operandos no cambia el resultado
+_CONMUTATIVOS = frozenset(('+', '*', '==', '!=', '&&', '||'))
+
+# ============================================================
+# PLEGADO Y SIMPLIFICACIÓN
+# ============================================================
+# Las operaciones se evalúan como en el código LLVM: enteros de 32 bits en
+# complemento a dos, división y resto truncados hacia cero (sdiv, srem) y
+# comparaciones y operadores lógicos que dan 0 o 1. Las constantes reales se
+# truncan a entero antes, como en _load_operand del generador LLVM. Lo que
+# allí no está definido (dividir por cero, el mínimo entre -1) no se pliega.
+# El - y el ! unarios llegan como 0 - x y x == 0
+_MINIMO = -2 ** 31
+
+def _entero(valor):
+    """valor reducido a 32 bits con complemento a dos"""
+    return (valor - _MINIMO) % 2 ** 32 + _MINIMO
+
+def _dividir(a, b):
+    if b == 0:
+        return None
+    if a == _MINIMO and b == -1:
+        return None
+    cociente = abs(a) // abs(b)
+    return cociente if (a < 0) == (b < 0) else -cociente
+
+def _resto(a, b):
+    cociente = _dividir(a, b)
+    return None if cociente is None else a - b * cociente
+
+# Operador -> función de los dos valores constantes (None: no se pliega)
+_PLEGADO = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': _dividir,
+    '%': _resto,
+    '<': lambda a, b: int(a < b),
+    '<=': lambda a, b: int(a <= b),
+    '>': lambda a, b: int(a > b),
+    '>=': lambda a, b: int(a >= b),
+    '==': lambda a, b: int(a == b),
+    '!=': lambda a, b: int(a != b),
+    '&&': lambda a, b: int(bool(a) and bool(b)),
+    '||': lambda a, b: int(bool(a) or bool(b)),
+}
+
+# Operador con el mismo operando a los dos lados -> resultado
+_MISMO_OPERANDO = {'-': 0, '==': 1, '<=': 1, '>=': 1, '!=': 0, '<': 0, '>': 0}
+
+# (operador, lado de la constante, constante) -> resultado, con un solo
+# operando constante, ya truncado a entero (0 izquierdo, 1 derecho). En && y
+# || cualquier constante distinta de cero cuenta como 1
+_IDENTIDADES = {('-', 1, 0): ('copia', 0), ('/', 1, 1): ('copia', 0)}
+for _lado in (0, 1):
+    _IDENTIDADES.update({
+        ('+', _lado, 0): ('copia', 1 - _lado),
+        ('*', _lado, 1): ('copia', 1 - _lado),
+        ('*', _lado, 0): ('constante', 0),
+        ('&&', _lado, 0): ('constante', 0),
+        ('&&', _lado, 1): ('distinto_de_cero', 1 - _lado),
+        ('||', _lado, 0): ('distinto_de_cero', 1 - _lado),
+        ('||', _lado, 1): ('constante', 1),
+    })
+del _lado
+
+def _simplificar(operador, a, b, mismo=False):
+    """Resultado de a operador b, donde a y b son los valores de los operandos
+    constantes (None si no lo son) y mismo indica que los dos operandos son
+    la misma variable: ('constante', valor), ('copia', lado) si es el operando
+    de ese lado, ('distinto_de_cero', lado) si es ese operando != 0, o None
+    si no se puede plegar ni simplificar"""
+    a = None if a is None else int(a)
+    b = None if b is None else int(b)
+    if a is not None and b is not None:
+        evaluar = _PLEGADO.get(operador)
+        valor = evaluar(a, b) if evaluar is not None else None
+        if valor is None:
+            return None
+        return ('constante', _entero(valor))
+    if mismo:
+        valor = _MISMO_OPERANDO.get(operador)
+        return None if valor is None else ('constante', valor)
+    lado, constante = (0, a) if a is not None else (1, b)
+    if constante is None:
+        return None
+    if operador in ('&&', '||') and constante != 0:
+        constante = 1
+    return _IDENTIDADES.get((operador, lado, constante))
 
 class Optimizer:
     def __init__(self):
         self.optimizations_applied = []
     
     def optimize(self, intermediate_code):
-        """Aplica optimizaciones al código intermedio"""
+        """Aplica optimizaciones al código intermedio (ProgramaCuadruplos o
+        lista de dicts) y devuelve un ProgramaCuadruplos nuevo"""
         if not intermediate_code:
             return intermediate_code
             
-        print("INICIANDO OPTIMIZACIÓN")
-        print(f"Cuádruplos originales: {len(intermediate_code)}")
+        if _traza.info_activo:
+            _traza.info("INICIANDO OPTIMIZACIÓN")
+            _traza.info(f"Cuádruplos originales: {len(intermediate_code)}")
         
-        optimized_code = intermediate_code.copy()
+        optimized_code = ProgramaCuadruplos.desde_dicts(intermediate_code).copia()
         
         # Mostrar código original
-        print("CÓDIGO ORIGINAL:")
-        for i, quad in enumerate(intermediate_code):
-            print(f"   {i}. {quad}")
+        if _traza.debug_activo:
+            _traza.debug("CÓDIGO ORIGINAL:")
+            for i, quad in enumerate(intermediate_code):
+                _traza.debug(f"   {i}. {quad}")
         
-        # Aplicar optimizaciones
-        optimized_code = self._eliminate_unused_variables(optimized_code)
-        optimized_code = self._constant_folding(optimized_code)
-        optimized_code = self._constant_propagation(optimized_code)
+        # Aplicar optimizaciones: las de flujo de datos comparten una forma SSA
+        with sin_recolector():
+            ssa = FormaSSA(optimized_code)
+            self._constant_propagation(ssa)
+            self._constant_folding(ssa)
+            self._value_numbering(ssa)
+            self._dead_code_elimination(ssa)
+            optimized_code = self._constant_branches(ssa.destruir())
         
-        print(f"Cuádruplos optimizados: {len(optimized_code)}")
-        print("OPTIMIZACIÓN COMPLETADA")
+        if _traza.info_activo:
+            _traza.info(f"Cuádruplos optimizados: {len(optimized_code)}")
+            _traza.info("OPTIMIZACIÓN COMPLETADA")
         return optimized_code
     
-    def _eliminate_unused_variables(self, code):
-        """Elimina variables que nunca se usan"""
-        if not code:
-            return code
+    def _constant_folding(self, ssa):
+        """Pliega y simplifica las operaciones con _simplificar: las que dan una
+        constante o uno de sus operandos pasan a ser asignaciones. Si la copia
+        que queda es de un nombre no renombrado a otro, sus usos pasan a leer
+        la fuente (ninguno de los dos cambia de valor) y la copia queda para la
+        eliminación de código muerto"""
+        programa = ssa.programa
+        operandos = programa.operandos
+        valores, clases = operandos.valores, operandos.clases
+        codigos, operadores = programa.codigos, programa.operadores
+        izquierdos, derechos = programa.izquierdos, programa.derechos
+        original = ssa.original
+        
+        def constante(operando):
+            return valores[operando] if clases[operando] == CONSTANTE else None
+        
+        def nombre(operando):
+            return valores[original.get(operando, operando)]
         
-        print("Buscando variables no utilizadas...")
-        
-        # PASO 1: Encontrar todas las variables USADAS
-        used_vars = set()
-        for instruction in code:
-            if instruction['type'] == 'binary_op':
-                left = instruction.get('left')
-                right = instruction.get('right')
-                if isinstance(left, str) and not left.startswith('t'):
-                    used_vars.add(left)
-                if isinstance(right, str) and not right.startswith('t'):
-                    used_vars.add(right)
-            elif instruction['type'] == 'output':
-                value = instruction.get('value')
-                if isinstance(value, str) and not value.startswith('"'):
-                    used_vars.add(value)
-            elif instruction['type'] == 'input':
-                # Las variables de input se consideran usadas
-                target = instruction.get('target')
-                if isinstance(target, str):
-                    used_vars.add(target)
-        
-        print(f"   Variables usadas: {used_vars}")
-        
-        # PASO 2: Encontrar todas las variables DECLARADAS
-        declared_vars = set()
-        for instruction in code:
-            if instruction['type'] == 'assign':
-                target = instruction.get('target')
-                if isinstance(target, str):
-                    declared_vars.add(target)
-        
-        print(f"   Variables declaradas: {declared_vars}")
-        
-        # PASO 3: Encontrar variables NO UTILIZADAS
-        unused_vars = declared_vars - used_vars
-        print(f"   Variables no utilizadas: {unused_vars}")
-        
-        # PASO 4: Eliminar asignaciones a variables no utilizadas
-        if not unused_vars:
-            print("   No hay variables no utilizadas")
+        reemplazos = {}
+        for i in programa.filas(OPERACION):
+            izquierdo, derecho = izquierdos[i], derechos[i]
+            operador = valores[operadores[i]]
+            resultado = _simplificar(operador, constante(izquierdo), constante(derecho), izquierdo == derecho)
+            if resultado is None:
+                continue
+            tipo, dato = resultado
+            expresion = f"{nombre(izquierdo)} {operador} {nombre(derecho)}"
+            if tipo == 'distinto_de_cero':
+                operadores[i] = operandos.id('!=')
+                izquierdos[i] = (izquierdo, derecho)[dato]
+                derechos[i] = operandos.id(0)
+                self.optimizations_applied.append(
+                    f"Simplificación algebraica: {expresion} = {nombre(izquierdos[i])} != 0")
+            else:
+                fuente = operandos.id(dato) if tipo == 'constante' else (izquierdo, derecho)[dato]
+                codigos[i] = ASIGNAR
+                operadores[i] = 0
+                izquierdos[i] = fuente
+                derechos[i] = 0
+                if tipo == 'constante':
+                    self.optimizations_applied.append(f"Constant folding: {expresion} = {dato}")
+                else:
+                    self.optimizations_applied.append(f"Simplificación algebraica: {expresion} = {nombre(fuente)}")
+                    destino = programa.destinos[i]
+                    if destino not in original and fuente not in original and clases[fuente] != CONSTANTE:
+                        reemplazos[destino] = reemplazos.get(fuente, fuente)
+            if _traza.debug_activo:
+                _traza.debug(f"   PLEGADO: {expresion} -> {programa.instruccion(i)}")
+        self._reemplazar_usos(programa, reemplazos)
+    
+    def _constant_branches(self, code):
+        """Resuelve los saltos condicionales cuya condición es constante: el que
+        siempre salta pasa a ser un GOTO y el que nunca salta se quita. Lo que
+        sigue a un GOTO hasta la próxima etiqueta no se alcanza y también se
+        quita"""
+        valores, clases = code.operandos.valores, code.operandos.clases
+        codigos = code.codigos
+        conservar = bytearray(b'\x01') * len(code)
+        resueltos = 0
+        for i in code.filas(SALTO_SI, SALTO_SI_NO):
+            condicion = code.izquierdos[i]
+            if clases[condicion] != CONSTANTE:
+                continue
+            # Una condición real se trunca como en el código LLVM
+            if (int(valores[condicion]) != 0) == (codigos[i] == SALTO_SI):
+                codigos[i] = SALTO
+                code.izquierdos[i] = 0
+            else:
+                conservar[i] = 0
+            resueltos += 1
+        if not resueltos:
             return code
         
-        optimized = []
-        removed_count = 0
+        inalcanzables = 0
+        for i in code.filas(SALTO):
+            siguiente = i + 1
+            while siguiente < len(codigos) and codigos[siguiente] != ETIQUETA and conservar[siguiente]:
+                conservar[siguiente] = 0
+                inalcanzables += 1
+                siguiente += 1
+        self.optimizations_applied.append(f"Saltos con condición constante: {resueltos} resueltos")
+        if inalcanzables:
+            self.optimizations_applied.append(f"Código inalcanzable: {inalcanzables} cuádruplos eliminados")
+        return code.filtrar(conservar)
+    
+    def _constant_propagation(self, ssa):
+        """Propaga valores constantes sobre la forma SSA: cada versión tiene una
+        sola definición, así que es constante si esa definición es una constante,
+        una copia de una constante, una φ cuyos argumentos valen todos la misma
+        constante o una operación que _simplificar pliega a una constante (los
+        ciclos se resuelven de forma optimista). Así un árbol de expresiones
+        constantes se calcula entero aunque pase por temporales"""
+        programa = ssa.programa
+        operandos = programa.operandos
+        valores, clases = operandos.valores, operandos.clases
+        izquierdos, derechos = programa.izquierdos, programa.derechos
         
-        for instruction in code:
-            if instruction['type'] == 'assign':
-                target = instruction.get('target')
-                if target in unused_vars:
-                    removed_count += 1
-                    self.optimizations_applied.append(f"Eliminada variable no usada: {target}")
-                    print(f"   ELIMINANDO: {target} = {instruction.get('source')}")
-                    continue
-            
-            optimized.append(instruction)
+        def nombre(operando):
+            return valores[ssa.original.get(operando, operando)]
         
-        if removed_count > 0:
-            self.optimizations_applied.append(f"Total eliminadas: {removed_count} variables")
-            print(f"Eliminadas {removed_count} variables no utilizadas")
+        # Versión -> id de su constante, _DESCONOCIDO o _NO_CONSTANTE (las que
+        # no están, definidas por entradas o sin definición, no son constantes)
+        valor = {}
+        # Copias, φ y operaciones como (destino, fuentes, fila de la operación
+        # o None), en el orden del programa, y qué nodos usan cada versión
+        nodos = []
+        usos = defaultdict(list)
+        codigos, destinos = programa.codigos, programa.destinos
+        relevantes = programa.mascara(ASIGNAR, OPERACION)
+        for bloque in ssa.grafo:
+            for fi in ssa.fis[bloque.indice]:
+                valor[fi.destino] = _DESCONOCIDO
+                for argumento in set(fi.argumentos):
+                    usos[argumento].append(len(nodos))
+                nodos.append((fi.destino, fi.argumentos, None))
+            for fila in compress(bloque.filas(), relevantes[bloque.inicio:bloque.fin]):
+                destino, izquierdo = destinos[fila], izquierdos[fila]
+                nodo = len(nodos)
+                if codigos[fila] == OPERACION:
+                    valor[destino] = _DESCONOCIDO
+                    derecho = derechos[fila]
+                    usos[izquierdo].append(nodo)
+                    if derecho != izquierdo:
+                        usos[derecho].append(nodo)
+                    nodos.append((destino, (izquierdo, derecho), fila))
+                elif clases[izquierdo] == CONSTANTE:
+                    valor[destino] = izquierdo
+                    self.optimizations_applied.append(f"Constante identificada: {nombre(destino)} = {valores[izquierdo]}")
+                    if _traza.debug_activo:
+                        _traza.debug(f"   CONSTANTE: {valores[destino]} = {valores[izquierdo]}")
+                else:
+                    valor[destino] = _DESCONOCIDO
+                    usos[izquierdo].append(nodo)
+                    nodos.append((destino, (izquierdo,), None))
         
-        return optimized
-    
-    def _constant_folding(self, code):
-        """Realiza operaciones con constantes"""
-        optimized = []
-        for instruction in code:
-            if instruction['type'] == 'binary_op':
-                left = instruction.get('left')
-                right = instruction.get('right')
-                operator = instruction.get('operator')
-                
-                if isinstance(left, (int, float)) and isinstance(right, (int, float)):
-                    result = None
-                    if operator == '+': result = left + right
-                    elif operator == '-': result = left - right
-                    elif operator == '*': result = left * right
-                    elif operator == '/': result = left / right if right != 0 else left
-                    
-                    if result is not None:
-                        optimized.append({
-                            'type': 'assign',
-                            'target': instruction['target'],
-                            'source': result
-                        })
-                        self.optimizations_applied.append(f"Constant folding: {left} {operator} {right} = {result}")
-                        print(f"   CONSTANT FOLDING: {left} {operator} {right} = {result}")
+        # Primero todos en orden (cada nodo suele ver ya resueltas sus fuentes);
+        # un cambio solo vuelve a encolar a los usuarios que ya salieron
+        valor_de = valor.get
+        pendientes = list(range(len(nodos) - 1, -1, -1))
+        en_lista = bytearray(b'\x01') * len(nodos)
+        while pendientes:
+            nodo = pendientes.pop()
+            en_lista[nodo] = 0
+            destino, fuentes, fila = nodos[nodo]
+            if fila is None:
+                nuevo = _DESCONOCIDO
+                for fuente in fuentes:
+                    actual = fuente if clases[fuente] == CONSTANTE else valor.get(fuente, _NO_CONSTANTE)
+                    if actual == _DESCONOCIDO or actual == nuevo:
                         continue
-            
-            optimized.append(instruction)
-        return optimized
+                    if nuevo != _DESCONOCIDO:
+                        nuevo = _NO_CONSTANTE
+                        break
+                    nuevo = actual
+            else:
+                izquierdo, derecho = fuentes
+                a = izquierdo if clases[izquierdo] == CONSTANTE else valor_de(izquierdo, _NO_CONSTANTE)
+                b = derecho if clases[derecho] == CONSTANTE else valor_de(derecho, _NO_CONSTANTE)
+                if a == _DESCONOCIDO or b == _DESCONOCIDO:
+                    continue
+                resultado = _simplificar(valores[programa.operadores[fila]], valores[a] if a > 0 else None,
+                                         valores[b] if b > 0 else None, izquierdo == derecho)
+                if resultado is None or resultado[0] == 'distinto_de_cero':
+                    nuevo = _NO_CONSTANTE
+                elif resultado[0] == 'constante':
+                    nuevo = operandos.id(resultado[1])
+                else:
+                    nuevo = (a, b)[resultado[1]]
+            if nuevo != valor[destino]:
+                valor[destino] = nuevo
+                for usuario in usos.get(destino, ()):
+                    if not en_lista[usuario]:
+                        en_lista[usuario] = 1
+                        pendientes.append(usuario)
+        
+        constantes = {version: constante for version, constante in valor.items() if constante > 0}
+        if not constantes:
+            return
+        
+        propagadas = self._reemplazar_usos(programa, constantes)
+        if propagadas:
+            self.optimizations_applied.append(f"Propagación de constantes: {propagadas} usos reemplazados")
     
-    def _constant_propagation(self, code):
-        """Propaga valores constantes"""
-        constant_map = {}
-        optimized = []
-        
-        for instruction in code:
-            # Identificar constantes
-            if (instruction['type'] == 'assign' and 
-                isinstance(instruction.get('source'), (int, float))):
-                constant_map[instruction['target']] = instruction['source']
-                self.optimizations_applied.append(f"Constante identificada: {instruction['target']} = {instruction['source']}")
-                print(f"   CONSTANTE: {instruction['target']} = {instruction['source']}")
-            
-            # Crear copia para modificar
-            new_instruction = instruction.copy()
+    def _value_numbering(self, ssa):
+        """Numeración de valores sobre el árbol de dominadores: cada operación
+        se identifica por (operador, números de valor de sus operandos) y, si
+        un bloque dominante ya calculó la misma, se reemplaza por una copia de
+        ese resultado. Las copias y las φ de argumentos iguales heredan el
+        número de valor de su fuente. En SSA cada versión tiene una sola
+        definición, así que una redefinición es otra versión con otro número.
+        Si el resultado repetido tampoco se renombró, sus usos pasan a leer el
+        original y la copia queda para la eliminación de código muerto.
+
+        Solo se reutilizan resultados guardados en nombres que no se
+        renombraron: al destruir la SSA las versiones vuelven a su nombre, que
+        puede haberse sobrescrito antes de la copia"""
+        programa = ssa.programa
+        if not len(programa):
+            return
+        valores = programa.operandos.valores
+        codigos, destinos, operadores = programa.codigos, programa.destinos, programa.operadores
+        izquierdos, derechos = programa.izquierdos, programa.derechos
+        original = ssa.original
+        relevantes = programa.mascara(ASIGNAR, OPERACION)
+        conmutativos = {i for i in set(programa.ids('operadores', OPERACION)) if valores[i] in _CONMUTATIVOS}
+        
+        # Nombre -> número de valor (sin entrada: el propio nombre). Las
+        # expresiones disponibles van a un solo diccionario; en la pila, tras
+        # los hijos de un bloque en el árbol, queda la lista de las claves que
+        # agregó, que se quitan al volver
+        numero = {}
+        valor_de = numero.get
+        disponibles = {}
+        reemplazos = {}
+        eliminadas = 0
+        pila = ssa.dominadores.orden[:1]
+        while pila:
+            indice = pila.pop()
+            if isinstance(indice, list):
+                for clave in indice:
+                    del disponibles[clave]
+                continue
             
-            # Reemplazar variables con constantes
-            if instruction['type'] == 'binary_op':
-                if instruction.get('left') in constant_map:
-                    new_instruction['left'] = constant_map[instruction['left']]
-                    print(f"   PROPAGACIÓN: {instruction['left']} -> {constant_map[instruction['left']]}")
-                if instruction.get('right') in constant_map:
-                    new_instruction['right'] = constant_map[instruction['right']]
-                    print(f"   PROPAGACIÓN: {instruction['right']} -> {constant_map[instruction['right']]}")
+            bloque = ssa.grafo[indice]
+            for fi in ssa.fis[indice]:
+                argumentos = {valor_de(a, a) for a in fi.argumentos}
+                if len(argumentos) == 1:
+                    numero[fi.destino] = argumentos.pop()
             
-            optimized.append(new_instruction)
+            agregadas = []
+            for i in compress(bloque.filas(), relevantes[bloque.inicio:bloque.fin]):
+                destino = destinos[i]
+                izquierdo = izquierdos[i]
+                izquierdo = valor_de(izquierdo, izquierdo)
+                if codigos[i] == ASIGNAR:
+                    numero[destino] = izquierdo
+                    continue
+                operador = operadores[i]
+                derecho = derechos[i]
+                derecho = valor_de(derecho, derecho)
+                if operador in conmutativos and izquierdo > derecho:
+                    izquierdo, derecho = derecho, izquierdo
+                clave = (operador, izquierdo, derecho)
+                previo = disponibles.get(clave)
+                if previo is None:
+                    if destino not in original:
+                        disponibles[clave] = destino
+                        agregadas.append(clave)
+                    continue
+                
+                numero[destino] = valor_de(previo, previo)
+                if _traza.debug_activo:
+                    _traza.debug(f"   SUBEXPRESIÓN COMÚN: {programa.instruccion(i)} -> {valores[destino]} = {valores[previo]}")
+                codigos[i] = ASIGNAR
+                operadores[i] = 0
+                izquierdos[i] = previo
+                derechos[i] = 0
+                eliminadas += 1
+                if destino not in original:
+                    reemplazos[destino] = previo
             
-            # Si se reasigna, remover de constantes
-            if instruction['type'] == 'assign' and instruction['target'] in constant_map:
-                del constant_map[instruction['target']]
+            pila.append(agregadas)
+            pila.extend(reversed(ssa.dominadores.hijos[indice]))
         
-        return optimized
+        if not eliminadas:
+            return
+        self.optimizations_applied.append(
+            f"Numeración de valores: {eliminadas} operaciones redundantes reemplazadas por copias")
+        # El original domina la definición del repetido y, por lo tanto, sus usos
+        self._reemplazar_usos(programa, reemplazos)
+    
+    def _reemplazar_usos(self, programa, reemplazos):
+        """Cambia cada uso de un operando de reemplazos por su valor y devuelve
+        cuántos cambió. Los operandos solo se leen en las columnas izquierdos
+        y derechos (los campos que un código no usa son 0); las φ no se tocan"""
+        if not reemplazos:
+            return 0
+        valores = programa.operandos.valores
+        cambiados = 0
+        for columna in (programa.izquierdos, programa.derechos):
+            for i in compress(range(len(columna)), map(reemplazos.__contains__, columna)):
+                if _traza.debug_activo:
+                    _traza.debug(f"   REEMPLAZO: {valores[columna[i]]} -> {valores[reemplazos[columna[i]]]}")
+                columna[i] = reemplazos[columna[i]]
+                cambiados += 1
+        return cambiados
+    
+    def _dead_code_elimination(self, ssa):
+        """Elimina el código muerto con un análisis de vivacidad hacia atrás
+        sobre la forma SSA. Las salidas y los saltos condicionales leen valores
+        que el programa necesita; desde ellos, una lista de trabajo recorre las
+        definiciones hacia atrás (la única de cada versión, sea un cuádruplo o
+        una φ) y marca vivo todo lo que leen. Las asignaciones y operaciones
+        que quedan sin marcar se quitan, con lo que una cadena entera de
+        temporales muertos cae de una vez aunque cruce bloques o ciclos. Las
+        entradas se conservan siempre: leer consume un valor"""
+        programa = ssa.programa
+        valores, clases = programa.operandos.valores, programa.operandos.clases
+        izquierdos, derechos = programa.izquierdos, programa.derechos
+        
+        # Definición de cada versión: fila de su asignación u operación, o su
+        # φ. Al marcar viva una versión se saca de aquí, así que lo que queda
+        # al final está muerto
+        definicion = dict(zip(programa.ids('destinos', ASIGNAR, OPERACION), programa.filas(ASIGNAR, OPERACION)))
+        por_fi = {fi.destino: fi for fis in ssa.fis for fi in fis}
+        
+        pendientes = list(programa.ids('izquierdos', SALIDA, SALTO_SI, SALTO_SI_NO))
+        while pendientes:
+            version = pendientes.pop()
+            fila = definicion.pop(version, None)
+            if fila is not None:
+                pendientes.append(izquierdos[fila])
+                pendientes.append(derechos[fila])
+            elif version in por_fi:
+                pendientes.extend(por_fi.pop(version).argumentos)
+        
+        if por_fi:
+            ssa.fis = [[fi for fi in fis if fi.destino not in por_fi] for fis in ssa.fis]
+        muertas = sorted(definicion.values())
+        if not muertas:
+            return
+        
+        temporales = 0
+        for fila in muertas:
+            ssa.conservar[fila] = 0
+            destino = programa.destinos[fila]
+            if clases[destino] == TEMPORAL:
+                temporales += 1
+            else:
+                self.optimizations_applied.append(
+                    f"Eliminada asignación muerta: {valores[ssa.original.get(destino, destino)]}")
+            if _traza.debug_activo:
+                _traza.debug(f"   CÓDIGO MUERTO: {programa.instruccion(fila)}")
+        self.optimizations_applied.append(
+            f"Código muerto: {len(muertas)} cuádruplos eliminados ({temporales} temporales)")
     
     def get_optimization_report(self):
         """Genera reporte de optimizaciones"""
         if not self.optimizations_applied:
             return "No se aplicaron optimizaciones"
         
-        report = "=== REPORTE DE OPTIMIZACIONES ===\n"
-        for i, opt in enumerate(self.optimizations_applied, 1):
-            report += f"{i}. {opt}\n"
-        
-        report += f"\nTotal de optimizaciones aplicadas: {len(self.optimizations_applied)}"
-        return report
+        lineas = ["=== REPORTE DE OPTIMIZACIONES ==="]
+        lineas.extend(f"{i}. {opt}" for i, opt in enumerate(self.optimizations_applied, 1))
+        lineas.append("")
+        lineas.append(f"Total de optimizaciones aplicadas: {len(self.optimizations_applied)}")
+        return "\n".join(lineas)
 
 def optimize_intermediate_code(intermediate_code):
     optimizer = Optimizer()
@@ -1,73 +1,148 @@
 # semantico.py - Versión completamente corregida
+import cache
 from sintactico import ASTNode
+from visitor import Accion, SALTAR, Visitor
+import traza
+
+_traza = traza.canal('semantico')
+
+# Tipos internados: cada nombre de tipo se guarda una sola vez y los símbolos
+# guardan su índice
+_TIPOS = ['int', 'float', 'bool', 'string', 'function', 'void']
+_ID_TIPO = {tipo: i for i, tipo in enumerate(_TIPOS)}
+
+def id_tipo(tipo):
+    """Índice internado del tipo (se agrega si es nuevo)"""
+    indice = _ID_TIPO.get(tipo)
+    if indice is None:
+        indice = _ID_TIPO[tipo] = len(_TIPOS)
+        _TIPOS.append(tipo)
+    return indice
+
+class Simbolo:
+    """Registro de un símbolo declarado.
+
+    Se lee como atributo (simbolo.tipo) o con las claves de la tabla de
+    símbolos del IDE (simbolo['nombre'], simbolo.get('alcance'))"""
+    __slots__ = ('nombre', 'tipo_id', 'valor', 'linea', 'ambito')
+
+    def __init__(self, nombre, tipo, valor=None, linea=None, ambito=0):
+        self.nombre = nombre
+        self.tipo_id = id_tipo(tipo)
+        self.valor = valor
+        self.linea = linea
+        self.ambito = ambito
+
+    @property
+    def tipo(self):
+        return _TIPOS[self.tipo_id]
+
+    @property
+    def alcance(self):
+        return 'global' if self.ambito == 0 else f'{self.ambito}'
+
+    @property
+    def es_global(self):
+        return self.ambito == 0
+
+    _CLAVES = frozenset(('nombre', 'tipo', 'valor', 'alcance', 'linea', 'es_global'))
+
+    def __getitem__(self, clave):
+        if clave not in self._CLAVES:
+            raise KeyError(clave)
+        return getattr(self, clave)
+
+    def get(self, clave, defecto=None):
+        return getattr(self, clave) if clave in self._CLAVES else defecto
+
+    def __eq__(self, otro):
+        return isinstance(otro, Simbolo) and \
+            (self.nombre, self.tipo_id, self.valor, self.linea, self.ambito) == \
+            (otro.nombre, otro.tipo_id, otro.valor, otro.linea, otro.ambito)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # El índice de tipo solo vale en este proceso: se guarda el nombre
+        return (Simbolo, (self.nombre, self.tipo, self.valor, self.linea, self.ambito))
+
+    def __repr__(self):
+        return f"Simbolo({self.nombre!r}, {self.tipo!r}, alcance={self.alcance!r}, linea={self.linea!r})"
 
 class SymbolTable:
-    def __init__(self):
-        self.scopes = [{}]
+    """Tabla de símbolos con ámbitos anidados.
+
+    Cada nombre tiene una pila con sus declaraciones visibles (la última es la
+    que se resuelve), así que lookup no depende de la profundidad de ámbitos.
+    Al salir de un ámbito se desapilan solo los nombres declarados en él"""
+
+    def __init__(self, tabla=None):
+        # nombre -> pila de Simbolo; tabla puede ser cualquier mapa con la
+        # interfaz de dict (p. ej. tabla_hash.TablaHash)
+        self._visibles = {} if tabla is None else tabla
+        # Nombres declarados en cada ámbito abierto, en orden de declaración
+        self._declarados = [[]]
         self.current_scope = 0
+        # Todos los símbolos en orden de registro (globales al declararse,
+        # locales al cerrar su ámbito)
         self.all_symbols = []
 
     def enter_scope(self):
-        self.scopes.append({})
+        self._declarados.append([])
         self.current_scope += 1
-        print(f"DEBUG: Entrando a ámbito {self.current_scope}")
+        if _traza.debug_activo:
+            _traza.debug(f"DEBUG: Entrando a ámbito {self.current_scope}")
 
     def exit_scope(self):
         """Sale del ámbito actual - PERO MANTIENE LOS SÍMBOLOS PARA ANÁLISIS"""
         if self.current_scope > 0:
-            print(f"DEBUG: Saliendo de ámbito {self.current_scope}")
+            if _traza.debug_activo:
+                _traza.debug(f"DEBUG: Saliendo de ámbito {self.current_scope}")
             
             # ANTES de eliminar el scope, guardar los símbolos locales
-            current_scope_symbols = self.scopes[self.current_scope]
-            for name, info in current_scope_symbols.items():
-                self.all_symbols.append({
-                    'nombre': name,
-                    'tipo': info['type'],
-                    'valor': info.get('value'),
-                    'alcance': f'{self.current_scope}',
-                    'linea': info.get('line', 'N/A')
-                })
-                print(f"DEBUG: Guardando símbolo local '{name}' del ámbito {self.current_scope}")
+            for name in self._declarados.pop():
+                pila = self._visibles[name]
+                self.all_symbols.append(pila.pop())
+                if not pila:
+                    del self._visibles[name]
+                if _traza.debug_activo:
+                    _traza.debug(f"DEBUG: Guardando símbolo local '{name}' del ámbito {self.current_scope}")
             
-            self.scopes.pop()
             self.current_scope -= 1
         else:
-            print(f"DEBUG: ERROR - Intentando salir del ámbito global")
+            _traza.aviso(f"DEBUG: ERROR - Intentando salir del ámbito global")
 
     def add_symbol(self, name, symbol_type, value=None, line=None):
         """Agrega un símbolo al ámbito actual"""
-        if name in self.scopes[self.current_scope]:
+        pila = self._visibles.get(name)
+        if pila and pila[-1].ambito == self.current_scope:
             return False
         
         ambito = "GLOBAL" if self.current_scope == 0 else f"LOCAL({self.current_scope})"
-        print(f"DEBUG: Agregando símbolo '{name}' tipo '{symbol_type}' en ámbito {ambito}")
+        if _traza.debug_activo:
+            _traza.debug(f"DEBUG: Agregando símbolo '{name}' tipo '{symbol_type}' en ámbito {ambito}", simbolo=name, tipo=symbol_type, ambito=self.current_scope)
 
-        self.scopes[self.current_scope][name] = {
-            'type': symbol_type,
-            'value': value,
-            'line': line
-        }
+        simbolo = Simbolo(name, symbol_type, value, line, self.current_scope)
+        if pila is None:
+            self._visibles[name] = [simbolo]
+        else:
+            pila.append(simbolo)
+        self._declarados[-1].append(name)
         
         # Si es global, guardarlo inmediatamente en all_symbols
         if self.current_scope == 0:
-            self.all_symbols.append({
-                'nombre': name,
-                'tipo': symbol_type,
-                'valor': value,
-                'alcance': 'global',
-                'linea': line
-            })
+            self.all_symbols.append(simbolo)
         
         return True
-        
-        
 
     def lookup(self, name):
-        """Busca un símbolo desde el ámbito actual hacia afuera"""
-        for i in range(self.current_scope, -1, -1):
-            if name in self.scopes[i]:
-                return self.scopes[i][name]
-        return None
+        """Símbolo visible con ese nombre (el del ámbito más interno) o None"""
+        pila = self._visibles.get(name)
+        return pila[-1] if pila else None
+
+    def __iter__(self):
+        """Recorre los símbolos registrados sin copiarlos"""
+        return iter(self.all_symbols)
     
     def p_expresion_string_literal(p):
         'expresion : STRING_LITERAL'
@@ -75,23 +150,13 @@ class SymbolTable:
         
     def get_all_symbols(self):
         """Obtiene todos los símbolos - INCLUYENDO LOCALES"""
-        print(f"DEBUG: Obteniendo {len(self.all_symbols)} símbolos totales")
-        
-        # También agregar símbolos globales actuales por si acaso
-        for name, info in self.scopes[0].items():
-            exists = any(s['nombre'] == name for s in self.all_symbols)
-            if not exists:
-                self.all_symbols.append({
-                    'nombre': name,
-                    'tipo': info['type'],
-                    'valor': info.get('value'),
-                    'alcance': 'global',
-                    'linea': info.get('line', 'N/A')
-                })
+        if _traza.info_activo:
+            _traza.info(f"DEBUG: Obteniendo {len(self.all_symbols)} símbolos totales")
         
         # DEBUG
-        for symbol in self.all_symbols:
-            print(f"DEBUG SYMBOL: {symbol['nombre']} -> {symbol['alcance']}")
+        if _traza.debug_activo:
+            for symbol in self.all_symbols:
+                _traza.debug(f"DEBUG SYMBOL: {symbol.nombre} -> {symbol.alcance}")
             
         return self.all_symbols
 
@@ -105,9 +170,18 @@ class SemanticAnalyzer:
         # Nuevo: Contadores para estadísticas de ámbitos
         self.global_vars = 0
         self.local_vars = 0
+        # Estado del análisis actual en tablas propias; el AST no se modifica,
+        # así que un mismo AST puede analizarse varias veces
+        # Tipos de expresión: nodo -> tipo
+        self.expression_types = {}
+        # Nodos ya procesados por el recorrido
+        self.visitados = set()
+        self._recorrido = _RecorridoSemantico(self)
 
     def analyze(self, ast):
         self.errors = []
+        self.expression_types = {}
+        self.visitados = set()
         self.global_vars = 0
         self.local_vars = 0
         if ast:
@@ -116,14 +190,8 @@ class SemanticAnalyzer:
         return self.errors
 
     def get_symbol_table_data(self):
-        symbols = self.symbol_table.get_all_symbols()
-        # Agregar información de ámbito a cada símbolo
-        for symbol in symbols:
-            if symbol['alcance'] == "global":
-                symbol['es_global'] = True
-            else:
-                symbol['es_global'] = False
-        return symbols
+        """Símbolos registrados (Simbolo; es_global se deriva del ámbito)"""
+        return self.symbol_table.get_all_symbols()
     
     def get_scope_stats(self):
         """Retorna estadísticas de ámbitos"""
@@ -266,7 +334,7 @@ class SemanticAnalyzer:
                 func_name = func_name_node.value
                 func_symbol = self.symbol_table.lookup(func_name)
                 
-                if not func_symbol or func_symbol['type'] != 'function':
+                if not func_symbol or func_symbol.tipo != 'function':
                     self.errors.append(f"Error semántico (línea {node.lineno}): Función '{func_name}' no declarada")
                     return None
                 
@@ -280,7 +348,7 @@ class SemanticAnalyzer:
                             self.errors.append(f"Error semántico (línea {node.lineno}): No se puede determinar el tipo del argumento {i+1} en llamada a '{func_name}'")
                 
                 # Retornar el tipo de la función
-                return func_symbol.get('value', 'int')  # Default a int si no hay tipo
+                return func_symbol.valor  # Tipo de retorno de la función
         
         return None
 
@@ -323,145 +391,81 @@ class SemanticAnalyzer:
     def _build_semantic_tree(self, node):
         if not isinstance(node, ASTNode):
             return None
-
-        # Información básica del nodo
-        semantic_node = {
-            'type': node.type,
-            'value': getattr(node, 'value', None),
-            'line': getattr(node, 'lineno', None),
-            'children': []
-        }
-
-        # Agregar información semántica específica solo para nodos importantes
-        if node.type == 'identificador':
-            symbol = self.symbol_table.lookup(node.value)
-            if symbol:
-                semantic_node['symbol_type'] = symbol['type']
-        
-        elif node.type == 'asignacion' and len(node.children) >= 2:
-            var_type = self._get_symbol_type(node.children[0])
-            expr_type = self._get_expression_type(node.children[1])
-            if var_type and expr_type:
-                semantic_node['assignment_types'] = f"{var_type} = {expr_type}"
-
-        elif node.type == 'expresion_binaria' and len(node.children) >= 2:
-            left_type = self._get_expression_type(node.children[0])
-            right_type = self._get_expression_type(node.children[1])
-            if left_type and right_type:
-                semantic_node['operation_types'] = f"{left_type} {node.value} {right_type}"
-
-        # Procesar hijos (solo los necesarios)
-        if hasattr(node, 'children'):
-            for child in node.children:
-                # Filtrar nodos muy básicos que no aportan información
-                if child and isinstance(child, ASTNode):
-                    child_node = self._build_semantic_tree(child)
-                    if child_node:
-                        semantic_node['children'].append(child_node)
-
-        return semantic_node
+        raiz = []
+        _ArbolSemantico(self).recorrer(node, raiz)
+        return raiz[0]
 
     def _traverse_ast(self, node):
         """Recorre el AST - VERSIÓN CON FIX INMEDIATO"""
-        if not isinstance(node, ASTNode):
-            return
-
-        try:
-            # EVITAR PROCESAR NODOS DUPLICADOS - FIX INMEDIATO
-            if hasattr(node, '_processed'):
-                return
-            node._processed = True
-            
-            if node.type == 'programa':
-                self._process_program(node)
-            elif node.type == 'declaracion_variable':
-                self._process_declaration(node)
-            elif node.type == 'asignacion':
-                self._process_assignment(node)
-            elif node.type == 'expresion_binaria':
-                self._process_binary_expression(node)
-            
-            # ESTRUCTURAS DE CONTROL
-            elif node.type in ['if', 'if_then', 'if_else']:
-                self._process_if_statement(node)
-            elif node.type == 'while':
-                self._process_while_statement(node)
-            elif node.type == 'do_while':
-                self._process_do_while_statement(node)
-
-            # Procesar hijos recursivamente SOLO UNA VEZ
-            if hasattr(node, 'children'):
-                for child in node.children:
-                    if isinstance(child, ASTNode) and not hasattr(child, '_processed'):
-                        self._traverse_ast(child)
-                        
-        except Exception as e:
-            self.errors.append(f"Error durante análisis: {str(e)}")
+        self._recorrido.recorrer(node)
         
         
     def _process_if_statement(self, node):
-        """Procesa if con ámbito local - VERSIÓN DEFINITIVA"""
+        """Procesa if con ámbito local - VERSIÓN DEFINITIVA
+
+        Devuelve lo que queda por recorrer: cada bloque entre entrada y salida de ámbito"""
+        pendientes = []
         if len(node.children) >= 2:
             # Procesar condición
-            cond_type = self._get_expression_type(node.children[0])
-            if cond_type != 'bool' and cond_type is not None:
-                self.errors.append(f"Error semántico (línea {node.lineno}): La condición del if debe ser booleana")
+            self._check_condition(node.children[0], node.lineno, 'if')
 
             # Procesar bloque THEN con NUEVO ÁMBITO
-            self.symbol_table.enter_scope()
+            pendientes.append(Accion(self.symbol_table.enter_scope))
             if node.children[1]:  # Solo procesar si existe el bloque
-                self._traverse_ast(node.children[1])
-            self.symbol_table.exit_scope()
+                pendientes.append(node.children[1])
+            pendientes.append(Accion(self.symbol_table.exit_scope))
 
             # Procesar bloque ELSE si existe
             if len(node.children) >= 3 and node.children[2]:
-                self.symbol_table.enter_scope()
-                self._traverse_ast(node.children[2])
-                self.symbol_table.exit_scope()
+                pendientes += [Accion(self.symbol_table.enter_scope),
+                               node.children[2],
+                               Accion(self.symbol_table.exit_scope)]
+        return pendientes
 
     def _process_while_statement(self, node):
         """Procesa while con ámbito local"""
-        if len(node.children) >= 2:
-            cond_type = self._get_expression_type(node.children[0])
-            if cond_type != 'bool' and cond_type is not None:
-                self.errors.append(f"Error semántico (línea {node.lineno}): La condición del while debe ser booleana")
+        if len(node.children) < 2:
+            return []
+        self._check_condition(node.children[0], node.lineno, 'while')
 
-            # Procesar cuerpo con NUEVO ÁMBITO
-            self.symbol_table.enter_scope()
-            self._process_statement(node.children[1])
-            self.symbol_table.exit_scope()
+        # Procesar cuerpo con NUEVO ÁMBITO
+        return [Accion(self.symbol_table.enter_scope),
+                Accion(self._process_statement, node.children[1]),
+                Accion(self.symbol_table.exit_scope)]
 
     def _process_do_while_statement(self, node):
-            """Procesa do-while con ámbito local"""
-            if len(node.children) >= 2:
-                # Procesar cuerpo primero con NUEVO ÁMBITO
-                self.symbol_table.enter_scope()
-                self._process_statement(node.children[0])
-                self.symbol_table.exit_scope()
-
-                # Luego procesar condición
-                cond_type = self._get_expression_type(node.children[1])
-                if cond_type != 'bool' and cond_type is not None:
-                    self.errors.append(f"Error semántico (línea {node.lineno}): La condición del while debe ser booleana")
-
+        """Procesa do-while con ámbito local"""
+        if len(node.children) < 2:
+            return []
+        # Procesar cuerpo primero con NUEVO ÁMBITO y luego la condición
+        return [Accion(self.symbol_table.enter_scope),
+                Accion(self._process_statement, node.children[0]),
+                Accion(self.symbol_table.exit_scope),
+                Accion(self._check_condition, node.children[1], node.lineno, 'while')]
+
+    def _check_condition(self, cond_node, lineno, sentencia):
+        cond_type = self._get_expression_type(cond_node)
+        if cond_type != 'bool' and cond_type is not None:
+            self.errors.append(f"Error semántico (línea {lineno}): La condición del {sentencia} debe ser booleana")
 
     def _process_statement(self, node):
-        """Procesa una sentencia individual o bloque - VERSIÓN CORREGIDA"""
+        """Procesa una sentencia individual o bloque - VERSIÓN CORREGIDA
+
+        Devuelve los nodos a recorrer en su lugar"""
         if not node:
-            return
+            return None
             
-        print(f"DEBUG: Procesando statement tipo: {node.type}")
+        if _traza.debug_activo:
+            _traza.debug(f"DEBUG: Procesando statement tipo: {node.type}", nodo=node.type)
         
         # Si es un bloque con llaves { ... }, procesar su contenido
         if node.type == 'lista_declaraciones':
-            for child in node.children:
-                self._traverse_ast(child)
+            return node.children
         elif node.type == 'bloque':  # Si existe nodo bloque explícito
-            for child in node.children:
-                self._traverse_ast(child)
+            return node.children
         else:
             # Es una sentencia individual
-            self._traverse_ast(node)
+            return [node]
                     
     def _process_if_then(self, node):
         """Procesa if-then con ámbito local"""
@@ -620,7 +624,7 @@ class SemanticAnalyzer:
                     self.errors.append(f"Error semántico (línea {node.lineno}): Variable '{var_name}' no declarada")
                     return
 
-                var_type = symbol['type']
+                var_type = symbol.tipo
                 expr_type = self._get_expression_type(expr_node)
                 
                 if expr_type is None:
@@ -701,28 +705,52 @@ class SemanticAnalyzer:
         """Obtiene el tipo de un símbolo (variable)"""
         if node.type == 'identificador' and hasattr(node, 'value'):
             symbol = self.symbol_table.lookup(node.value)
-            return symbol['type'] if symbol else None
+            return symbol.tipo if symbol else None
         return None
 
     def _get_expression_type(self, node):
-        """Determina el tipo de una expresión - VERSIÓN CORREGIDA"""
+        """Determina el tipo de una expresión - VERSIÓN CORREGIDA
+
+        Cada nodo se tipa una sola vez por análisis: la primera consulta tipa la
+        subexpresión de abajo hacia arriba (postorden iterativo) y los tipos
+        quedan en expression_types (nodo -> tipo) para las consultas siguientes"""
         
         # CASO 1: Si es un string simple (viene directamente del parser como string literal)
         if isinstance(node, str):
             # Verificar si podría ser un identificador buscando en la tabla de símbolos
             symbol = self.symbol_table.lookup(node)
             if symbol:
-                return symbol['type']  # Es una variable
+                return symbol.tipo  # Es una variable
             else:
                 return 'string'  # Es un string literal
         
         if not isinstance(node, ASTNode):
             return None
 
+        tipos = self.expression_types
+        if node in tipos:
+            return tipos[node]
+
+        pila = [(node, False)]
+        while pila:
+            actual, hijos_listos = pila.pop()
+            if actual in tipos:
+                continue
+            if hijos_listos:
+                tipos[actual] = self._tipo_nodo(actual)
+            else:
+                pila.append((actual, True))
+                for hijo in _operandos(actual):
+                    if isinstance(hijo, ASTNode) and hijo not in tipos:
+                        pila.append((hijo, False))
+        return tipos[node]
+
+    def _tipo_nodo(self, node):
+        """Tipo de un nodo cuyos operandos ya están tipados"""
         # CASO 2: Identificador (variable)
         if node.type == 'identificador':
             symbol = self.symbol_table.lookup(node.value)
-            return symbol['type'] if symbol else None
+            return symbol.tipo if symbol else None
 
         # CASO 3: String literal del parser
         elif node.type == 'string_literal':
@@ -789,11 +817,149 @@ class SemanticAnalyzer:
             return True
         return False
 
-def test_semantics(input_text):
-    from sintactico import parse_code
+def _operandos(node):
+    """Hijos cuyo tipo determina el de la expresión"""
+    if node.type == 'expresion_binaria':
+        return node.children[:2]
+    if node.type == 'operacion_unaria' and node.value == '!':
+        return node.children[:1]
+    return ()
 
-    result = parse_code(input_text)
-    
+class _RecorridoSemantico(Visitor):
+    """Recorrido de verificación de SemanticAnalyzer; cada nodo se procesa una sola vez"""
+
+    def __init__(self, analizador):
+        super().__init__()
+        self.analizador = analizador
+
+    def visitar(self, nodo, contexto):
+        # EVITAR PROCESAR NODOS DUPLICADOS (marca en el analizador, no en el nodo)
+        visitados = self.analizador.visitados
+        if nodo in visitados:
+            return SALTAR
+        visitados.add(nodo)
+        return self._despacho.get(nodo.type, self.visitar_defecto)(nodo, contexto)
+
+    def error(self, item, excepcion):
+        self.analizador.errors.append(f"Error durante análisis: {str(excepcion)}")
+
+    def visitar_programa(self, nodo, contexto):
+        self.analizador._process_program(nodo)
+
+    def visitar_declaracion_variable(self, nodo, contexto):
+        self.analizador._process_declaration(nodo)
+
+    def visitar_asignacion(self, nodo, contexto):
+        self.analizador._process_assignment(nodo)
+
+    def visitar_expresion_binaria(self, nodo, contexto):
+        self.analizador._process_binary_expression(nodo)
+
+    # ESTRUCTURAS DE CONTROL: primero sus bloques con ámbito, luego los hijos pendientes
+    def visitar_if(self, nodo, contexto):
+        return self.analizador._process_if_statement(nodo) + list(nodo.children), contexto
+    visitar_if_then = visitar_if_else = visitar_if
+
+    def visitar_while(self, nodo, contexto):
+        return self.analizador._process_while_statement(nodo) + list(nodo.children), contexto
+
+    def visitar_do_while(self, nodo, contexto):
+        return self.analizador._process_do_while_statement(nodo) + list(nodo.children), contexto
+
+class _ArbolSemantico(Visitor):
+    """Construye el árbol semántico en diccionarios; el contexto es la lista de hijos del padre"""
+
+    def __init__(self, analizador):
+        super().__init__()
+        self.analizador = analizador
+
+    def visitar_defecto(self, node, hermanos):
+        # Información básica del nodo
+        semantic_node = {
+            'type': node.type,
+            'value': getattr(node, 'value', None),
+            'line': getattr(node, 'lineno', None),
+            'children': []
+        }
+        hermanos.append(semantic_node)
+        return node.children, semantic_node['children']
+
+    # Agregar información semántica específica solo para nodos importantes
+    def visitar_identificador(self, node, hermanos):
+        resultado = self.visitar_defecto(node, hermanos)
+        symbol = self.analizador.symbol_table.lookup(node.value)
+        if symbol:
+            hermanos[-1]['symbol_type'] = symbol.tipo
+        return resultado
+
+    def visitar_asignacion(self, node, hermanos):
+        resultado = self.visitar_defecto(node, hermanos)
+        if len(node.children) >= 2:
+            var_type = self.analizador._get_symbol_type(node.children[0])
+            expr_type = self.analizador._get_expression_type(node.children[1])
+            if var_type and expr_type:
+                hermanos[-1]['assignment_types'] = f"{var_type} = {expr_type}"
+        return resultado
+
+    def visitar_expresion_binaria(self, node, hermanos):
+        resultado = self.visitar_defecto(node, hermanos)
+        if len(node.children) >= 2:
+            left_type = self.analizador._get_expression_type(node.children[0])
+            right_type = self.analizador._get_expression_type(node.children[1])
+            if left_type and right_type:
+                hermanos[-1]['operation_types'] = f"{left_type} {node.value} {right_type}"
+        return resultado
+
+def test_semantics(input_text, parse_result=None):
+    """Análisis semántico del texto, guardado en la caché de artefactos.
+
+    parse_result es el resultado de parse_code de este mismo texto si ya se
+    tiene; con la caché al día no se usa ni se vuelve a analizar el texto"""
+    def analizar():
+        from sintactico import parse_code
+        return analyze_parse_result(parse_result if parse_result is not None else parse_code(input_text))
+    return cache.artefacto('semantico', (input_text,), analizar, _empacar_resultado, _desempacar_resultado)
+
+def _empacar_resultado(resultado):
+    """Resultado con semantic_tree como lista plana en preorden de (nodo sin
+    hijos, cantidad de hijos): pickle recorre los diccionarios anidados
+    recursivamente y no podría guardar el árbol de un programa profundo"""
+    arbol = resultado['semantic_tree']
+    if arbol is None:
+        return resultado
+    plano = []
+    pila = [arbol]
+    while pila:
+        nodo = pila.pop()
+        hijos = nodo['children']
+        plano.append((dict(nodo, children=None), len(hijos)))
+        pila.extend(reversed(hijos))
+    return dict(resultado, semantic_tree=plano)
+
+def _desempacar_resultado(resultado):
+    """Inverso de _empacar_resultado"""
+    plano = resultado['semantic_tree']
+    if plano is None:
+        return resultado
+    raiz = None
+    # [hijos del padre, cuántos le faltan] de los nodos con hijos pendientes
+    abiertos = []
+    for datos, cantidad in plano:
+        nodo = dict(datos, children=[])
+        if abiertos:
+            abierto = abiertos[-1]
+            abierto[0].append(nodo)
+            abierto[1] -= 1
+            if not abierto[1]:
+                abiertos.pop()
+        else:
+            raiz = nodo
+        if cantidad:
+            abiertos.append([nodo['children'], cantidad])
+    return dict(resultado, semantic_tree=raiz)
+
+def analyze_parse_result(result):
+    """Análisis semántico sobre el resultado de parse_code, sin volver a analizar el texto"""
     if result['success'] and result['ast']:
         analyzer = SemanticAnalyzer()
         errors = analyzer.analyze(result['ast'])
@@ -0,0 +1,148 @@
+# sesion.py - Sesión de compilación: cada etapa se calcula una sola vez por texto
+from contextlib import nullcontext
+from functools import cached_property
+
+import cache
+from medicion import Medicion
+from lexico import test_lexer
+from sintactico import contar_nodos, parse_code
+from semantico import test_semantics
+from intermedio import generate_intermediate_code
+from optimizacion import optimize_intermediate_code
+from llvm_generator import LLVMGenerator
+
+# Sesiones recientes por huella del texto (las más viejas se descartan)
+MAX_SESIONES = 4
+_SESIONES = {}
+
+def _generar_llvm(quadruples, symbol_table):
+    return LLVMGenerator().generate(quadruples, symbol_table)
+
+class CompilationSession:
+    """Resultados de todas las etapas para un mismo texto fuente.
+
+    Cada etapa se calcula la primera vez que se pide y pide sus entradas a la
+    sesión: tokens -> AST -> semántico -> cuádruplos -> optimizados -> LLVM.
+    Consultar todas las etapas cuesta una tokenización y un análisis sintáctico,
+    y ninguno si el texto ya está en la caché de artefactos (cache.py).
+    Ninguna etapa modifica el AST, así que puede reutilizarse libremente.
+
+    medicion registra tiempo, CPU, memoria y conteos de cada etapa calculada
+    (ver medicion.py).
+
+    Con persistir=False (el texto del editor, que cambia en cada edición) las
+    etapas leen la caché de artefactos pero no guardan nada en ella"""
+
+    def __init__(self, texto, tokens=None, generar_llvm=None, persistir=True):
+        self.texto = texto
+        self.clave = cache.huella(texto)
+        self._tokens = tokens
+        self._generar_llvm = generar_llvm or _generar_llvm
+        self.persistir = persistir
+        self.medicion = Medicion()
+
+    @classmethod
+    def para(cls, texto, tokens=None, generar_llvm=None, persistir=True):
+        """Sesión del texto: la misma mientras el texto no cambie.
+
+        tokens es un TokenBuffer de este texto (p. ej. el del lexer incremental
+        del editor); si se pasa, reemplaza al que tuviera la sesión"""
+        clave = cache.huella(texto)
+        sesion = _SESIONES.pop(clave, None)
+        if sesion is None or sesion.texto != texto:
+            sesion = cls(texto, tokens, generar_llvm, persistir)
+        else:
+            if tokens is not None:
+                sesion._tokens = tokens
+            if generar_llvm is not None:
+                sesion._generar_llvm = generar_llvm
+            sesion.persistir = persistir
+        _SESIONES[clave] = sesion
+        while len(_SESIONES) > MAX_SESIONES:
+            del _SESIONES[next(iter(_SESIONES))]
+        return sesion
+
+    def _artefactos(self):
+        """Contexto de cada etapa: sin persistir, la caché de artefactos solo se lee"""
+        return nullcontext() if self.persistir else cache.solo_lectura()
+
+    @property
+    def tokens(self):
+        if self._tokens is None:
+            with self.medicion.etapa('lexico') as etapa:
+                self._tokens = test_lexer(self.texto)
+                etapa.contar(tokens=len(self._tokens))
+        return self._tokens
+
+    @property
+    def indice_lineas(self):
+        return self.tokens.indice_lineas()
+
+    @cached_property
+    def analisis_sintactico(self):
+        """Resultado de parse_code sobre los tokens de la sesión"""
+        with self.medicion.etapa('sintactico') as etapa, self._artefactos():
+            resultado = parse_code(self.texto, tokens=lambda: self.tokens)
+            # El conteo de nodos recorre el AST: se hace solo al exportar
+            etapa.contar(nodos=lambda: contar_nodos(resultado['ast']))
+        return resultado
+
+    @property
+    def ast(self):
+        return self.analisis_sintactico['ast']
+
+    @cached_property
+    def analisis_semantico(self):
+        """Mismo diccionario que test_semantics: errors, symbol_table, semantic_tree, success"""
+        resultado_sintactico = self.analisis_sintactico
+        with self.medicion.etapa('semantico') as etapa, self._artefactos():
+            resultado = test_semantics(self.texto, resultado_sintactico)
+            etapa.contar(simbolos=len(resultado['symbol_table']), errores=len(resultado['errors']))
+        return resultado
+
+    @property
+    def symbol_table(self):
+        return self.analisis_semantico['symbol_table']
+
+    @property
+    def semantic_tree(self):
+        return self.analisis_semantico['semantic_tree']
+
+    @cached_property
+    def tabla_simbolos(self):
+        """Tabla de símbolos como dict nombre -> símbolo (entrada del código intermedio)"""
+        return {sym['nombre']: sym for sym in self.symbol_table}
+
+    @cached_property
+    def codigo_intermedio(self):
+        """(cuádruplos, texto) del código intermedio"""
+        ast, tabla = self.ast, self.tabla_simbolos
+        with self.medicion.etapa('intermedio') as etapa, self._artefactos():
+            resultado = generate_intermediate_code(ast, tabla, fuente=self.texto)
+            etapa.contar(cuadruplos=len(resultado[0]))
+        return resultado
+
+    @property
+    def quadruples(self):
+        return self.codigo_intermedio[0]
+
+    @cached_property
+    def optimizacion(self):
+        """(cuádruplos optimizados, reporte de optimizaciones)"""
+        cuadruplos = self.quadruples
+        with self.medicion.etapa('optimizacion') as etapa:
+            resultado = optimize_intermediate_code(cuadruplos)
+            etapa.contar(cuadruplos=len(resultado[0]))
+        return resultado
+
+    @property
+    def optimized_quadruples(self):
+        return self.optimizacion[0]
+
+    @cached_property
+    def llvm_ir(self):
+        with self.medicion.etapa('llvm') as etapa, self._artefactos():
+            codigo = cache.artefacto('llvm', (self.texto, self._generar_llvm.__qualname__),
+                                     lambda: self._generar_llvm(self.optimized_quadruples, self.tabla_simbolos))
+            etapa.contar(lineas=codigo.count('\n') + 1 if codigo else 0)
+        return codigo
@@ -1,6 +1,17 @@
 # sintactico.py - Sin importaciones circulares
+import functools
+import os
+import sys
+import time
+from array import array
+
 import ply.yacc as yacc
 
+import cache
+import traza
+
+_traza = traza.canal('sintactico')
+
 # Importar solo tokens desde lexico
 try:
     from lexico import tokens
@@ -16,10 +27,18 @@ except ImportError:
 # El lexer se inicializará después
 lexer = None
 
+# Hijos de las hojas: una sola tupla vacía compartida en lugar de una lista por nodo
+_SIN_HIJOS = ()
+
 class ASTNode:
+    # Atributos fijos, sin __dict__ por nodo. func_name solo existe en los
+    # nodos donde se asigna (hasattr sigue funcionando). Los análisis guardan
+    # su estado en tablas propias indexadas por nodo, nunca en el AST
+    __slots__ = ('type', 'children', 'value', 'lineno', 'lexpos', 'func_name')
+
     def __init__(self, type, children=None, value=None, lineno=None, lexpos=None):
         self.type = type
-        self.children = children if children is not None else []
+        self.children = children if children is not None else _SIN_HIJOS
         self.value = value
         self.lineno = lineno
         self.lexpos = lexpos
@@ -27,6 +46,11 @@ class ASTNode:
     def __repr__(self):
         return f"{self.type}: {self.value}" if self.value else self.type
 
+    def __reduce__(self):
+        # pickle guarda los hijos recursivamente: el árbol se guarda como
+        # ASTArena (arrays planos) para que un AST profundo también se pueda guardar
+        return (_ast_desde_arena, (ASTArena.desde_ast(self),))
+
 precedence = (
     ('left', 'OR'),
     ('left', 'AND'),
@@ -41,40 +65,40 @@ precedence = (
 
 def p_programa(p):
     'programa : MAIN LBRACE lista_declaraciones RBRACE'
-    p[0] = ASTNode('programa', children=[p[3]], lineno=p.lineno(1))
+    p[0] = ASTNode('programa', children=[p[3]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     
 def p_function_declaration(p):
     '''declaracion : tipo ID LPAREN parameter_list RPAREN LBRACE lista_declaraciones RBRACE
                    | tipo ID LPAREN RPAREN LBRACE lista_declaraciones RBRACE'''
     if len(p) == 9:  # Con parámetros
-        p[0] = ASTNode('function_declaration', children=[p[1], p[4], p[7]], value=p[1].value, lineno=p.lineno(2))
+        p[0] = ASTNode('function_declaration', children=[p[1], p[4], p[7]], value=p[1].value, lineno=p.lineno(2), lexpos=p.lexpos(2))
         p[0].func_name = p[2]
     else:  # Sin parámetros
-        p[0] = ASTNode('function_declaration', children=[p[1], ASTNode('empty'), p[6]], value=p[1].value, lineno=p.lineno(2))
+        p[0] = ASTNode('function_declaration', children=[p[1], ASTNode('empty'), p[6]], value=p[1].value, lineno=p.lineno(2), lexpos=p.lexpos(2))
         p[0].func_name = p[2]
         
 def p_parameter_list(p):
     '''parameter_list : parameter
                      | parameter_list COMMA parameter'''
     if len(p) == 2:
-        p[0] = ASTNode('parameter_list', children=[p[1]], lineno=p.lineno(1))
+        p[0] = ASTNode('parameter_list', children=[p[1]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     else:
         p[1].children.append(p[3])
         p[0] = p[1]
         
 def p_parameter(p):
     'parameter : tipo ID'
-    p[0] = ASTNode('parameter', children=[p[1], ASTNode('identificador', value=p[2])], lineno=p.lineno(1))
+    p[0] = ASTNode('parameter', children=[p[1], ASTNode('identificador', value=p[2])], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_expresion_function_call(p):
     'expresion : ID LPAREN argument_list RPAREN'
-    p[0] = ASTNode('function_call', children=[ASTNode('identificador', value=p[1]), p[3]], lineno=p.lineno(1))
+    p[0] = ASTNode('function_call', children=[ASTNode('identificador', value=p[1]), p[3]], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 
 def p_function_call(p):
     'expresion : ID LPAREN argument_list RPAREN'
-    func_name = ASTNode('identificador', value=p[1], lineno=p.lineno(1))
-    p[0] = ASTNode('function_call', children=[func_name, p[3]], lineno=p.lineno(1))
+    func_name = ASTNode('identificador', value=p[1], lineno=p.lineno(1), lexpos=p.lexpos(1))
+    p[0] = ASTNode('function_call', children=[func_name, p[3]], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_argument_list(p):
     '''argument_list : expresion
@@ -82,44 +106,46 @@ def p_argument_list(p):
                     | empty'''
     if len(p) == 2:
         if p[1] is None:  # empty
-            p[0] = ASTNode('argument_list', children=[], lineno=p.lineno(1))
+            p[0] = ASTNode('argument_list', children=[], lineno=p.lineno(1), lexpos=p.lexpos(1))
         else:
-            p[0] = ASTNode('argument_list', children=[p[1]], lineno=p.lineno(1))
+            p[0] = ASTNode('argument_list', children=[p[1]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     else:
         p[1].children.append(p[3])
         p[0] = p[1]
 
 def p_return_statement(p):
     'sentencia : RETURN expresion SEMICOLON'
-    p[0] = ASTNode('return_statement', children=[p[2]], lineno=p.lineno(1))
+    p[0] = ASTNode('return_statement', children=[p[2]], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_empty(p):
     'empty :'
-    p[0] = ASTNode('empty', lineno=p.lineno(1))
+    p[0] = ASTNode('empty', lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_lista_declaraciones(p):
     '''lista_declaraciones : lista_declaraciones declaracion
                           | declaracion'''
     if len(p) == 3:
-        p[0] = ASTNode('lista_declaraciones', children=[p[1], p[2]], lineno=p.lineno(1))
+        # Lista plana: se agrega al nodo existente en lugar de anidar otro nivel
+        p[1].children.append(p[2])
+        p[0] = p[1]
     else:
-        p[0] = ASTNode('lista_declaraciones', children=[p[1]], lineno=p.lineno(1))
+        p[0] = ASTNode('lista_declaraciones', children=[p[1]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     
 # def p_switch_statement(p):
 #     '''switch_statement : SWITCH LPAREN expresion RPAREN LBRACE case_list RBRACE
 #                        | SWITCH LPAREN expresion RPAREN LBRACE case_list default_case RBRACE'''
 #     if len(p) == 8:
-#         p[0] = ASTNode('switch', children=[p[3], p[6]], lineno=p.lineno(1))
+#         p[0] = ASTNode('switch', children=[p[3], p[6]], lineno=p.lineno(1), lexpos=p.lexpos(1))
 #     else:
-#         p[0] = ASTNode('switch', children=[p[3], p[6], p[7]], lineno=p.lineno(1))
+#         p[0] = ASTNode('switch', children=[p[3], p[6], p[7]], lineno=p.lineno(1), lexpos=p.lexpos(1))
         
 def p_case_list(p):
     '''case_list : case_list case
                 | case'''
     if len(p) == 3:
-        p[0] = ASTNode('case_list', children=[p[1], p[2]], lineno=p.lineno(1))
+        p[0] = ASTNode('case_list', children=[p[1], p[2]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     else:
-        p[0] = ASTNode('case_list', children=[p[1]], lineno=p.lineno(1))
+        p[0] = ASTNode('case_list', children=[p[1]], lineno=p.lineno(1), lexpos=p.lexpos(1))
         
 def p_casos(p):
     '''casos : casos caso
@@ -128,34 +154,34 @@ def p_casos(p):
              | DEFAULT COLON LBRACE lista_declaraciones RBRACE'''
     
     if len(p) == 3:  # casos caso
-        p[0] = ASTNode('casos', children=[p[1], p[2]], lineno=p.lineno(1))
+        p[0] = ASTNode('casos', children=[p[1], p[2]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     elif len(p) == 2:  # caso único
-        p[0] = ASTNode('casos', children=[p[1]], lineno=p.lineno(1))
+        p[0] = ASTNode('casos', children=[p[1]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     elif len(p) == 7:  # casos con default
-        default_node = ASTNode('default', children=[p[5]], lineno=p.lineno(2))
-        p[0] = ASTNode('casos', children=[p[1], default_node], lineno=p.lineno(1))
+        default_node = ASTNode('default', children=[p[5]], lineno=p.lineno(2), lexpos=p.lexpos(2))
+        p[0] = ASTNode('casos', children=[p[1], default_node], lineno=p.lineno(1), lexpos=p.lexpos(1))
     else:  # default único
-        p[0] = ASTNode('casos', children=[ASTNode('default', children=[p[5]], lineno=p.lineno(1))], lineno=p.lineno(1))
+        p[0] = ASTNode('casos', children=[ASTNode('default', children=[p[5]], lineno=p.lineno(1), lexpos=p.lexpos(1))], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_caso(p):
     'caso : CASE expresion COLON LBRACE lista_declaraciones RBRACE'
-    p[0] = ASTNode('case', children=[p[2], p[5]], lineno=p.lineno(1))
+    p[0] = ASTNode('case', children=[p[2], p[5]], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_case(p):
     'case : CASE expresion COLON lista_declaraciones'
-    p[0] = ASTNode('case', children=[p[2], p[4]], lineno=p.lineno(1))
+    p[0] = ASTNode('case', children=[p[2], p[4]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     
 def p_repeticion(p):
     '''repeticion : DO LBRACE lista_declaraciones RBRACE WHILE LPAREN expresion RPAREN SEMICOLON
                   | DO lista_declaraciones UNTIL expresion SEMICOLON'''
     if len(p) == 10:
-        p[0] = ASTNode('do_while', children=[p[3], p[7]], lineno=p.lineno(1))
+        p[0] = ASTNode('do_while', children=[p[3], p[7]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     else:
-        p[0] = ASTNode('do_until', children=[p[2], p[4]], lineno=p.lineno(1))
+        p[0] = ASTNode('do_until', children=[p[2], p[4]], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_default_case(p):
     'default_case : DEFAULT COLON lista_declaraciones'
-    p[0] = ASTNode('default', children=[p[3]], lineno=p.lineno(1))
+    p[0] = ASTNode('default', children=[p[3]], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_seleccion(p):
     '''seleccion : IF expresion THEN LBRACE lista_declaraciones RBRACE
@@ -165,27 +191,27 @@ def p_seleccion(p):
                  | SWITCH LPAREN expresion RPAREN LBRACE casos RBRACE'''
     
     if len(p) == 7 and p[1] == 'if':  # if-then sin else
-        p[0] = ASTNode('if_then', children=[p[2], p[5]], lineno=p.lineno(1))
+        p[0] = ASTNode('if_then', children=[p[2], p[5]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     elif len(p) == 11:  # if-then con else
-        p[0] = ASTNode('if_then_else', children=[p[2], p[5], p[9]], lineno=p.lineno(1))
+        p[0] = ASTNode('if_then_else', children=[p[2], p[5], p[9]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     elif len(p) == 6 and p[1] == 'if':  # if con paréntesis sin else
-        p[0] = ASTNode('if', children=[p[3], p[5]], lineno=p.lineno(1))
+        p[0] = ASTNode('if', children=[p[3], p[5]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     elif len(p) == 8 and p[1] == 'if':  # if con paréntesis con else
-        p[0] = ASTNode('if_else', children=[p[3], p[5], p[7]], lineno=p.lineno(1))
+        p[0] = ASTNode('if_else', children=[p[3], p[5], p[7]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     else:  # switch
-        p[0] = ASTNode('switch', children=[p[3], p[6]], lineno=p.lineno(1))
+        p[0] = ASTNode('switch', children=[p[3], p[6]], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_iteracion(p):
     '''iteracion : WHILE LPAREN expresion RPAREN sentencia
                 | for_loop'''
     if p[1] == 'while':
-        p[0] = ASTNode('while', children=[p[3], p[5]], lineno=p.lineno(1))
+        p[0] = ASTNode('while', children=[p[3], p[5]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     else:
         p[0] = p[1]  # for_loop
         
 # def p_for_loop(p):
 #     'for_loop : FOR LPAREN asignacion expresion SEMICOLON expresion RPAREN LBRACE lista_declaraciones RBRACE'
-#     p[0] = ASTNode('for', children=[p[3], p[4], p[6], p[9]], lineno=p.lineno(1))
+#     p[0] = ASTNode('for', children=[p[3], p[4], p[6], p[9]], lineno=p.lineno(1), lexpos=p.lexpos(1))
         
         
 
@@ -209,64 +235,64 @@ def p_function_definition(p):
         func_name = p[3]
         func_body = p[7]
     
-    func_node = ASTNode('function_definition', children=[p[4], func_body], value=func_type, lineno=p.lineno(1))
+    func_node = ASTNode('function_definition', children=[p[4], func_body], value=func_type, lineno=p.lineno(1), lexpos=p.lexpos(1))
     func_node.func_name = func_name
     p[0] = func_node
 
 def p_parameters(p):
     '''parameters : parameter_list
                  | empty'''
-    p[0] = ASTNode('parameters', children=[p[1]] if p[1] else [], lineno=p.lineno(1))
+    p[0] = ASTNode('parameters', children=[p[1]] if p[1] else [], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_parameter_list(p):
     '''parameter_list : parameter
                      | parameter_list COMMA parameter'''
     if len(p) == 2:
-        p[0] = ASTNode('parameter_list', children=[p[1]], lineno=p.lineno(1))
+        p[0] = ASTNode('parameter_list', children=[p[1]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     else:
         p[1].children.append(p[3])
         p[0] = p[1]
 
 def p_parameter(p):
     'parameter : tipo ID'
-    param_type = ASTNode('tipo', value=p[1].value, lineno=p.lineno(1))
-    param_name = ASTNode('identificador', value=p[2], lineno=p.lineno(2))
-    p[0] = ASTNode('parameter', children=[param_type, param_name], lineno=p.lineno(1))
+    param_type = ASTNode('tipo', value=p[1].value, lineno=p.lineno(1), lexpos=p.lexpos(1))
+    param_name = ASTNode('identificador', value=p[2], lineno=p.lineno(2), lexpos=p.lexpos(2))
+    p[0] = ASTNode('parameter', children=[param_type, param_name], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_function_call(p):
     'expresion : ID LPAREN arguments RPAREN'
-    func_name = ASTNode('identificador', value=p[1], lineno=p.lineno(1))
-    p[0] = ASTNode('function_call', children=[func_name, p[3]], lineno=p.lineno(1))
+    func_name = ASTNode('identificador', value=p[1], lineno=p.lineno(1), lexpos=p.lexpos(1))
+    p[0] = ASTNode('function_call', children=[func_name, p[3]], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_arguments(p):
     '''arguments : argument_list
                 | empty'''
-    p[0] = ASTNode('arguments', children=[p[1]] if p[1] else [], lineno=p.lineno(1))
+    p[0] = ASTNode('arguments', children=[p[1]] if p[1] else [], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_argument_list(p):
     '''argument_list : expresion
                     | argument_list COMMA expresion'''
     if len(p) == 2:
-        p[0] = ASTNode('argument_list', children=[p[1]], lineno=p.lineno(1))
+        p[0] = ASTNode('argument_list', children=[p[1]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     else:
         p[1].children.append(p[3])
         p[0] = p[1]
 
 def p_return_statement(p):
     'sentencia : RETURN expresion SEMICOLON'
-    p[0] = ASTNode('return_statement', children=[p[2]], lineno=p.lineno(1))
+    p[0] = ASTNode('return_statement', children=[p[2]], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_declaracion_variable(p):
     'declaracion_variable : tipo lista_ids SEMICOLON'
-    p[0] = ASTNode('declaracion_variable', children=[p[1], p[2]], lineno=p.lineno(1))
+    p[0] = ASTNode('declaracion_variable', children=[p[1], p[2]], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_lista_ids(p):
     '''lista_ids : ID
                 | lista_ids COMMA ID'''
     if len(p) == 2:
-        p[0] = ASTNode('lista_ids', children=[ASTNode('identificador', value=p[1], lineno=p.lineno(1))], lineno=p.lineno(1))
+        p[0] = ASTNode('lista_ids', children=[ASTNode('identificador', value=p[1], lineno=p.lineno(1), lexpos=p.lexpos(1))], lineno=p.lineno(1), lexpos=p.lexpos(1))
     else:
-        new_id = ASTNode('identificador', value=p[3], lineno=p.lineno(3))
+        new_id = ASTNode('identificador', value=p[3], lineno=p.lineno(3), lexpos=p.lexpos(3))
         p[1].children.append(new_id)
         p[0] = p[1]
 
@@ -275,7 +301,7 @@ def p_tipo(p):
            | FLOAT
            | BOOL
            | STRING'''
-    p[0] = ASTNode('tipo', value=p[1], lineno=p.lineno(1))
+    p[0] = ASTNode('tipo', value=p[1], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_sentencia(p):
     '''sentencia : asignacion
@@ -293,8 +319,8 @@ def p_sentencia(p):
 
 def p_asignacion(p):
     'asignacion : ID EQ expresion SEMICOLON'
-    id_node = ASTNode('identificador', value=p[1], lineno=p.lineno(1))
-    p[0] = ASTNode('asignacion', children=[id_node, p[3]], value='=', lineno=p.lineno(2))
+    id_node = ASTNode('identificador', value=p[1], lineno=p.lineno(1), lexpos=p.lexpos(1))
+    p[0] = ASTNode('asignacion', children=[id_node, p[3]], value='=', lineno=p.lineno(2), lexpos=p.lexpos(2))
 
 # EXPRESIONES
 def p_expresion(p):
@@ -305,9 +331,9 @@ def p_expresion(p):
     if len(p) == 2:
         p[0] = p[1]
     elif p[1] == '!':  # NOT expression
-        p[0] = ASTNode('operacion_unaria', children=[p[2]], value='!', lineno=p.lineno(1))
+        p[0] = ASTNode('operacion_unaria', children=[p[2]], value='!', lineno=p.lineno(1), lexpos=p.lexpos(1))
     else:
-        p[0] = ASTNode('expresion_binaria', children=[p[1], p[3]], value='||', lineno=p.lineno(2))
+        p[0] = ASTNode('expresion_binaria', children=[p[1], p[3]], value='||', lineno=p.lineno(2), lexpos=p.lexpos(2))
         
 def p_expresion_and(p):
     '''expresion_and : expresion_and AND expresion_rel
@@ -315,7 +341,7 @@ def p_expresion_and(p):
     if len(p) == 2:
         p[0] = p[1]
     else:
-        p[0] = ASTNode('expresion_binaria', children=[p[1], p[3]], value='&&', lineno=p.lineno(2))
+        p[0] = ASTNode('expresion_binaria', children=[p[1], p[3]], value='&&', lineno=p.lineno(2), lexpos=p.lexpos(2))
 
 def p_expresion_rel(p):
     '''expresion_rel : expresion_rel relacion expresion_add
@@ -323,7 +349,7 @@ def p_expresion_rel(p):
     if len(p) == 2:
         p[0] = p[1]
     else:
-        p[0] = ASTNode('expresion_binaria', children=[p[1], p[3]], value=p[2], lineno=p.lineno(2))
+        p[0] = ASTNode('expresion_binaria', children=[p[1], p[3]], value=p[2], lineno=p.lineno(2), lexpos=p.lexpos(2))
 
 def p_relacion(p):
     '''relacion : LT
@@ -341,7 +367,7 @@ def p_expresion_add(p):
     if len(p) == 2:
         p[0] = p[1]
     else:
-        p[0] = ASTNode('expresion_binaria', children=[p[1], p[3]], value=p[2], lineno=p.lineno(2))
+        p[0] = ASTNode('expresion_binaria', children=[p[1], p[3]], value=p[2], lineno=p.lineno(2), lexpos=p.lexpos(2))
 
 def p_suma(p):
     '''suma : PLUS
@@ -354,7 +380,7 @@ def p_termino(p):
     if len(p) == 2:
         p[0] = p[1]
     else:
-        p[0] = ASTNode('expresion_binaria', children=[p[1], p[3]], value=p[2], lineno=p.lineno(2))
+        p[0] = ASTNode('expresion_binaria', children=[p[1], p[3]], value=p[2], lineno=p.lineno(2), lexpos=p.lexpos(2))
 
 def p_mult(p):
     '''mult : TIMES
@@ -368,7 +394,7 @@ def p_factor(p):
     if len(p) == 2:
         p[0] = p[1]
     else:
-        p[0] = ASTNode('expresion_unaria', children=[p[2]], value='-', lineno=p.lineno(1))
+        p[0] = ASTNode('expresion_unaria', children=[p[2]], value='-', lineno=p.lineno(1), lexpos=p.lexpos(1))
         
 
 
@@ -381,9 +407,9 @@ def p_componente(p):
     if len(p) == 2:
         if isinstance(p[1], str):  # ID o STRING_LITERAL
             if p.slice[1].type == 'STRING_LITERAL':
-                p[0] = ASTNode('string_literal', value=p[1], lineno=p.lineno(1))
+                p[0] = ASTNode('string_literal', value=p[1], lineno=p.lineno(1), lexpos=p.lexpos(1))
             else:
-                p[0] = ASTNode('identificador', value=p[1], lineno=p.lineno(1))
+                p[0] = ASTNode('identificador', value=p[1], lineno=p.lineno(1), lexpos=p.lexpos(1))
         else:  # numero o booleano
             p[0] = p[1]
     else:
@@ -393,45 +419,52 @@ def p_componente(p):
 def p_numero(p):
     '''numero : NUMBER
              | REAL'''
-    p[0] = ASTNode('numero', value=p[1], lineno=p.lineno(1))
+    p[0] = ASTNode('numero', value=p[1], lineno=p.lineno(1), lexpos=p.lexpos(1))
     
 def p_booleano(p):
     '''booleano : TRUE
                | FALSE'''
-    p[0] = ASTNode('booleano', value=p[1], lineno=p.lineno(1))
+    p[0] = ASTNode('booleano', value=p[1], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 # ESTRUCTURAS DE CONTROL
 def p_seleccion(p):
     '''seleccion : IF LPAREN expresion RPAREN sentencia
                 | IF LPAREN expresion RPAREN sentencia ELSE sentencia'''
     if len(p) == 6:
-        p[0] = ASTNode('if', children=[p[3], p[5]], lineno=p.lineno(1))
+        p[0] = ASTNode('if', children=[p[3], p[5]], lineno=p.lineno(1), lexpos=p.lexpos(1))
     else:
-        p[0] = ASTNode('if_else', children=[p[3], p[5], p[7]], lineno=p.lineno(1))
+        p[0] = ASTNode('if_else', children=[p[3], p[5], p[7]], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_iteracion(p):
     'iteracion : WHILE LPAREN expresion RPAREN sentencia'
-    p[0] = ASTNode('while', children=[p[3], p[5]], lineno=p.lineno(1))
+    p[0] = ASTNode('while', children=[p[3], p[5]], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_repeticion(p):
     'repeticion : DO sentencia WHILE LPAREN expresion RPAREN SEMICOLON'
-    p[0] = ASTNode('do_while', children=[p[2], p[5]], lineno=p.lineno(1))
+    p[0] = ASTNode('do_while', children=[p[2], p[5]], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_sent_in(p):
     'sent_in : CIN OP_IN ID SEMICOLON'
-    var_node = ASTNode('identificador', value=p[3], lineno=p.lineno(3))
-    p[0] = ASTNode('input', children=[var_node], lineno=p.lineno(1))
+    var_node = ASTNode('identificador', value=p[3], lineno=p.lineno(3), lexpos=p.lexpos(3))
+    p[0] = ASTNode('input', children=[var_node], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_sent_out(p):
     'sent_out : COUT OP_OUT expresion SEMICOLON'
-    p[0] = ASTNode('output', children=[p[3]], lineno=p.lineno(1))
+    p[0] = ASTNode('output', children=[p[3]], lineno=p.lineno(1), lexpos=p.lexpos(1))
 
 def p_error(p):
     if p:
-        error_msg = f"Error de sintaxis en '{p.value}' (línea {p.lineno})"
+        error = {'type': 'sintactico', 'line': p.lineno, 'lexpos': p.lexpos}
+        indice = getattr(parser, 'indice_lineas', None)
+        if indice is not None:
+            # Línea y columna físicas a partir del lexpos
+            linea, columna = indice.posicion(p.lexpos)
+            error['line'] = linea
+            error['column'] = columna + 1
+        error['message'] = f"Error de sintaxis en '{p.value}' (línea {error['line']})"
         if not hasattr(parser, 'errors'):
             parser.errors = []
-        parser.errors.append({'type': 'sintactico', 'message': error_msg, 'line': p.lineno})
+        parser.errors.append(error)
     else:
         error_msg = "Error de sintaxis: fin de archivo inesperado"
         if not hasattr(parser, 'errors'):
@@ -439,9 +472,66 @@ def p_error(p):
         parser.errors.append({'type': 'sintactico', 'message': error_msg, 'line': 1})
 
 # Construir el parser
-parser = yacc.yacc()
+def _firma_gramatica():
+    """Huella de la gramática: producciones (docstrings de p_*), tokens y precedencia"""
+    funciones = sorted((f for nombre, f in globals().items()
+                        if nombre.startswith('p_') and nombre != 'p_error' and callable(f)),
+                       key=lambda f: f.__code__.co_firstlineno)
+    producciones = [(f.__name__, f.__doc__) for f in funciones]
+    return cache.huella(yacc.__tabversion__, tokens, precedence, producciones)
+
+def _construir_parser():
+    """Crea el parser LALR con las tablas guardadas en la caché del usuario.
+
+    Con una tabla válida para la huella de la gramática solo se enlazan las
+    acciones p_* por nombre, sin reflexión ni generación LALR. Si no existe
+    se genera con PLY (sin escribir parsetab.py ni parser.out en el
+    directorio actual) y se guarda de forma atómica"""
+    inicio = time.perf_counter()
+    try:
+        ruta = os.path.join(cache.directorio_cache(), f"parser-{_firma_gramatica()}.pickle")
+    except OSError:
+        ruta = None
 
-def parse_code(input_text):
+    if ruta and os.path.exists(ruta):
+        try:
+            tabla = yacc.LRTable()
+            tabla.read_pickle(ruta)
+            tabla.bind_callables(globals())
+            nuevo = yacc.LRParser(tabla, p_error)
+            cache.registrar_arranque('parser', inicio, 'caché')
+            return nuevo
+        except Exception as e:
+            _traza.aviso(f"Tabla del parser inválida, se regenera ({e})")
+
+    modulo = sys.modules[__name__]
+    if ruta is None:
+        nuevo = yacc.yacc(module=modulo, debug=False, write_tables=False)
+    else:
+        construido = []
+        try:
+            cache.reemplazo_atomico(ruta, lambda temporal: construido.append(
+                yacc.yacc(module=modulo, debug=False, picklefile=temporal)))
+        except OSError as e:
+            _traza.aviso(f"No se pudo guardar la tabla del parser: {e}")
+        nuevo = construido[0] if construido else yacc.yacc(module=modulo, debug=False, write_tables=False)
+    cache.registrar_arranque('parser', inicio, 'generado')
+    return nuevo
+
+parser = _construir_parser()
+if _traza.info_activo:
+    _traza.info(f"DEBUG: Arranque del analizador: {cache.reporte_arranque()}")
+
+def parse_code(input_text, indice_lineas=None, tokens=None):
+    """Analiza el texto. indice_lineas es el IndiceLineas del lexer para este
+    mismo texto; si no se pasa, se construye aquí.
+
+    Con tokens (TokenBuffer de este texto) el parser consume esos tokens en
+    lugar de volver a tokenizar; tokens también puede ser una función sin
+    argumentos que lo devuelve. Las líneas empiezan siempre en 1.
+
+    El resultado queda en la caché de artefactos por el contenido del texto:
+    si ya está, no se tokeniza ni se analiza (ni se llama a tokens)"""
     # Importar aquí para evitar circularidad
     global lexer
     if lexer is None:
@@ -462,19 +552,343 @@ def parse_code(input_text):
             'success': False
         }
     
-    lexer.input(input_text)
+    resultado = cache.cargar_artefacto('ast', (input_text,))
+    if resultado is not None:
+        return resultado
+    
+    if callable(tokens):
+        tokens = tokens()
+    if indice_lineas is None:
+        if tokens is not None:
+            indice_lineas = tokens.indice_lineas()
+        else:
+            from lexico import IndiceLineas
+            indice_lineas = IndiceLineas.desde_texto(input_text)
+    
     parser.errors = []
+    parser.indice_lineas = indice_lineas
     
     try:
-        ast = parser.parse(input_text, lexer=lexer, debug=False)
-        return {
+        if tokens is not None:
+            siguiente = functools.partial(next, tokens.lextokens(), None)
+            ast = parser.parse(None, lexer=lexer, debug=False, tokenfunc=siguiente)
+        else:
+            # Sin arrastrar el lineno de análisis anteriores
+            lexer.lineno = 1
+            lexer.input(input_text)
+            ast = parser.parse(input_text, lexer=lexer, debug=False)
+        resultado = {
             'ast': ast,
             'errors': getattr(parser, 'errors', []),
-            'success': len(getattr(parser, 'errors', [])) == 0
+            'success': len(getattr(parser, 'errors', [])) == 0,
+            'indice_lineas': indice_lineas
         }
     except Exception as e:
         return {
             'ast': None,
             'errors': [{'type': 'fatal', 'message': str(e)}],
             'success': False
-        }
\ No newline at end of file
+        }
+    cache.guardar_artefacto('ast', (input_text,), resultado)
+    return resultado
+
+def contar_nodos(raiz):
+    """Cantidad de ASTNode del árbol (recorrido iterativo)"""
+    if not isinstance(raiz, ASTNode):
+        return 0
+    total = 0
+    pila = [raiz]
+    while pila:
+        nodo = pila.pop()
+        total += 1
+        pila.extend(hijo for hijo in nodo.children if isinstance(hijo, ASTNode))
+    return total
+
+# ============================================================
+# AST COMPACTO (ARENA DE ARRAYS PARALELOS)
+# ============================================================
+# Tipo reservado para hijos que no son ASTNode (p. ej. el str de STRING_LITERAL)
+_HIJO_CRUDO = 255
+_NINGUNO = -1
+
+class ASTArena:
+    """AST guardado en arrays paralelos indexados por nodo:
+    tipo, índice del valor internado, primer hijo, siguiente hermano, línea y lexpos.
+
+    Los nodos se recorren con NodoArena, un manejador ligero con la misma
+    interfaz que ASTNode, así que los análisis semántico e intermedio
+    funcionan sin cambios. func_name se guarda aparte porque solo lo tienen
+    unos pocos nodos. Los manejadores del mismo índice son iguales y tienen el
+    mismo hash, así que sirven de clave en las tablas de los análisis."""
+
+    def __init__(self):
+        self.tipos = array('B')
+        self.valores = array('I')
+        self.primer_hijo = array('i')
+        self.siguiente = array('i')
+        self.lineas = array('i')
+        self.posiciones = array('i')
+        self.nombres_tipo = []
+        self._indice_tipo = {}
+        self.valores_internados = [None]
+        self._indice_valor = {}
+        self.func_names = {}
+
+    @classmethod
+    def desde_ast(cls, raiz):
+        """Copia un árbol de ASTNode (recorrido iterativo, sin recursión)"""
+        arena = cls()
+        if raiz is None:
+            return arena
+        pila = [(raiz, arena._agregar(raiz))]
+        primer_hijo = arena.primer_hijo
+        siguiente = arena.siguiente
+        while pila:
+            nodo, indice = pila.pop()
+            anterior = _NINGUNO
+            for hijo in nodo.children:
+                i = arena._agregar(hijo)
+                if anterior == _NINGUNO:
+                    primer_hijo[indice] = i
+                else:
+                    siguiente[anterior] = i
+                anterior = i
+                if isinstance(hijo, ASTNode) and hijo.children:
+                    pila.append((hijo, i))
+        return arena
+
+    def _internar(self, valor):
+        if valor is None:
+            return 0
+        # 1 == 1.0 == True en un dict, así que los valores no-str se distinguen por su clase
+        clave = valor if valor.__class__ is str else (valor.__class__, valor)
+        indice = self._indice_valor.get(clave)
+        if indice is None:
+            indice = len(self.valores_internados)
+            self._indice_valor[clave] = indice
+            self.valores_internados.append(valor)
+        return indice
+
+    def _agregar(self, nodo):
+        indice = len(self.tipos)
+        if isinstance(nodo, ASTNode):
+            id_tipo = self._indice_tipo.get(nodo.type)
+            if id_tipo is None:
+                id_tipo = len(self.nombres_tipo)
+                if id_tipo == _HIJO_CRUDO:
+                    raise ValueError("Demasiados tipos de nodo para la arena")
+                self._indice_tipo[nodo.type] = id_tipo
+                self.nombres_tipo.append(nodo.type)
+            self.tipos.append(id_tipo)
+            self.valores.append(self._internar(nodo.value))
+            self.lineas.append(_NINGUNO if nodo.lineno is None else nodo.lineno)
+            self.posiciones.append(_NINGUNO if nodo.lexpos is None else nodo.lexpos)
+            if hasattr(nodo, 'func_name'):
+                self.func_names[indice] = nodo.func_name
+        else:
+            self.tipos.append(_HIJO_CRUDO)
+            self.valores.append(self._internar(nodo))
+            self.lineas.append(_NINGUNO)
+            self.posiciones.append(_NINGUNO)
+        self.primer_hijo.append(_NINGUNO)
+        self.siguiente.append(_NINGUNO)
+        return indice
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def nodo(self, indice):
+        """NodoArena del índice (o el valor tal cual si es un hijo crudo)"""
+        if self.tipos[indice] == _HIJO_CRUDO:
+            return self.valores_internados[self.valores[indice]]
+        return NodoArena(self, indice)
+
+    def raiz(self):
+        return self.nodo(0) if len(self.tipos) else None
+
+    def a_ast(self):
+        """Árbol de ASTNode equivalente (sin recursión); inverso de desde_ast"""
+        if not len(self.tipos):
+            return None
+        internados, nombres_tipo = self.valores_internados, self.nombres_tipo
+        nodos = []
+        for id_tipo, valor, linea, posicion in zip(self.tipos, self.valores, self.lineas, self.posiciones):
+            if id_tipo == _HIJO_CRUDO:
+                nodos.append(internados[valor])
+            else:
+                nodos.append(ASTNode(nombres_tipo[id_tipo], value=internados[valor],
+                                     lineno=None if linea == _NINGUNO else linea,
+                                     lexpos=None if posicion == _NINGUNO else posicion))
+        siguiente = self.siguiente
+        for indice, primero in enumerate(self.primer_hijo):
+            if primero != _NINGUNO:
+                hijos = []
+                i = primero
+                while i != _NINGUNO:
+                    hijos.append(nodos[i])
+                    i = siguiente[i]
+                nodos[indice].children = hijos
+        for indice, nombre in self.func_names.items():
+            nodos[indice].func_name = nombre
+        return nodos[0]
+
+    def bytes_por_nodo(self):
+        columnas = (self.tipos, self.valores, self.primer_hijo, self.siguiente, self.lineas, self.posiciones)
+        return sum(columna.itemsize for columna in columnas)
+
+class NodoArena(ASTNode):
+    """Manejador de un nodo de ASTArena con la interfaz de ASTNode"""
+    __slots__ = ('arena', 'indice')
+
+    def __init__(self, arena, indice):
+        self.arena = arena
+        self.indice = indice
+
+    def __reduce__(self):
+        return (NodoArena, (self.arena, self.indice))
+
+    @property
+    def type(self):
+        return self.arena.nombres_tipo[self.arena.tipos[self.indice]]
+
+    @property
+    def value(self):
+        return self.arena.valores_internados[self.arena.valores[self.indice]]
+
+    @property
+    def lineno(self):
+        linea = self.arena.lineas[self.indice]
+        return None if linea == _NINGUNO else linea
+
+    @property
+    def lexpos(self):
+        posicion = self.arena.posiciones[self.indice]
+        return None if posicion == _NINGUNO else posicion
+
+    @property
+    def children(self):
+        arena = self.arena
+        hijos = []
+        i = arena.primer_hijo[self.indice]
+        while i != _NINGUNO:
+            hijos.append(arena.nodo(i))
+            i = arena.siguiente[i]
+        return hijos
+
+    @property
+    def func_name(self):
+        try:
+            return self.arena.func_names[self.indice]
+        except KeyError:
+            raise AttributeError('func_name') from None
+
+    @func_name.setter
+    def func_name(self, valor):
+        self.arena.func_names[self.indice] = valor
+
+    def __eq__(self, otro):
+        return isinstance(otro, NodoArena) and otro.arena is self.arena and otro.indice == self.indice
+
+    def __hash__(self):
+        return hash((id(self.arena), self.indice))
+
+def _ast_desde_arena(arena):
+    """Reconstruye un ASTNode guardado con pickle (ver ASTNode.__reduce__)"""
+    return arena.a_ast()
+
+# ============================================================
+# BENCHMARK DE MEMORIA DEL AST
+# ============================================================
+def _programa_sintetico(sentencias):
+    """Programa válido para la gramática con el número de sentencias dado"""
+    plantillas = (
+        "    a = b + {i} * (c - 1);\n",
+        "    if (a > {i}) cout << a; else b = b - 1;\n",
+        "    x = x * 2.5 + a;\n",
+        "    while (a < {i}) a = a + 1;\n",
+        "    cout << \"texto\";\n",
+        "    cin >> c;\n",
+    )
+    partes = ["main {\n", "    int a, b, c;\n", "    float x;\n"]
+    for i in range(sentencias):
+        partes.append(plantillas[i % len(plantillas)].format(i=i))
+    partes.append("}\n")
+    return ''.join(partes)
+
+def _tamano_ast_objetos(raiz):
+    """Bytes de un árbol de ASTNode: nodos, listas de hijos y valores distintos"""
+    vistos = set()
+    total = 0
+    pila = [raiz]
+    while pila:
+        objeto = pila.pop()
+        if id(objeto) in vistos:
+            continue
+        vistos.add(id(objeto))
+        total += sys.getsizeof(objeto)
+        if isinstance(objeto, ASTNode):
+            pila.append(objeto.children)
+            pila.append(objeto.value)
+            pila.extend(objeto.children)
+    return total
+
+def _tamano_arena(arena):
+    """Bytes de la arena: arrays, tabla de valores internados y sus valores"""
+    total = sum(sys.getsizeof(columna) for columna in (
+        arena.tipos, arena.valores, arena.primer_hijo, arena.siguiente, arena.lineas, arena.posiciones))
+    total += sys.getsizeof(arena.valores_internados) + sys.getsizeof(arena._indice_valor)
+    total += sum(sys.getsizeof(valor) for valor in arena.valores_internados)
+    return total
+
+def benchmark_ast(sentencias=100000):
+    """Compara la memoria del AST de objetos con la de ASTArena y verifica que
+    los análisis semántico e intermedio den lo mismo con ambos"""
+    from semantico import SemanticAnalyzer
+    from intermedio import generate_intermediate_code
+
+    texto = _programa_sintetico(sentencias)
+    # Se mide el análisis, no la caché de artefactos
+    artefactos = cache.ARTEFACTOS_ACTIVOS
+    cache.ARTEFACTOS_ACTIVOS = False
+    try:
+        inicio = time.perf_counter()
+        resultado = parse_code(texto)
+        t_parse = time.perf_counter() - inicio
+        if not resultado['success']:
+            print("El programa sintético no se pudo analizar:", resultado['errors'][:3])
+            return None
+        raiz = resultado['ast']
+
+        inicio = time.perf_counter()
+        arena = ASTArena.desde_ast(raiz)
+        t_arena = time.perf_counter() - inicio
+
+        bytes_objetos = _tamano_ast_objetos(raiz)
+        bytes_arena = _tamano_arena(arena)
+        nodos = len(arena)
+
+        # Equivalencia sobre el mismo programa completo
+        salidas = []
+        for ast in (raiz, arena.raiz()):
+            analizador = SemanticAnalyzer()
+            errores = analizador.analyze(ast)
+            tabla = analizador.get_symbol_table_data()
+            cuadruplos, _ = generate_intermediate_code(ast, tabla)
+            salidas.append((errores, tabla, analizador.get_semantic_tree(), cuadruplos))
+        equivalentes = salidas[0] == salidas[1]
+    finally:
+        cache.ARTEFACTOS_ACTIVOS = artefactos
+
+    print(f"=== BENCHMARK AST ({sentencias} sentencias, {nodos} nodos) ===")
+    print(f"Análisis sintáctico:  {t_parse:.2f} s; conversión a arena: {t_arena:.2f} s")
+    print(f"ASTNode (objetos):    {bytes_objetos / 1e6:8.2f} MB  ({bytes_objetos / nodos:6.1f} bytes/nodo)")
+    print(f"ASTArena (arrays):    {bytes_arena / 1e6:8.2f} MB  ({bytes_arena / nodos:6.1f} bytes/nodo)")
+    print(f"Reducción:            {bytes_objetos / bytes_arena:.1f}x")
+    print(f"Semántico e intermedio iguales en ambos: {'sí' if equivalentes else 'NO'}")
+    return {'nodos': nodos, 'bytes_objetos': bytes_objetos, 'bytes_arena': bytes_arena,
+            'equivalentes': equivalentes}
+
+if __name__ == "__main__":
+    # Desde el módulo importado, para que ASTNode sea la misma clase que usan semantico e intermedio
+    import sintactico
+    sintactico.benchmark_ast()
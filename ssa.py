@@ -0,0 +1,401 @@
+# ssa.py - Forma SSA del código intermedio: funciones φ, renombrado y vuelta a cuádruplos
+import gc
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from itertools import compress, repeat
+
+import traza
+from cuadruplos import (ASIGNAR, OPERACION, SALIDA, ENTRADA, SALTO, SALTO_SI, SALTO_SI_NO,
+                        Etiqueta, ProgramaCuadruplos)
+from flujo import GrafoFlujo, Dominadores
+
+_traza = traza.canal('ssa')
+
+# Códigos que leen la columna izquierdos (OPERACION lee además derechos) y
+# códigos que definen su destino
+USAN_IZQUIERDO = frozenset((ASIGNAR, OPERACION, SALIDA, SALTO_SI, SALTO_SI_NO))
+DEFINEN = frozenset((ASIGNAR, OPERACION, ENTRADA))
+
+@contextmanager
+def sin_recolector():
+    """Pausa el recolector de ciclos. Construir la forma SSA crea cientos de
+    miles de objetos que sobreviven hasta el final, y cada recolección completa
+    recorre además todo lo que la sesión ya tiene en memoria (tokens, AST)"""
+    activo = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if activo:
+            gc.enable()
+
+class Fi:
+    """destino = φ(argumentos) al comienzo de un bloque: un argumento por
+    arista de entrada, en el orden de FormaSSA.aristas[bloque]. variable es
+    el nombre original; todos son ids de operandos"""
+    __slots__ = ('destino', 'variable', 'argumentos')
+
+    def __init__(self, destino, variable, argumentos):
+        self.destino = destino
+        self.variable = variable
+        self.argumentos = argumentos
+
+    def __repr__(self):
+        return f"<Fi {self.destino} = φ{tuple(self.argumentos)}>"
+
+class FormaSSA:
+    """Un programa en forma SSA: cada nombre renombrado tiene una sola
+    definición (x.1, x.2...) y en los puntos de unión una φ elige la versión
+    según el bloque del que se llega.
+
+    Se renombran los nombres que se definen más de una vez o que se leen
+    fuera del bloque de su definición o antes de ella (SSA semipodada: solo
+    esos pueden necesitar φ); los demás, casi todos los temporales, conservan
+    su nombre. El nombre original es el valor que tiene la variable al
+    comenzar el programa.
+
+    programa: copia renombrada del ProgramaCuadruplos (comparte los operandos)
+    grafo, dominadores: su GrafoFlujo y sus Dominadores
+    aristas[b]: índices de los predecesores del bloque b; la entrada tiene
+    además None, el inicio del programa
+    fis[b]: las φ del bloque b
+    original: id de cada versión -> id del nombre original
+    conservar: 1 por cuádruplo; los que una pasada pone en 0 no llegan al
+    programa que devuelve destruir()
+
+    destruir() devuelve un ProgramaCuadruplos sin φ. Mientras la forma sea
+    convencional (nunca hay dos versiones del mismo nombre vivas a la vez,
+    como recién construida) basta con devolver a cada versión su nombre; si
+    no, cada φ se reemplaza por copias en sus predecesores. Una transformación
+    que pueda romper esa propiedad (propagar copias, mover código) debe poner
+    convencional = False"""
+
+    def __init__(self, programa):
+        self.programa = ProgramaCuadruplos.desde_dicts(programa).copia()
+        self.original = {}
+        self.conservar = bytearray(b'\x01') * len(self.programa)
+        self.convencional = True
+        self._versiones = {}
+        with sin_recolector():
+            self.grafo = GrafoFlujo(self.programa)
+            self.dominadores = Dominadores(self.grafo)
+            self.aristas = [[p.indice for p in bloque.predecesores] for bloque in self.grafo]
+            if self.aristas:
+                self.aristas[0].append(None)
+            self.fis = [[] for _ in self.grafo]
+            if len(self.programa):
+                globales, bloques_definicion, renombrar = self._analizar()
+                self._insertar_fis(globales, bloques_definicion)
+                self._renombrar(renombrar)
+                self._podar_fis()
+        if _traza.info_activo:
+            _traza.info(f"SSA: {len(self.grafo)} bloques, {sum(map(len, self.fis))} φ, "
+                        f"{len(self.original)} versiones")
+
+    # ------------------------------------------------------------
+    # CONSTRUCCIÓN
+    # ------------------------------------------------------------
+    def _analizar(self):
+        """(globales, bloques donde se define cada global, nombres a renombrar).
+
+        Un nombre es global si se lee fuera del bloque de su única definición o
+        antes de ella; los que se definen más de una vez y se leen se toman
+        como globales sin mirar dónde (a lo sumo sobra alguna φ)"""
+        programa = self.programa
+        bloque_de = array('I')
+        for bloque in self.grafo:
+            bloque_de.extend(repeat(bloque.indice, len(bloque)))
+
+        filas_definicion = list(programa.filas(*DEFINEN))
+        definidos = list(programa.ids('destinos', *DEFINEN))
+        varias = {nombre for nombre, cuenta in Counter(definidos).items() if cuenta > 1}
+        definicion = dict(zip(definidos, filas_definicion))
+
+        # Usos: (fila, nombre) de las columnas que se leen. Las constantes y
+        # los nombres sin definición no tienen fila de definición
+        usos = [(programa.filas(*USAN_IZQUIERDO), programa.ids('izquierdos', *USAN_IZQUIERDO)),
+                (programa.filas(OPERACION), programa.ids('derechos', OPERACION))]
+        globales = set()
+        for filas, nombres in usos:
+            for fila, nombre in zip(filas, nombres):
+                fila_definicion = definicion.get(nombre)
+                if fila_definicion is None or nombre in globales:
+                    continue
+                if (fila_definicion > fila or nombre in varias
+                        or bloque_de[fila_definicion] != bloque_de[fila]):
+                    globales.add(nombre)
+
+        bloques_definicion = {}
+        es_global = map(globales.__contains__, definidos)
+        for fila, nombre in compress(zip(filas_definicion, definidos), es_global):
+            bloques_definicion.setdefault(nombre, set()).add(bloque_de[fila])
+        return globales, bloques_definicion, globales | varias
+
+    def _insertar_fis(self, globales, bloques_definicion):
+        """Una φ por nombre global en la frontera de dominancia iterada de los
+        bloques que lo definen"""
+        frontera = self.dominadores.frontera
+        for nombre in sorted(globales):
+            definiciones = bloques_definicion.get(nombre)
+            if not definiciones:
+                continue
+            con_fi = set()
+            pendientes = list(definiciones)
+            vistos = set(definiciones)
+            while pendientes:
+                for union in frontera[pendientes.pop()]:
+                    if union in con_fi:
+                        continue
+                    con_fi.add(union)
+                    self.fis[union].append(Fi(nombre, nombre, [nombre] * len(self.aristas[union])))
+                    if union not in vistos:
+                        vistos.add(union)
+                        pendientes.append(union)
+
+    def _nueva_version(self, nombre):
+        operandos = self.programa.operandos
+        numero = self._versiones.get(nombre, 0) + 1
+        self._versiones[nombre] = numero
+        texto = f"{operandos.valores[nombre]}.{numero}"
+        # Como en operacion_temporal: la versión casi siempre es nueva y tiene
+        # la clase de su nombre
+        version = operandos._ids.get(texto)
+        if version is None:
+            version = operandos._ids[texto] = len(operandos.valores)
+            operandos.valores.append(texto)
+            operandos.clases.append(operandos.clases[nombre])
+        self.original[version] = nombre
+        return version
+
+    def _renombrar(self, renombrar):
+        """Recorre el árbol de dominadores (sin recursión) con una pila de
+        versiones por nombre: cada uso lee la versión del tope.
+
+        No hace falta mirar los códigos: los campos que un código no usa son 0
+        y las etiquetas son operandos distintos de los nombres, así que un id
+        de renombrar en destinos es una definición y en izquierdos o derechos,
+        un uso. Solo se visitan las filas que tienen alguno"""
+        programa = self.programa
+        destinos, izquierdos, derechos = programa.destinos, programa.izquierdos, programa.derechos
+        bloques, hijos = self.grafo.bloques, self.dominadores.hijos
+        nueva = self._nueva_version
+        pilas = {nombre: [] for nombre in renombrar}
+        relevantes = bytes(map(max, *(map(pilas.__contains__, columna)
+                                      for columna in (destinos, izquierdos, derechos))))
+
+        pendientes = [(self.dominadores.orden[0], None)]
+        while pendientes:
+            indice, empujados = pendientes.pop()
+            if empujados is not None:
+                # Salida del subárbol: se descartan las versiones del bloque
+                for nombre in empujados:
+                    pilas[nombre].pop()
+                continue
+            empujados = []
+            for fi in self.fis[indice]:
+                fi.destino = nueva(fi.variable)
+                pilas[fi.variable].append(fi.destino)
+                empujados.append(fi.variable)
+            bloque = bloques[indice]
+            for i in compress(bloque.filas(), relevantes[bloque.inicio:bloque.fin]):
+                # Primero los usos: en x = x + 1 se lee la versión anterior
+                pila = pilas.get(izquierdos[i])
+                if pila:
+                    izquierdos[i] = pila[-1]
+                pila = pilas.get(derechos[i])
+                if pila:
+                    derechos[i] = pila[-1]
+                nombre = destinos[i]
+                if nombre in pilas:
+                    destinos[i] = version = nueva(nombre)
+                    pilas[nombre].append(version)
+                    empujados.append(nombre)
+            for sucesor in bloque.sucesores:
+                posicion = self.aristas[sucesor.indice].index(indice)
+                for fi in self.fis[sucesor.indice]:
+                    pila = pilas[fi.variable]
+                    if pila:
+                        fi.argumentos[posicion] = pila[-1]
+            pendientes.append((indice, empujados))
+            pendientes.extend((hijo, None) for hijo in reversed(hijos[indice]))
+
+        # Los bloques inalcanzables no están en el árbol: sus definiciones
+        # también reciben versiones propias, para que el nombre original siga
+        # siendo solo el valor inicial
+        for bloque in self.grafo:
+            if self.dominadores.alcanzable(bloque.indice):
+                continue
+            locales = {}
+            for i in compress(bloque.filas(), relevantes[bloque.inicio:bloque.fin]):
+                izquierdos[i] = locales.get(izquierdos[i], izquierdos[i])
+                derechos[i] = locales.get(derechos[i], derechos[i])
+                nombre = destinos[i]
+                if nombre in pilas:
+                    destinos[i] = locales[nombre] = nueva(nombre)
+
+    def _podar_fis(self):
+        """Quita las φ cuyo valor nunca se lee: ni un cuádruplo ni una φ que
+        se conserva lo usan (la SSA semipodada pone φ también donde la
+        variable ya está muerta)"""
+        programa = self.programa
+        leidos = set(programa.izquierdos)
+        leidos.update(programa.derechos)
+        por_destino = {fi.destino: fi for fis in self.fis for fi in fis}
+        vivas = set()
+        pendientes = [destino for destino in por_destino if destino in leidos]
+        while pendientes:
+            destino = pendientes.pop()
+            if destino in vivas:
+                continue
+            vivas.add(destino)
+            pendientes.extend(argumento for argumento in por_destino[destino].argumentos
+                              if argumento in por_destino and argumento not in vivas)
+        if len(vivas) < len(por_destino):
+            self.fis = [[fi for fi in fis if fi.destino in vivas] for fis in self.fis]
+
+    # ------------------------------------------------------------
+    # DESTRUCCIÓN
+    # ------------------------------------------------------------
+    def destruir(self):
+        """ProgramaCuadruplos equivalente sin φ (ver la clase)"""
+        if self.convencional:
+            programa = self._destruir_renombrando()
+            return programa if all(self.conservar) else programa.filtrar(self.conservar)
+        return self._destruir_con_copias()
+
+    def _destruir_renombrando(self):
+        programa = self.programa.copia()
+        if not self.original:
+            return programa
+        mapa = list(range(len(programa.operandos)))
+        for version, nombre in self.original.items():
+            mapa[version] = nombre
+        for columna in ('destinos', 'izquierdos', 'derechos'):
+            setattr(programa, columna, array('I', map(mapa.__getitem__, getattr(programa, columna))))
+        return programa
+
+    def _destruir_con_copias(self):
+        """Cada φ pasa a ser una copia al final de cada predecesor. Si el
+        predecesor termina en un salto condicional la arista se parte: las
+        copias de la rama que cae van justo después del salto y las de la
+        rama que salta, en un bloque nuevo al final del programa"""
+        origen = self.programa
+        operandos = origen.operandos
+        nuevo = ProgramaCuadruplos(operandos)
+        codigos = origen.codigos
+        etiquetas = self._etiquetas_nuevas()
+
+        prologo = []
+        al_final = {}       # bloque -> copias antes de su último salto (o al final)
+        tras_salto = {}     # bloque -> copias de la rama que cae
+        redirigir = {}      # fila de un salto condicional -> etiqueta del bloque partido
+        partidos = []       # (etiqueta, copias, etiqueta destino)
+        for bloque in self.grafo:
+            fis = self.fis[bloque.indice]
+            if not fis:
+                continue
+            for posicion, predecesor in enumerate(self.aristas[bloque.indice]):
+                copias = self._secuenciar([(fi.destino, fi.argumentos[posicion]) for fi in fis
+                                           if fi.destino != fi.argumentos[posicion]])
+                if not copias:
+                    continue
+                if predecesor is None:
+                    prologo.extend(copias)
+                    continue
+                anterior = self.grafo[predecesor]
+                ultima = anterior.fin - 1
+                if codigos[ultima] in (SALTO_SI, SALTO_SI_NO):
+                    if self.grafo.por_etiqueta.get(operandos.valores[origen.destinos[ultima]]) is bloque:
+                        etiqueta = next(etiquetas)
+                        redirigir[ultima] = operandos.id(etiqueta)
+                        partidos.append((etiqueta, copias, bloque.etiqueta))
+                    if predecesor + 1 == bloque.indice:
+                        tras_salto.setdefault(predecesor, []).extend(copias)
+                else:
+                    al_final.setdefault(predecesor, []).extend(copias)
+
+        def copiar(copias):
+            for destino, fuente in copias:
+                nuevo.agregar(ASIGNAR, destino=destino, izquierdo=fuente)
+
+        copiar(prologo)
+        columnas = (origen.codigos, origen.destinos, origen.operadores, origen.izquierdos, origen.derechos)
+        for bloque in self.grafo:
+            ultima = bloque.fin - 1
+            copias = al_final.get(bloque.indice)
+            antes = ultima if copias and codigos[ultima] == SALTO else bloque.fin
+            for i in compress(range(bloque.inicio, antes), self.conservar[bloque.inicio:antes]):
+                codigo, destino, operador, izquierdo, derecho = (columna[i] for columna in columnas)
+                nuevo.agregar(codigo, redirigir.get(i, destino), operador, izquierdo, derecho)
+            if copias:
+                copiar(copias)
+                if antes == ultima:
+                    nuevo.agregar(SALTO, destino=origen.destinos[ultima])
+            copiar(tras_salto.get(bloque.indice, ()))
+        if partidos:
+            fin = next(etiquetas)
+            nuevo.salto(fin)
+            for etiqueta, copias, destino in partidos:
+                nuevo.etiqueta(etiqueta)
+                copiar(copias)
+                nuevo.salto(destino)
+            nuevo.etiqueta(fin)
+        return nuevo
+
+    def _etiquetas_nuevas(self):
+        """Etiquetas que no están en el programa: LS0, LS1..."""
+        numero = 0
+        while True:
+            etiqueta = Etiqueta(f"LS{numero}")
+            numero += 1
+            if etiqueta not in self.grafo.por_etiqueta:
+                yield etiqueta
+
+    def _secuenciar(self, copias):
+        """Copias paralelas (destino, fuente) en un orden secuencial
+        equivalente; un ciclo (a = b, b = a) se rompe con un temporal"""
+        pendientes = dict(copias)
+        resultado = []
+        while pendientes:
+            fuentes = set(pendientes.values())
+            listos = [destino for destino in pendientes if destino not in fuentes]
+            if listos:
+                for destino in listos:
+                    resultado.append((destino, pendientes.pop(destino)))
+                continue
+            destino = next(iter(pendientes))
+            temporal = self._temporal_nuevo()
+            resultado.append((temporal, destino))
+            for otro, fuente in pendientes.items():
+                if fuente == destino:
+                    pendientes[otro] = temporal
+        return resultado
+
+    def _temporal_nuevo(self):
+        operandos = self.programa.operandos
+        numero = len(operandos)
+        while f"temp_copia{numero}" in operandos._ids:
+            numero += 1
+        return operandos.id(f"temp_copia{numero}")
+
+    # ------------------------------------------------------------
+    # LISTADO
+    # ------------------------------------------------------------
+    def texto(self, titulo):
+        """Listado numerado por bloques, con las φ al comienzo de cada uno"""
+        programa = self.programa
+        valores = programa.operandos.valores
+        lineas = [f"=== {titulo} ==="]
+        for bloque in self.grafo:
+            sucesores = ", ".join(f"B{s.indice}" for s in bloque.sucesores) or "fin"
+            lineas.append(f"B{bloque.indice} -> {sucesores}")
+            filas = iter(bloque.filas())
+            if bloque.etiqueta is not None:
+                i = next(filas)
+                lineas.append(f"{i:3d}. {programa.instruccion(i)}")
+            for fi in self.fis[bloque.indice]:
+                argumentos = ", ".join(str(valores[a]) for a in fi.argumentos)
+                lineas.append(f"     {valores[fi.destino]} = φ({argumentos})")
+            lineas.extend(f"{i:3d}. {programa.instruccion(i)}" for i in filas)
+        return "\n".join(lineas) + "\n"
@@ -0,0 +1,253 @@
+# tabla_hash.py - Tabla hash con encadenamiento que crece según su factor de carga
+import time
+import zlib
+
+class NodoHash:
+    """Entrada de una cadena: clave, valor (el símbolo) y la siguiente entrada"""
+    __slots__ = ('clave', 'hash', 'simbolo', 'siguiente')
+
+    def __init__(self, clave, hash_clave, simbolo, siguiente=None):
+        self.clave = clave
+        self.hash = hash_clave
+        self.simbolo = simbolo
+        self.siguiente = siguiente
+
+def hash_nombre(nombre):
+    """Hash de la cadena completa (CRC-32): igual en todas las ejecuciones,
+    así que el índice que muestra la pestaña Hash no cambia entre corridas"""
+    return zlib.crc32(nombre.encode('utf-8'))
+
+class TablaHash:
+    """Tabla hash de símbolos por nombre con listas enlazadas por índice.
+
+    insertar() agrega la entrada al inicio de su cadena aunque la clave ya
+    exista, así que una clave puede tener varias entradas y la más reciente
+    oculta a las anteriores (como una variable local a una global); buscar()
+    devuelve la más reciente y eliminar() la quita dejando visible la anterior.
+    Además se comporta como un dict (tabla[clave], in, del, get), por lo que
+    puede reemplazar al dict de SymbolTable.
+
+    Cuando elementos / tamaño supera factor_carga, la tabla duplica su tamaño
+    y reubica las entradas: insertar, buscar y eliminar son O(1) en promedio"""
+
+    def __init__(self, tamaño=8, factor_carga=0.75):
+        if tamaño < 1:
+            raise ValueError("El tamaño de la tabla hash debe ser al menos 1")
+        if factor_carga <= 0:
+            raise ValueError("El factor de carga debe ser positivo")
+        self.tamaño = tamaño
+        self.factor_carga = factor_carga
+        self.tabla = [None] * tamaño
+        self.elementos = 0
+        self.redimensionamientos = 0
+        # Búsquedas hechas y entradas comparadas en ellas
+        self.busquedas = 0
+        self.sondeos = 0
+
+    def _hash(self, nombre):
+        """Índice de la cadena donde va el nombre"""
+        return hash_nombre(nombre) % self.tamaño
+
+    def _nodo(self, clave):
+        """Entrada más reciente de la clave (o None); cuenta los sondeos"""
+        hash_clave = hash_nombre(clave)
+        actual = self.tabla[hash_clave % self.tamaño]
+        self.busquedas += 1
+        while actual is not None:
+            self.sondeos += 1
+            if actual.hash == hash_clave and actual.clave == clave:
+                return actual
+            actual = actual.siguiente
+        return None
+
+    def insertar(self, simbolo, clave=None):
+        """Agrega el símbolo al inicio de su cadena (clave: simbolo['nombre'])"""
+        if clave is None:
+            clave = simbolo['nombre']
+        hash_clave = hash_nombre(clave)
+        indice = hash_clave % self.tamaño
+        self.tabla[indice] = NodoHash(clave, hash_clave, simbolo, self.tabla[indice])
+        self.elementos += 1
+        if self.elementos > self.tamaño * self.factor_carga:
+            self._redimensionar(self.tamaño * 2)
+
+    def buscar(self, clave, defecto=None):
+        """Símbolo más reciente con esa clave, o defecto"""
+        nodo = self._nodo(clave)
+        return defecto if nodo is None else nodo.simbolo
+
+    def eliminar(self, clave):
+        """Quita la entrada más reciente de la clave y devuelve su símbolo"""
+        hash_clave = hash_nombre(clave)
+        indice = hash_clave % self.tamaño
+        anterior = None
+        actual = self.tabla[indice]
+        self.busquedas += 1
+        while actual is not None:
+            self.sondeos += 1
+            if actual.hash == hash_clave and actual.clave == clave:
+                if anterior is None:
+                    self.tabla[indice] = actual.siguiente
+                else:
+                    anterior.siguiente = actual.siguiente
+                self.elementos -= 1
+                return actual.simbolo
+            anterior = actual
+            actual = actual.siguiente
+        raise KeyError(clave)
+
+    def _redimensionar(self, nuevo_tamaño):
+        """Reubica todas las entradas en una tabla de nuevo_tamaño índices.
+
+        Las entradas de una misma clave están en la misma cadena y conservan
+        su orden (la más reciente sigue primero)"""
+        anterior = self.tabla
+        self.tabla = tabla = [None] * nuevo_tamaño
+        self.tamaño = nuevo_tamaño
+        for cabeza in anterior:
+            cadena = []
+            while cabeza is not None:
+                cadena.append(cabeza)
+                cabeza = cabeza.siguiente
+            for nodo in reversed(cadena):
+                indice = nodo.hash % nuevo_tamaño
+                nodo.siguiente = tabla[indice]
+                tabla[indice] = nodo
+        self.redimensionamientos += 1
+
+    # Interfaz de dict: una entrada por clave
+    def __getitem__(self, clave):
+        nodo = self._nodo(clave)
+        if nodo is None:
+            raise KeyError(clave)
+        return nodo.simbolo
+
+    def __setitem__(self, clave, simbolo):
+        nodo = self._nodo(clave)
+        if nodo is None:
+            self.insertar(simbolo, clave)
+        else:
+            nodo.simbolo = simbolo
+
+    def __delitem__(self, clave):
+        self.eliminar(clave)
+
+    def __contains__(self, clave):
+        return self._nodo(clave) is not None
+
+    def get(self, clave, defecto=None):
+        return self.buscar(clave, defecto)
+
+    def __len__(self):
+        return self.elementos
+
+    def __iter__(self):
+        """Claves de todas las entradas, índice por índice"""
+        for cabeza in self.tabla:
+            while cabeza is not None:
+                yield cabeza.clave
+                cabeza = cabeza.siguiente
+
+    def obtener_todos(self):
+        """Obtiene todos los símbolos organizados por índice"""
+        resultado = []
+        for i in range(self.tamaño):
+            simbolos_indice = []
+            actual = self.tabla[i]
+            while actual:
+                simbolos_indice.append(actual.simbolo)
+                actual = actual.siguiente
+            resultado.append((i, simbolos_indice))
+        return resultado
+
+    def estadisticas(self):
+        """Ocupación de la tabla para la pestaña Hash.
+
+        sondeos_exitosos es el promedio de entradas que compara una búsqueda de
+        una entrada existente; sondeos_promedio, el de las búsquedas hechas"""
+        longitudes = []
+        for cabeza in self.tabla:
+            largo = 0
+            while cabeza is not None:
+                largo += 1
+                cabeza = cabeza.siguiente
+            longitudes.append(largo)
+        usados = sum(1 for largo in longitudes if largo)
+        return {
+            'elementos': self.elementos,
+            'tamaño': self.tamaño,
+            'factor_carga': self.elementos / self.tamaño,
+            'cubetas_usadas': usados,
+            'colisiones': self.elementos - usados,
+            'cadena_mas_larga': max(longitudes, default=0),
+            'sondeos_exitosos': (sum(largo * (largo + 1) // 2 for largo in longitudes) / self.elementos
+                                 if self.elementos else 0.0),
+            'sondeos_promedio': self.sondeos / self.busquedas if self.busquedas else 0.0,
+            'redimensionamientos': self.redimensionamientos,
+        }
+
+# ============================================================
+# BENCHMARK DE LA TABLA HASH
+# ============================================================
+class _TablaPrimeraLetra:
+    """Esquema anterior de la pestaña Hash, solo para comparar: 10 índices fijos
+    por la primera letra del nombre y búsqueda lineal en la cadena"""
+
+    def __init__(self, tamaño=10):
+        self.tamaño = tamaño
+        self.tabla = [None] * tamaño
+
+    def _hash(self, nombre):
+        return ord(nombre[0].upper()) % self.tamaño if nombre else 0
+
+    def insertar(self, simbolo, clave):
+        indice = self._hash(clave)
+        self.tabla[indice] = NodoHash(clave, indice, simbolo, self.tabla[indice])
+
+    def buscar(self, clave):
+        actual = self.tabla[self._hash(clave)]
+        while actual is not None:
+            if actual.clave == clave:
+                return actual.simbolo
+            actual = actual.siguiente
+        return None
+
+def _nombres_sinteticos(cantidad):
+    """Identificadores parecidos a los de un programa (muchos con la misma inicial)"""
+    prefijos = ('var', 'valor', 'temp', 'total', 'suma', 'contador', 'x', 'i')
+    return [f"{prefijos[i % len(prefijos)]}{i}" for i in range(cantidad)]
+
+def benchmark_tabla_hash(cantidades=(100, 1000, 10000), repeticiones=3):
+    """Inserción y búsqueda de cantidad nombres en dict, TablaHash y el esquema anterior"""
+    implementaciones = (
+        ('dict', dict, lambda t, clave, valor: t.__setitem__(clave, valor), lambda t, clave: t.get(clave)),
+        ('TablaHash', TablaHash, lambda t, clave, valor: t.insertar(valor, clave), lambda t, clave: t.buscar(clave)),
+        ('primera letra', _TablaPrimeraLetra, lambda t, clave, valor: t.insertar(valor, clave), lambda t, clave: t.buscar(clave)),
+    )
+    for cantidad in cantidades:
+        nombres = _nombres_sinteticos(cantidad)
+        print(f"=== BENCHMARK TABLA HASH ({cantidad} nombres) ===")
+        for nombre_impl, crear, insertar, buscar in implementaciones:
+            mejor_insercion = mejor_busqueda = float('inf')
+            for _ in range(repeticiones):
+                tabla = crear()
+                inicio = time.perf_counter()
+                for nombre in nombres:
+                    insertar(tabla, nombre, nombre)
+                medio = time.perf_counter()
+                for nombre in nombres:
+                    buscar(tabla, nombre)
+                fin = time.perf_counter()
+                mejor_insercion = min(mejor_insercion, medio - inicio)
+                mejor_busqueda = min(mejor_busqueda, fin - medio)
+            print(f"{nombre_impl:<14} inserción {mejor_insercion / cantidad * 1e6:8.3f} µs/op"
+                  f"   búsqueda {mejor_busqueda / cantidad * 1e6:8.3f} µs/op")
+            if isinstance(tabla, TablaHash):
+                stats = tabla.estadisticas()
+                print(f"{'':<14} tamaño {stats['tamaño']}, factor de carga {stats['factor_carga']:.2f}, "
+                      f"cadena más larga {stats['cadena_mas_larga']}, "
+                      f"sondeos promedio {stats['sondeos_promedio']:.2f}")
+        print()
+
+if __name__ == "__main__":
+    benchmark_tabla_hash()
@@ -0,0 +1,136 @@
+# traza.py - Mensajes de depuración por subsistema con niveles y salida JSON opcional
+import json
+import os
+import sys
+import threading
+import time
+
+# Niveles (como en logging: mayor es más grave)
+DEBUG = 10
+INFO = 20
+AVISO = 30
+ERROR = 40
+NOMBRES_NIVEL = {DEBUG: 'debug', INFO: 'info', AVISO: 'aviso', ERROR: 'error'}
+_NIVEL_POR_NOMBRE = {nombre: nivel for nivel, nombre in NOMBRES_NIVEL.items()}
+
+# Sin configuración solo se muestran avisos y errores
+NIVEL_DEFECTO = AVISO
+
+_canales = {}
+_niveles = {}
+_nivel_general = NIVEL_DEFECTO
+_texto = True
+# Archivo de todos los mensajes de texto; con None, debug e info van a la
+# salida estándar y avisos y errores a stderr
+_flujo = None
+_archivo_json = None
+_candado = threading.Lock()
+
+class Canal:
+    """Salida de mensajes de un subsistema (lexico, semantico, intermedio...).
+
+    debug_activo e info_activo dicen si el canal emite esos niveles; en los
+    caminos calientes se consultan antes de armar el mensaje, así que con la
+    traza apagada el costo es una sola comprobación:
+
+        if _traza.debug_activo:
+            _traza.debug(f"Procesando nodo {nodo.type}", nodo=nodo.type)
+
+    Los campos con nombre solo se escriben en la salida JSON"""
+    __slots__ = ('nombre', 'nivel', 'debug_activo', 'info_activo')
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self._ajustar(_niveles.get(nombre, _nivel_general))
+
+    def _ajustar(self, nivel):
+        self.nivel = nivel
+        self.debug_activo = nivel <= DEBUG
+        self.info_activo = nivel <= INFO
+
+    def emitir(self, nivel, mensaje, **campos):
+        if nivel < self.nivel:
+            return
+        if _texto:
+            print(mensaje, file=_flujo or (sys.stderr if nivel >= AVISO else sys.stdout))
+        if _archivo_json is not None:
+            registro = {'t': time.time(), 'canal': self.nombre,
+                        'nivel': NOMBRES_NIVEL.get(nivel, nivel), 'mensaje': mensaje}
+            registro.update(campos)
+            linea = json.dumps(registro, ensure_ascii=False, default=str)
+            with _candado:
+                _archivo_json.write(linea + "\n")
+
+    def debug(self, mensaje, **campos):
+        self.emitir(DEBUG, mensaje, **campos)
+
+    def info(self, mensaje, **campos):
+        self.emitir(INFO, mensaje, **campos)
+
+    def aviso(self, mensaje, **campos):
+        self.emitir(AVISO, mensaje, **campos)
+
+    def error(self, mensaje, **campos):
+        self.emitir(ERROR, mensaje, **campos)
+
+def canal(nombre):
+    """Canal del subsistema (uno por nombre)"""
+    existente = _canales.get(nombre)
+    if existente is None:
+        existente = _canales[nombre] = Canal(nombre)
+    return existente
+
+def _nivel(valor):
+    if isinstance(valor, int):
+        return valor
+    try:
+        return _NIVEL_POR_NOMBRE[valor.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Nivel de traza desconocido: {valor!r}") from None
+
+def configurar(niveles=None, texto=None, archivo_json=None, flujo=None):
+    """Cambia los niveles y las salidas de la traza.
+
+    niveles: nivel general ('debug', INFO...), dict canal -> nivel, o texto
+    como "info,semantico=debug" (un nivel suelto es el general).
+    texto: si los mensajes se imprimen en la consola.
+    archivo_json: ruta donde agregar un registro JSON por línea ('' la cierra).
+    flujo: archivo donde imprimir todos los mensajes de texto (p. ej. sys.stderr
+    cuando la salida estándar lleva un resultado)"""
+    global _nivel_general, _texto, _archivo_json, _flujo
+    if niveles is not None:
+        if isinstance(niveles, str):
+            general, por_canal = None, {}
+            for parte in filter(None, (p.strip() for p in niveles.split(','))):
+                nombre, igual, valor = parte.partition('=')
+                if igual:
+                    por_canal[nombre.strip()] = _nivel(valor)
+                else:
+                    general = _nivel(nombre)
+        elif isinstance(niveles, dict):
+            general, por_canal = None, {nombre: _nivel(valor) for nombre, valor in niveles.items()}
+        else:
+            general, por_canal = _nivel(niveles), {}
+        if general is not None:
+            _nivel_general = general
+            _niveles.clear()
+        _niveles.update(por_canal)
+        for nombre, existente in _canales.items():
+            existente._ajustar(_niveles.get(nombre, _nivel_general))
+    if texto is not None:
+        _texto = texto
+    if flujo is not None:
+        _flujo = flujo
+    if archivo_json is not None:
+        with _candado:
+            if _archivo_json is not None:
+                _archivo_json.close()
+            _archivo_json = open(archivo_json, 'a', encoding='utf-8', buffering=1) if archivo_json else None
+
+# PYTHONCOMPILER_TRAZA fija los niveles (p. ej. "debug" o "aviso,intermedio=debug")
+# y PYTHONCOMPILER_TRAZA_JSON el archivo JSON-lines
+try:
+    configurar(niveles=os.environ.get('PYTHONCOMPILER_TRAZA') or None,
+               archivo_json=os.environ.get('PYTHONCOMPILER_TRAZA_JSON') or None)
+except (ValueError, OSError) as e:
+    print(f"Configuración de traza inválida, se ignora: {e}", file=sys.stderr)
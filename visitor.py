@@ -0,0 +1,79 @@
+# visitor.py - Recorrido iterativo del AST con despacho por tabla
+from sintactico import ASTNode
+
+# Devuelto por un método visitar_* para no recorrer los hijos del nodo
+SALTAR = object()
+
+class Accion:
+    """Trabajo diferido dentro de un recorrido: funcion(*args) se ejecuta al sacarla de la pila.
+
+    Si devuelve una secuencia de nodos o acciones, se recorren a continuación
+    con el contexto de la acción"""
+    __slots__ = ('funcion', 'args')
+
+    def __init__(self, funcion, *args):
+        self.funcion = funcion
+        self.args = args
+
+class Visitor:
+    """Recorre el AST en preorden con una pila explícita (sin límite de recursión).
+
+    Las subclases definen visitar_<tipo>(nodo, contexto); la tabla tipo -> método
+    se arma una vez al crear la clase. Varios tipos comparten método asignándolo
+    en el cuerpo de la clase (visitar_if_then = visitar_if). Lo que devuelve:
+      None               recorrer los hijos con el mismo contexto
+      SALTAR             no recorrer los hijos
+      (items, contexto)  recorrer items (nodos o Accion) en orden con ese contexto
+    Los elementos que no son ASTNode (None, literales) se ignoran"""
+    _tabla = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._tabla = {nombre[len('visitar_'):]: nombre for nombre in dir(cls)
+                      if nombre.startswith('visitar_') and nombre != 'visitar_defecto'}
+
+    def __init__(self):
+        self._despacho = {tipo: getattr(self, nombre) for tipo, nombre in self._tabla.items()}
+
+    def visitar(self, nodo, contexto):
+        """Despacha el nodo a su método; las subclases pueden filtrar nodos aquí"""
+        return self._despacho.get(nodo.type, self.visitar_defecto)(nodo, contexto)
+
+    def visitar_defecto(self, nodo, contexto):
+        return None
+
+    def error(self, item, excepcion):
+        """Excepción en un método visitar_* o en una Accion; por defecto se propaga.
+
+        Si una subclase la absorbe, los hijos del nodo no se recorren"""
+        raise excepcion
+
+    def recorrer(self, raiz, contexto=None):
+        pila = [(raiz, contexto)]
+        visitar = self.visitar
+        while pila:
+            item, contexto = pila.pop()
+            if item.__class__ is Accion:
+                try:
+                    siguientes = item.funcion(*item.args)
+                except Exception as e:
+                    self.error(item, e)
+                    continue
+                if siguientes:
+                    pila.extend([(x, contexto) for x in reversed(siguientes)])
+                continue
+            if not isinstance(item, ASTNode):
+                continue
+            try:
+                resultado = visitar(item, contexto)
+            except Exception as e:
+                self.error(item, e)
+                continue
+            if resultado is None:
+                hijos = item.children
+            elif resultado is SALTAR:
+                continue
+            else:
+                hijos, contexto = resultado
+            if hijos:
+                pila.extend([(x, contexto) for x in reversed(hijos)])